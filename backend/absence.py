@@ -0,0 +1,135 @@
+# backend/absence.py
+import bisect
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.models import PTORequest
+
+Interval = Tuple[int, int]  # inclusive (start_ordinal, end_ordinal)
+
+
+class AbsenceIndex:
+    """
+    Per-team count of people out per day, stored as int32 arrays over ordinal days,
+    plus a sorted interval list per employee. Prefix sums are rebuilt lazily after
+    an update, so range questions are O(1) between updates. Each interval counts
+    for the team it was added under, so a request re-added after its employee
+    moved teams is moved between the two teams' counts.
+    """
+
+    def __init__(self, start: Optional[date] = None, span_days: int = 3 * 366):
+        start = start or date.today() - timedelta(days=366)
+        self.base = start.toordinal()
+        self.span = span_days
+        self._counts: Dict[str, np.ndarray] = {}
+        self._prefix: Dict[str, np.ndarray] = {}
+        self._intervals: Dict[str, List[Interval]] = {}
+        self._team_of: Dict[Tuple[str, Interval], str] = {}  # (employee_id, interval) -> team counted
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, int, int]], **kw) -> "AbsenceIndex":
+        """Build from (employee_id, team, start_ordinal, end_ordinal) rows, e.g. Store.requests_between."""
+        idx = cls(**kw)
+        for emp_id, team, lo, hi in rows:
+            idx.add_interval(team, emp_id, date.fromordinal(lo), date.fromordinal(hi))
+        return idx
+
+    # ---------- updates ----------
+    def _grow(self, lo: int, hi: int):
+        if lo >= self.base and hi < self.base + self.span:
+            return
+        new_base = min(self.base, lo)
+        new_span = max(self.base + self.span, hi + 1) - new_base
+        shift = self.base - new_base
+        for team, arr in self._counts.items():
+            grown = np.zeros(new_span, dtype=np.int32)
+            grown[shift:shift + self.span] = arr
+            self._counts[team] = grown
+        self._prefix.clear()
+        self.base, self.span = new_base, new_span
+
+    def _add(self, team: str, lo: int, hi: int, delta: int):
+        self._grow(lo, hi)
+        arr = self._counts.get(team)
+        if arr is None:
+            arr = self._counts[team] = np.zeros(self.span, dtype=np.int32)
+        arr[lo - self.base:hi - self.base + 1] += delta
+        self._prefix.pop(team, None)
+
+    def add_interval(self, team: str, employee_id: str, start: date, end: date):
+        iv = (start.toordinal(), end.toordinal())
+        with self._lock:
+            ivs = self._intervals.setdefault(employee_id, [])
+            pos = bisect.bisect_left(ivs, iv)
+            if pos < len(ivs) and ivs[pos] == iv:
+                old = self._team_of[(employee_id, iv)]
+                if old == team:
+                    return
+                self._add(old, iv[0], iv[1], -1)  # employee changed teams since it was added
+            else:
+                ivs.insert(pos, iv)
+            self._team_of[(employee_id, iv)] = team
+            self._add(team, iv[0], iv[1], 1)
+
+    def remove_interval(self, employee_id: str, start: date, end: date):
+        iv = (start.toordinal(), end.toordinal())
+        with self._lock:
+            ivs = self._intervals.get(employee_id, [])
+            pos = bisect.bisect_left(ivs, iv)
+            if pos == len(ivs) or ivs[pos] != iv:
+                return
+            ivs.pop(pos)
+            self._add(self._team_of.pop((employee_id, iv)), iv[0], iv[1], -1)
+
+    def apply(self, req: PTORequest, team: str):
+        """Reflect a request's status: approved ones count as out, anything else does not."""
+        if req.status == "approved":
+            self.add_interval(team, req.employee_id, req.start_date, req.end_date)
+        else:
+            self.remove_interval(req.employee_id, req.start_date, req.end_date)
+
+    # ---------- queries ----------
+    def _prefix_for(self, team: str) -> np.ndarray:
+        # caller holds the lock: updates invalidate the cached prefix under it
+        p = self._prefix.get(team)
+        if p is None:
+            counts = self._counts.get(team)
+            if counts is None:
+                counts = np.zeros(self.span, dtype=np.int32)
+            p = self._prefix[team] = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        return p
+
+    def out_days(self, team: str, start: date, end: date) -> int:
+        """Person-days out for the team in [start, end]."""
+        with self._lock:
+            p, base, span = self._prefix_for(team), self.base, self.span
+        lo = min(max(start.toordinal() - base, 0), span)
+        hi = min(max(end.toordinal() - base + 1, 0), span)
+        return int(p[hi] - p[lo]) if hi > lo else 0
+
+    def occupancy(self, team: str, start: date, days: int) -> np.ndarray:
+        """Per-day counts for [start, start + days); a view when fully inside the index."""
+        with self._lock:
+            arr, base, span = self._counts.get(team), self.base, self.span
+        lo = start.toordinal() - base
+        if arr is not None and lo >= 0 and lo + days <= span:
+            return arr[lo:lo + days]
+        out = np.zeros(days, dtype=np.int32)
+        if arr is not None:
+            a, b = max(lo, 0), min(lo + days, span)
+            if b > a:
+                out[a - lo:b - lo] = arr[a:b]
+        return out
+
+    def is_out(self, employee_id: str, day: date) -> bool:
+        o = day.toordinal()
+        ivs = self._intervals.get(employee_id, [])
+        pos = bisect.bisect_right(ivs, (o, float("inf")))
+        return pos > 0 and ivs[pos - 1][0] <= o <= ivs[pos - 1][1]
+
+    def intervals(self, employee_id: str) -> List[Tuple[date, date]]:
+        return [(date.fromordinal(a), date.fromordinal(b)) for a, b in self._intervals.get(employee_id, [])]
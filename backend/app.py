@@ -1,19 +1,93 @@
-from fastapi import FastAPI, Query
-from typing import List, Dict
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import List, Dict, Optional, Union
 from datetime import date, timedelta
+import json
+import logging
+import os
+import threading
+import time
 
-app = FastAPI(title="SmartPTO API", version="0.1.0")
+from backend import gmail_reader, sample_data
+from backend.absence import AbsenceIndex
+from backend.forecast import forecast_balances
+from backend.jobs import JobQueue, QueueFull
+from backend.mailbox_scan import iter_team_scan, token_mailboxes
+from backend.metrics import CONTENT_TYPE, HTTP_LATENCY, REGISTRY
+from backend.models import (
+    AccrualPolicy, BatchRecommendRequest, PTORecommendation, PTORequest, ScheduleDemand, ScheduleRequest, ScheduleResult,
+)
+from backend.optimizer import optimize_schedule
+from backend.recommender import best_windows
+from backend.snapshot import SNAPSHOT_PATH, OccupancySnapshot, SnapshotReader
+from backend.store import Store
+from backend.workdays import DEFAULT_REGION, get_calendar
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    yield
+    SCAN_JOBS.shutdown()  # cancel queued and running Gmail scans
+
+
+app = FastAPI(title="SmartPTO API", version="0.1.0", lifespan=_lifespan)
+
+# --- Persistent store (SQLite, shared by all workers) ---
+STORE = Store()
+STORE.seed_if_empty(sample_data.EMPLOYEES.values(), sample_data.PTO_REQUESTS)
+
+# team occupancy shared by all workers through an mmap'd snapshot (SMARTPTO_SNAPSHOT);
+# with snapshots off, a per-process absence index reloaded when another worker changes the store
+SNAPSHOTS = SnapshotReader(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+_absences: Optional[AbsenceIndex] = None
+_absences_rev = -1
+_absences_lock = threading.RLock()  # held while reloading, and by submit_pto across its write and patch
+
+
+def _absence_index() -> Union[OccupancySnapshot, AbsenceIndex]:
+    global _absences, _absences_rev
+    rev = STORE.revision()
+    if SNAPSHOTS is not None:
+        snap = SNAPSHOTS.current()
+        store_id = STORE.store_id()
+        if SNAPSHOTS.up_to_date(snap, store_id, rev):
+            return snap
+        if SNAPSHOTS.usable(snap, store_id):
+            # a write since the last build: answer from it while it is rebuilt off the request path
+            SNAPSHOTS.refresh_in_background(store_id, STORE.revision, STORE.requests_between)
+            return snap
+        return SNAPSHOTS.refresh(store_id, STORE.revision, STORE.requests_between)
+    if _absences is None or rev != _absences_rev:
+        with _absences_lock:
+            rev = STORE.revision()  # another thread may have reloaded or patched while we waited
+            if _absences is None or rev != _absences_rev:
+                idx = AbsenceIndex()
+                end = date.fromordinal(idx.base + idx.span - 1)
+                _absences = AbsenceIndex.from_rows(STORE.requests_between(date.fromordinal(idx.base), end))
+                _absences_rev = rev
+    return _absences
+
+
+# --- Metrics ---
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")  # the route template keeps label cardinality bounded
+        HTTP_LATENCY.observe(time.perf_counter() - t0, method=request.method,
+                             route=getattr(route, "path", "unmatched"), status=status)
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text format; counters are per worker process."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
 
-# --- Fake in-memory data store ---
-EMPLOYEES: Dict[str, Dict] = {
-    "u1": {"id": "u1", "name": "Ryan", "accrual_days": 8.5, "team": "alpha"},
-    "u2": {"id": "u2", "name": "Alex", "accrual_days": 12, "team": "alpha"},
-    "u3": {"id": "u3", "name": "Priya", "accrual_days": 6, "team": "beta"},
-}
-TEAM_OUT: Dict[str, List[str]] = {
-    "alpha": ["2025-10-20", "2025-10-21"],
-    "beta": ["2025-10-15"],
-}
 
 # --- Healthcheck ---
 @app.get("/health")
@@ -21,57 +95,355 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/revision")
+def revision():
+    """Store revision; bumps on every write (POST /pto, team scans), so clients can key caches on it."""
+    return {"revision": STORE.revision()}
+
+
+# --- Employees ---
+@app.get("/employees")
+def employees(team: Optional[str] = None):
+    return [{"id": e.id, "name": e.name, "team": e.team} for e in STORE.list_employees(team)]
+
+
 # --- Balance ---
 @app.get("/balance")
 def balance(employee_id: str = Query(..., description="Employee ID to check balance")):
-    emp = EMPLOYEES.get(employee_id)
+    emp = STORE.get_employee(employee_id)
     if not emp:
         return {"error": "employee not found", "employee_id": employee_id}
     return {
-        "employee_id": emp["id"],
-        "name": emp["name"],
-        "accrual_days": emp["accrual_days"],
+        "employee_id": emp.id,
+        "name": emp.name,
+        "accrual_days": emp.accrual_days,
     }
 
 
+# --- Balance forecast ---
+POLICY = AccrualPolicy(
+    days_per_month=float(os.environ.get("PTO_ACCRUAL_PER_MONTH", "1.25")),
+    carry_over_cap=float(os.environ.get("PTO_CARRY_OVER_CAP", "5")),
+    carry_over_expiry_month=int(os.environ.get("PTO_CARRY_OVER_EXPIRY_MONTH", "4")),
+)
+
+
+def _forecast(employees, horizon_days: int):
+    first = date.today() + timedelta(days=1)
+    approved = STORE.requests_between(first, first + timedelta(days=horizon_days - 1))
+    return forecast_balances(first, horizon_days, employees, approved, POLICY,
+                             get_calendar(DEFAULT_REGION, first.year))
+
+
+@app.get("/balance/forecast")
+def balance_forecast(
+    team: Optional[str] = None,
+    horizon_days: int = Query(365, ge=1, le=730),
+    series_step: int = Query(0, ge=0, le=365, description="also return every n-th day's balance (0 = no series)"),
+):
+    """Projected balance of every employee (or one team) with accrual, approved PTO and carry-over rules."""
+    employees = STORE.list_employees(team)
+    fc = _forecast(employees, horizon_days)
+    low = fc.balance.argmin(axis=1)
+    out = []
+    for i, emp in enumerate(employees):
+        row = {
+            "employee_id": emp.id,
+            "balance_now": float(fc.opening[i]),
+            "balance_end": round(float(fc.balance[i, -1]), 2),
+            "min_balance": round(float(fc.balance[i, low[i]]), 2),
+            "min_balance_date": (fc.first + timedelta(days=int(low[i]))).isoformat(),
+            "forfeited_days": round(float(fc.forfeited[i]), 2),
+        }
+        if series_step:
+            row["series"] = fc.balance[i, series_step - 1::series_step].round(2).tolist()
+        out.append(row)
+    return {"start": fc.first.isoformat(), "horizon_days": horizon_days, "policy": POLICY, "employees": out}
+
+
+@app.post("/balance/affordability")
+def balance_affordability(windows: List[PTORecommendation]):
+    """
+    Check many windows (e.g. /recommend/batch output) against the forecast at once:
+    a window is affordable if its PTO days fit the balance on its start day and
+    keep every later day until the next year-end cap non-negative.
+    """
+    if not windows:
+        return []
+    cal = get_calendar(DEFAULT_REGION, date.today().year)
+    costs = [w.pto_days if w.pto_days is not None else cal.pto_cost(w.window_start, w.window_end) for w in windows]
+    horizon = max((w.window_start - date.today()).days for w in windows)
+    employees = [e for e in (STORE.get_employee(i) for i in {w.employee_id for w in windows}) if e]
+    fc = _forecast(employees, min(max(horizon, 1) + 366, 730))
+    ok, avail = fc.affordable([w.employee_id for w in windows], [w.window_start for w in windows], costs)
+    return [
+        {
+            "employee_id": w.employee_id,
+            "window_start": w.window_start.isoformat(),
+            "window_end": w.window_end.isoformat(),
+            "pto_days": cost,
+            "available_days": None if a != a else round(float(a), 2),  # NaN = unknown employee
+            "affordable": bool(k),
+        }
+        for w, cost, k, a in zip(windows, costs, ok, avail)
+    ]
+
+
 # --- Recommend ---
 @app.get("/recommend")
 def recommend(
     employee_id: str = Query(...),
     desired_len_days: int = Query(3, ge=1, le=14),
+    horizon_days: int = Query(60, ge=7, le=365),
+    max_coverage_ratio: float = Query(0.3, ge=0.0, le=1.0),
+    top_k: int = Query(5, ge=1, le=20),
 ):
-    """Suggest a PTO window (dummy implementation)."""
-    if employee_id not in EMPLOYEES:
+    """Suggest the PTO windows with the least team coverage in the horizon."""
+    emp = STORE.get_employee(employee_id)
+    if not emp:
         return {"error": "employee not found", "employee_id": employee_id}
 
+    team = emp.team
     today = date.today()
-    start = today + timedelta(days=7)  # pretend we always recommend 1 week from today
-    end = start + timedelta(days=desired_len_days - 1)
-
+    windows = best_windows(
+        today, _absence_index().occupancy(team, today, horizon_days), desired_len_days,
+        STORE.team_size(team), max_coverage_ratio, top_k,
+    )
     return [
         {
             "employee_id": employee_id,
             "window_start": start.isoformat(),
             "window_end": end.isoformat(),
-            "reason": "Demo rule: always suggest next week",
-            "coverage_ratio": 0.1,
+            "reason": f"{cov:.0%} of team {team} out on average",
+            "coverage_ratio": cov,
+            "pto_days": pto,
         }
+        for start, end, cov, pto in windows
     ]
 
 
+# --- Bridge days ---
+@app.get("/bridges")
+def bridges(
+    horizon_days: int = Query(90, ge=7, le=365),
+    max_pto_days: int = Query(3, ge=1, le=10),
+    top_k: int = Query(5, ge=1, le=20),
+    region: str = DEFAULT_REGION,
+):
+    """Windows that give the most consecutive days off per PTO day (weekends + holidays)."""
+    today = date.today()
+    cal = get_calendar(region, today.year)
+    return [
+        {"window_start": s.isoformat(), "window_end": e.isoformat(), "days_off": off, "pto_days": pto}
+        for s, e, off, pto in cal.bridges(today + timedelta(days=1), horizon_days, max_pto_days, top_k=top_k)
+    ]
 
 
+# --- Dashboard: balance + recommendations in one round trip ---
+@app.get("/dashboard")
+def dashboard(
+    employee_id: str = Query(...),
+    desired_len_days: int = Query(3, ge=1, le=14),
+    horizon_days: int = Query(60, ge=7, le=365),
+    max_coverage_ratio: float = Query(0.3, ge=0.0, le=1.0),
+    top_k: int = Query(5, ge=1, le=20),
+):
+    rev = STORE.revision()  # read first: a write racing this call makes the answer look older, never newer
+    bal = balance(employee_id)
+    if "error" in bal:
+        return bal
+    return {
+        "revision": rev,
+        "balance": bal,
+        "recommendations": recommend(employee_id, desired_len_days, horizon_days, max_coverage_ratio, top_k),
+    }
 
 
+@app.post("/recommend/batch", response_model=List[PTORecommendation])
+def recommend_batch(req: BatchRecommendRequest):
+    """
+    Recommend windows for a whole team or a list of employees in one call.
+    Each team's calendar is built and scored once and shared by its members; each
+    member then gets the best top_k windows whose PTO days fit their own balance.
+    """
+    if not req.team and not req.employee_ids:
+        return JSONResponse({"error": "no employees selected", "detail": "pass a team and/or employee_ids"},
+                            status_code=422)
+    members = {}
+    unknown = []
+    for emp_id in req.employee_ids:
+        emp = STORE.get_employee(emp_id)
+        if emp:
+            members[emp.id] = emp
+        else:
+            unknown.append(emp_id)
+    if unknown:
+        return JSONResponse({"error": "employee not found", "employee_ids": unknown}, status_code=404)
+    if req.team:
+        team_members = STORE.list_employees(req.team)
+        if not team_members:
+            return JSONResponse({"error": "team not found", "team": req.team}, status_code=404)
+        members.update((e.id, e) for e in team_members)
 
+    today = date.today()
+    absences = _absence_index()
+    per_team: Dict[str, list] = {}
+    out: List[PTORecommendation] = []
+    for emp in members.values():
+        team = emp.team
+        if team not in per_team:
+            # every window under the cap, best first, so each member can skip the ones they cannot afford
+            per_team[team] = best_windows(
+                today, absences.occupancy(team, today, req.horizon_days), req.desired_len_days,
+                STORE.team_size(team), req.max_coverage_ratio, req.horizon_days,
+            )
+        affordable = [w for w in per_team[team] if w[3] <= emp.accrual_days][:req.top_k]
+        out.extend(
+            PTORecommendation(
+                employee_id=emp.id,
+                window_start=start,
+                window_end=end,
+                reason=f"{cov:.0%} of team {team} out on average",
+                coverage_ratio=cov,
+                pto_days=pto,
+            )
+            for start, end, cov, pto in affordable
+        )
+    return out
 
 
+# --- Org-wide schedule ---
+@app.post("/schedule/optimize", response_model=ScheduleResult)
+def schedule_optimize(req: ScheduleRequest):
+    """
+    Assign windows to every demand in a team (or the whole org) at once, keeping each
+    day under max_coverage_ratio. Without explicit demands every employee asks for
+    default_len_days. Every pending PTO request in the horizon becomes a demand with a
+    preferred start and replaces that employee's other demands. New windows avoid the
+    days each employee already has approved leave. Demands for employees outside the
+    team (or unknown) are reported in `unassigned`.
+    """
+    employees = STORE.list_employees(req.team)
+    members = {e.id for e in employees}
+    today = date.today()
+    demands = list(req.demands)
+    if not req.demands:
+        demands = [ScheduleDemand(employee_id=e.id, desired_len_days=req.default_len_days) for e in employees]
+    if req.include_pending:
+        pending: Dict[str, List[ScheduleDemand]] = {}
+        rows = STORE.requests_between(today, today + timedelta(days=req.horizon_days), "pending")
+        for emp_id, _, lo, hi in sorted(rows):
+            if emp_id in members:
+                pending.setdefault(emp_id, []).append(ScheduleDemand(
+                    employee_id=emp_id, desired_len_days=min(hi - lo + 1, 30), preferred_start=date.fromordinal(lo)))
+        demands = [d for d in demands if d.employee_id not in pending] + [d for ds in pending.values() for d in ds]
+
+    team_sizes: Dict[str, int] = {}
+    for e in employees:
+        team_sizes[e.team] = team_sizes.get(e.team, 0) + 1
+    absences = _absence_index()
+    return optimize_schedule(
+        today, req.horizon_days, req.max_coverage_ratio, employees, demands,
+        lambda team: absences.occupancy(team, today, req.horizon_days), team_sizes,
+        calendar=get_calendar(DEFAULT_REGION, today.year),
+        approved=STORE.requests_between(today, today + timedelta(days=req.horizon_days - 1)),
+    )
+
+
+# --- PTO requests ---
+@app.post("/pto")
+def submit_pto(req: PTORequest):
+    """
+    Create or update a PTO request. Approving/denying patches the per-process team
+    calendar in place, or has the next lookup rebuild the shared snapshot in the background.
+    """
+    global _absences_rev
+    if SNAPSHOTS is not None:
+        team, _ = STORE.upsert_request(req)
+        if team is None:
+            return {"error": "employee not found", "employee_id": req.employee_id}
+        # the snapshot may not have this write yet: count the range from the store's (team, start) index
+        rows = STORE.team_requests(team, req.start_date, req.end_date)
+        out = sum(min(r.end_date, req.end_date).toordinal() - max(r.start_date, req.start_date).toordinal() + 1
+                  for r in rows)
+        return {"request": req, "team_out_days": out}
+    with _absences_lock:  # no other thread of ours can write between the load and the patch
+        absences = _absence_index()
+        prev_rev = _absences_rev
+        team, rev = STORE.upsert_request(req)
+        if team is not None and rev == prev_rev + 1:
+            # only our own write happened since the last load: patch the index in place
+            absences.apply(req, team)
+            _absences_rev = rev
+    if team is None:
+        return {"error": "employee not found", "employee_id": req.employee_id}
+    return {
+        "request": req,
+        "team_out_days": _absence_index().out_days(team, req.start_date, req.end_date),
+    }
+
+
+
+
+
+
+
+
+
+
+
+# --- Gmail endpoints ---
+# "1": always scan the built-in demo mailbox; "0": never (no credentials is an error);
+# "auto": demo only while backend/credentials.json is missing. Responses carry "demo".
+GMAIL_DEMO = os.environ.get("SMARTPTO_GMAIL_DEMO", "auto").lower()
+_demo_mailbox = None
+_demo_warned = False
+log = logging.getLogger(__name__)
+
+
+class GmailUnavailable(Exception):
+    pass
+
+
+def _gmail_demo() -> bool:
+    """True if Gmail endpoints should use demo mailboxes instead of the real OAuth ones."""
+    global _demo_warned
+    if GMAIL_DEMO in ("1", "true", "yes"):
+        return True
+    if os.path.exists(gmail_reader.CREDENTIALS_FILE):
+        return False
+    if GMAIL_DEMO in ("0", "false", "no"):
+        raise GmailUnavailable(f"no Gmail client credentials at {gmail_reader.CREDENTIALS_FILE}")
+    if not _demo_warned:
+        _demo_warned = True
+        log.warning("no Gmail client credentials at %s: Gmail endpoints use demo mailboxes "
+                    "(set SMARTPTO_GMAIL_DEMO=0 to refuse instead)", gmail_reader.CREDENTIALS_FILE)
+    return True
+
+
+def _gmail_service():
+    """None (use the real OAuth mailbox), or the demo mailbox in demo mode."""
+    global _demo_mailbox
+    if not _gmail_demo():
+        return None
+    if _demo_mailbox is None:
+        from backend.fakes import FakeGmailService, demo_messages
+        _demo_mailbox = FakeGmailService(demo_messages())
+    return _demo_mailbox
+
+
+def _gmail_unavailable(e: GmailUnavailable) -> JSONResponse:
+    return JSONResponse({"error": "gmail not configured", "detail": str(e)}, status_code=503)
+
+
+def _flag_demo(events, demo: bool):
+    for ev in events:
+        yield {**ev, "demo": demo} if ev["event"] in ("start", "done") else ev
 
 
-# --- Gmail endpoints (demo stubs) ---
 @app.get("/gmail/holiday-suggestions")
 def gmail_suggestions(max_results: int = 20):
-    # Return fake keyword matches
+    # Return fake keyword matches (demo stub)
     return {
         "items": [
             {"subject": "Holiday trip to Japan", "from": "travel@airline.com", "date": "2025-09-01"},
@@ -80,18 +452,97 @@ def gmail_suggestions(max_results: int = 20):
     }
 
 @app.get("/gmail/analyze")
-def gmail_analyze(max_results: int = 50):
-    # Return fake AI suggestions
-    return {
-        "count_messages": max_results,
-        "suggestions": [
-            {
-                "window_start": "2025-12-20",
-                "window_end": "2025-12-27",
-                "reason": "Detected email about Japan trip during holidays",
-                "confidence": 0.92,
-                "source_message_id": "msg123"
-            }
-        ]
-    }
+def gmail_analyze(
+    max_results: int = 50,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|sse)$",
+                                  description="Stream events as they happen instead of one JSON body"),
+):
+    try:
+        service = _gmail_service()  # Google client libraries load on the first real Gmail call
+    except GmailUnavailable as e:
+        return _gmail_unavailable(e)
+    if not stream:
+        return {**gmail_reader.scan_and_suggest(max_results, service=service), "demo": service is not None}
+    events = _flag_demo(gmail_reader.iter_scan(max_results, service=service), service is not None)
+    if stream == "sse":
+        body = (f"event: {ev.pop('event')}\ndata: {json.dumps(ev)}\n\n" for ev in events)
+        return StreamingResponse(body, media_type="text/event-stream")
+    return StreamingResponse((json.dumps(ev) + "\n" for ev in events), media_type="application/x-ndjson")
+
+
+# --- Gmail scans as background jobs ---
+SCAN_JOBS = JobQueue()  # shut down by _lifespan
+
+
+@app.post("/gmail/scan", status_code=202)
+def gmail_scan_submit(max_results: int = Query(50, ge=1, le=500)):
+    """
+    Queue a scan and return its job id at once; poll GET /gmail/scan/{job_id}.
+    A scan with the same parameters that is still queued or running is reused.
+    """
+    try:
+        service = _gmail_service()
+    except GmailUnavailable as e:
+        return _gmail_unavailable(e)
+    key = ("gmail", id(service) if service is not None else "oauth", max_results)
+    try:
+        job, created = SCAN_JOBS.submit(
+            key, {"max_results": max_results, "demo": service is not None},
+            lambda job: gmail_reader.iter_scan(max_results, service=service),
+        )
+    except QueueFull as e:
+        return JSONResponse({"error": "scan queue is full", "detail": str(e)}, status_code=429)
+    return {"job_id": job.id, "status": job.status, "deduplicated": not created}
+
+
+@app.post("/gmail/team-scan", status_code=202)
+def gmail_team_scan_submit(team: str, max_results: int = Query(50, ge=1, le=500),
+                           dry_run: bool = Query(False, description="report hints without storing them")):
+    """
+    Queue a holiday-hint scan of every team member's mailbox (token files in
+    GMAIL_TOKENS_DIR, or demo mailboxes in demo mode). Hints become pending PTO
+    requests, except in a dry run; demo mailboxes always run dry, so made-up hints
+    never reach the store. Poll GET /gmail/scan/{job_id} for progress.
+    """
+    members = [e.id for e in STORE.list_employees(team)]
+    if not members:
+        return JSONResponse({"error": "team not found", "team": team}, status_code=404)
+    try:
+        demo = _gmail_demo()
+    except GmailUnavailable as e:
+        return _gmail_unavailable(e)
+    if not demo:
+        mailboxes = token_mailboxes(members)
+    else:
+        from backend.fakes import FakeGmailService, demo_messages
+        mailboxes = {}
+        for emp_id in members:
+            fake = FakeGmailService(demo_messages(), email=f"{emp_id}@example.com")
+            mailboxes[emp_id] = lambda fake=fake: fake
+    dry_run = dry_run or demo
+    try:
+        job, created = SCAN_JOBS.submit(
+            ("team", team, max_results, dry_run),
+            {"team": team, "max_results": max_results, "mailboxes": len(mailboxes), "demo": demo,
+             "dry_run": dry_run},
+            lambda job: iter_team_scan(mailboxes, None if dry_run else STORE, max_results, cancel=job.cancel_event),
+        )
+    except QueueFull as e:
+        return JSONResponse({"error": "scan queue is full", "detail": str(e)}, status_code=429)
+    return {"job_id": job.id, "status": job.status, "deduplicated": not created}
+
+
+@app.get("/gmail/scan/{job_id}")
+def gmail_scan_status(job_id: str, since: int = Query(0, ge=0, description="skip the first n suggestions")):
+    job = SCAN_JOBS.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "job not found", "job_id": job_id}, status_code=404)
+    return job.to_dict(since)
+
 
+@app.delete("/gmail/scan/{job_id}")
+def gmail_scan_cancel(job_id: str):
+    job = SCAN_JOBS.cancel(job_id)
+    if job is None:
+        return JSONResponse({"error": "job not found", "job_id": job_id}, status_code=404)
+    return {"job_id": job.id, "status": job.status, "cancel_requested": job.cancel_event.is_set()}
@@ -0,0 +1,149 @@
+# backend/date_extract.py
+import os
+import re
+from datetime import MAXYEAR, MINYEAR, date, datetime, timedelta
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+WEEKDAYS = {d: i for i, d in enumerate(
+    ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"])}
+
+_MONTH = r"Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?"
+_WEEKDAY = r"Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday"
+_SIMPLE_DATE = rf"(?:{_MONTH})\s+\d{{1,2}}|\d{{1,2}}[/-]\d{{1,2}}[/-]\d{{2,4}}"
+
+# (kind, pattern) in priority order; group names are prefixed per kind so they can
+# live in one alternation. A range wins over the single dates inside it.
+PATTERNS: List[Tuple[str, str]] = [
+    ("range", rf"\bfrom\s+(?P<range_start>{_SIMPLE_DATE})\s+(?:to|-|through|until)\s+(?P<range_end>{_SIMPLE_DATE})\b"),
+    ("month_day", rf"\b(?:on\s)?(?P<md_month>{_MONTH})\s+(?P<md_day>\d{{1,2}})\b"),
+    ("numeric", r"\b(?P<num_a>\d{1,2})[/-](?P<num_b>\d{1,2})[/-](?P<num_year>\d{2,4})\b"),
+    ("weekday", rf"\b(?:next|this|coming)\s+(?P<wd_day>{_WEEKDAY})\b"),
+    ("in_days", r"\b(?:in\s)?(?P<in_n>\d{1,2})\s+days\b"),
+    ("location", r"\b(?:going to|go to|trip to|travel to)\s+(?P<loc>(?-i:[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*))\b"),
+]
+DATE_PATTERNS = [p for _, p in PATTERNS]
+
+# One scan for all kinds. Every pattern starts with \b, which is hoisted out, and a
+# lookahead on the possible first characters (from/on/month names/next/this/coming/
+# in/going/go/trip/travel/digits) rejects most positions before any alternative runs.
+_LEADS = "fojmasndtcig0-9"
+_COMBINED = re.compile(
+    rf"\b(?=[{_LEADS}])(?:" + "|".join(f"(?P<{kind}>{pat[2:]})" for kind, pat in PATTERNS) + ")",
+    re.IGNORECASE,
+)
+
+DEFAULT_TRAVEL_KEYWORDS = frozenset(
+    k.strip().lower() for k in os.environ.get("PTO_TRAVEL_KEYWORDS", "japan,tokyo").split(",") if k.strip()
+)
+
+
+class DateSpan(NamedTuple):
+    kind: str        # one of the PATTERNS kinds
+    text: str
+    pos: int
+    start: Optional[date]
+    end: Optional[date]
+
+
+# ---------------- normalization (no exceptions for control flow) ----------------
+def _safe_date(y: int, m: int, d: int) -> Optional[date]:
+    if not (MINYEAR <= y <= MAXYEAR and 1 <= m <= 12 and 1 <= d <= 31):
+        return None
+    if d > 28 and m != 12:  # December always has 31 days
+        if d > (date(y, m + 1, 1) - timedelta(days=1)).day:
+            return None
+    return date(y, m, d)
+
+
+def _month_day(month: str, day: str, today: date) -> Optional[date]:
+    """The next `month day` on or after today: "Dec 20" means the next Dec 20, "Feb 29" the next leap day."""
+    m, d = MONTHS[month[:3].lower()], int(day)
+    if _safe_date(2000, m, d) is None:  # not a day in any year (2000 is a leap year)
+        return None
+    for y in range(today.year, min(today.year + 8, MAXYEAR) + 1):
+        out = _safe_date(y, m, d)
+        if out is not None and out >= today:
+            return out
+    return None
+
+
+def _numeric(a: str, b: str, year: str) -> Optional[date]:
+    y = int(year)
+    if len(year) == 2:
+        y += 2000
+    elif len(year) != 4:
+        return None
+    return _safe_date(y, int(a), int(b))  # US order: month first
+
+
+def _simple(text: str, today: date) -> Optional[date]:
+    m = _COMBINED.fullmatch(text)
+    if m is None:
+        return None
+    if m.group("month_day"):
+        return _month_day(m.group("md_month"), m.group("md_day"), today)
+    if m.group("numeric"):
+        return _numeric(m.group("num_a"), m.group("num_b"), m.group("num_year"))
+    return None
+
+
+def _normalize(m: "re.Match", today: date) -> Tuple[Optional[date], Optional[date]]:
+    kind = m.lastgroup
+    if kind == "range":
+        start = _simple(m.group("range_start"), today)
+        end = _simple(m.group("range_end"), today)
+        if start and end and end < start:
+            end = _safe_date(end.year + 1, end.month, end.day)
+        return start, end or start
+    if kind == "month_day":
+        d = _month_day(m.group("md_month"), m.group("md_day"), today)
+    elif kind == "numeric":
+        d = _numeric(m.group("num_a"), m.group("num_b"), m.group("num_year"))
+    elif kind == "weekday":
+        ahead = (WEEKDAYS[m.group("wd_day").lower()] - today.weekday()) % 7 or 7
+        d = today + timedelta(days=ahead)
+    elif kind == "in_days":
+        d = today + timedelta(days=int(m.group("in_n")))
+    else:  # location: no date implied
+        d = None
+    return d, d
+
+
+# ---------------- public API ----------------
+def extract_spans(text: str, ref: Optional[datetime] = None) -> List[DateSpan]:
+    """Every date/travel phrase in `text`, found in one scan and normalized to dates."""
+    today = (ref or datetime.now()).date()
+    spans = []
+    for m in _COMBINED.finditer(text):
+        start, end = _normalize(m, today)
+        spans.append(DateSpan(m.lastgroup, m.group(0), m.start(), start, end))
+    return spans
+
+
+def find_date_strings(text: str) -> List[str]:
+    return list(dict.fromkeys(m.group(0) for m in _COMBINED.finditer(text)))  # dedupe preserve order
+
+
+def normalize_date_string(s: str, ref: datetime) -> Tuple[Optional[date], Optional[date]]:
+    m = _COMBINED.search(s.strip())
+    if m is None:
+        return None, None
+    return _normalize(m, ref.date())
+
+
+@lru_cache(maxsize=32)
+def _keyword_regex(keywords: FrozenSet[str]) -> "re.Pattern":
+    alts = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alts})\b", re.IGNORECASE)
+
+
+def find_travel_keyword(text: str, keywords: Optional[Iterable[str]] = None) -> Optional[str]:
+    """First configured travel keyword (PTO_TRAVEL_KEYWORDS) mentioned in text, lower-cased."""
+    kws = DEFAULT_TRAVEL_KEYWORDS if keywords is None else frozenset(k.lower() for k in keywords)
+    if not kws:
+        return None
+    m = _keyword_regex(kws).search(text)
+    return m.group(0).lower() if m else None
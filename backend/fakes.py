@@ -0,0 +1,246 @@
+# backend/fakes.py
+"""Offline stand-ins for the Gmail API and Gemini models, used by the demo, benchmarks and tests."""
+import base64
+import json
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+class FakeHttpError(Exception):
+    """Mimics googleapiclient.errors.HttpError closely enough for retry logic (`.resp.status`)."""
+
+    class _Resp(dict):
+        def __init__(self, status: int):
+            super().__init__(status=str(status))
+            self.status = status
+            self.reason = "fake"
+
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(f"HTTP {status} {message}".strip())
+        self.resp = self._Resp(status)
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def make_message(msg_id: str, subject: str, body: str, sender: str = "someone@example.com",
+                 date: str = "Mon, 1 Sep 2025 09:00:00 +0000", html: Optional[str] = None) -> Dict[str, Any]:
+    """Build a message in the shape users.messages.get(format="full") returns."""
+    headers = [
+        {"name": "Subject", "value": subject},
+        {"name": "From", "value": sender},
+        {"name": "Date", "value": date},
+    ]
+    parts = [{"mimeType": "text/plain", "body": {"data": _b64(body), "size": len(body)}}]
+    if html is not None:
+        parts.append({"mimeType": "text/html", "body": {"data": _b64(html), "size": len(html)}})
+    return {
+        "id": msg_id,
+        "threadId": msg_id,
+        "internalDate": str(int(parsedate_to_datetime(date).timestamp() * 1000)),
+        "snippet": body[:120],
+        "payload": {"mimeType": "multipart/alternative", "headers": headers, "parts": parts},
+    }
+
+
+def demo_messages() -> List[Dict[str, Any]]:
+    sent = format_datetime(datetime.now(timezone.utc) - timedelta(days=1))  # relative dates resolve against this
+    return [
+        make_message("msg123", "Holiday trip to Japan",
+                     "Flights booked! We are going to Japan from Dec 20 to Dec 27.",
+                     sender="travel@airline.com", date=sent),
+        make_message("msg124", "OOO notice",
+                     "I'll be out of office next Friday, back the Monday after.",
+                     sender="colleague@company.com", date=sent),
+        make_message("msg125", "Team lunch", "Lunch is moved to 12:30 this week.", date=sent),
+    ]
+
+
+class _Request:
+    def __init__(self, fn: Callable[[], Any]):
+        self._fn = fn
+
+    def execute(self, **_kw):
+        return self._fn()
+
+
+class _Messages:
+    def __init__(self, svc: "FakeGmailService"):
+        self._svc = svc
+
+    def list(self, userId: str = "me", q: str = "", maxResults: int = 100, pageToken: Optional[str] = None, **_kw):
+        svc = self._svc
+
+        def run():
+            start = int(pageToken or 0)
+            with svc._lock:
+                ids = svc._order[start:start + maxResults]
+                more = start + maxResults < len(svc._order)
+            resp: Dict[str, Any] = {"messages": [{"id": i, "threadId": i} for i in ids],
+                                    "resultSizeEstimate": len(ids)}
+            if more:
+                resp["nextPageToken"] = str(start + maxResults)
+            return resp
+        return svc._call("messages.list", run)
+
+    def get(self, userId: str = "me", id: str = "", format: str = "full", **_kw):
+        svc = self._svc
+
+        def run():
+            msg = svc._messages.get(id)
+            if id in svc.failures:
+                raise FakeHttpError(svc.failures[id], "injected failure")
+            if msg is None:
+                raise FakeHttpError(404, "not found")
+            if format == "metadata":
+                return {"id": id, "threadId": msg.get("threadId", id), "snippet": msg.get("snippet", ""),
+                        "historyId": msg.get("historyId"), "internalDate": msg.get("internalDate"),
+                        "payload": {"headers": msg["payload"].get("headers", [])}}
+            return msg
+        return svc._call("messages.get", run)
+
+
+class _History:
+    def __init__(self, svc: "FakeGmailService"):
+        self._svc = svc
+
+    def list(self, userId: str = "me", startHistoryId: str = "0", pageToken: Optional[str] = None, **_kw):
+        svc = self._svc
+
+        def run():
+            start = int(startHistoryId)
+            with svc._lock:
+                if start < svc._history_floor:
+                    raise FakeHttpError(404, "startHistoryId too old")
+                records = [r for r in svc._history if r["id"] > start]
+                return {"history": [dict(r, id=str(r["id"])) for r in records],
+                        "historyId": str(svc._history_id)}
+        return svc._call("history.list", run)
+
+
+class FakeGmailService:
+    """
+    In-memory users().messages()/history()/getProfile() with optional latency and
+    throttling (every Nth messages.get raises a 429). `failures` maps message ids to
+    an HTTP status every messages.get of that id fails with. Thread-safe; `calls`
+    counts API calls.
+    """
+
+    def __init__(self, messages: Optional[List[Dict[str, Any]]] = None,
+                 latency: float = 0.0, throttle_every: int = 0,
+                 email: str = "demo@example.com", failures: Optional[Dict[str, int]] = None):
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.failures = dict(failures or {})
+        self.email = email
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._order: List[str] = []
+        self._messages: Dict[str, Dict[str, Any]] = {}
+        self._history: List[Dict[str, Any]] = []
+        self._history_id = 1000
+        self._history_floor = 0  # history older than this has "expired"
+        for m in messages or []:
+            self.add_message(m)
+
+    def add_message(self, msg: Dict[str, Any]):
+        with self._lock:
+            self._history_id += 1
+            msg = dict(msg, historyId=str(self._history_id))
+            if msg["id"] not in self._messages:
+                self._order.insert(0, msg["id"])  # newest first, like Gmail
+            self._messages[msg["id"]] = msg
+            self._history.append({"id": self._history_id, "messagesAdded": [{"message": {"id": msg["id"]}}]})
+
+    def delete_message(self, msg_id: str):
+        with self._lock:
+            if self._messages.pop(msg_id, None) is None:
+                return
+            self._order.remove(msg_id)
+            self._history_id += 1
+            self._history.append({"id": self._history_id, "messagesDeleted": [{"message": {"id": msg_id}}]})
+
+    def expire_history(self):
+        """Make every earlier historyId invalid, forcing clients into a full sync."""
+        with self._lock:
+            self._history_floor = self._history_id
+
+    # --- resource tree ---
+    def users(self):
+        return self
+
+    def messages(self):
+        return _Messages(self)
+
+    def history(self):
+        return _History(self)
+
+    def getProfile(self, userId: str = "me", **_kw):
+        def run():
+            with self._lock:
+                return {"emailAddress": self.email, "messagesTotal": len(self._order),
+                        "historyId": str(self._history_id)}
+        return self._call("getProfile", run)
+
+    def _call(self, name: str, fn: Callable[[], Any]) -> _Request:
+        def run():
+            with self._lock:
+                self.calls[name] += 1
+                n = self.calls[name]
+            if self.latency:
+                time.sleep(self.latency)
+            if name == "messages.get" and self.throttle_every and n % self.throttle_every == 0:
+                raise FakeHttpError(429, "rateLimitExceeded")
+            return fn()
+        return _Request(run)
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Stand-in for genai.GenerativeModel. By default it answers every `id: <msg>` block
+    in the prompt with one suggestion; pass `responder(prompt) -> str` to override.
+    Records call count and the highest number of concurrent calls seen.
+    """
+
+    def __init__(self, model_name: str = "fake-gemini", latency: float = 0.0,
+                 responder: Optional[Callable[[str], str]] = None):
+        self.model_name = model_name
+        self.latency = latency
+        self.responder = responder or self._default_responder
+        self.calls = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_responder(prompt: str) -> str:
+        ids = re.findall(r"^id: (\S+)$", prompt, flags=re.M)
+        return json.dumps([
+            {"window_start": "2025-12-20", "window_end": "2025-12-27", "reason": "fake model suggestion",
+             "source_message_id": i, "confidence": 0.5}
+            for i in ids
+        ])
+
+    def generate_content(self, prompt: str) -> _Response:
+        with self._lock:
+            self.calls += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            return _Response(self.responder(prompt))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
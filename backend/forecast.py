@@ -0,0 +1,161 @@
+# backend/forecast.py
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.metrics import timed
+from backend.models import AccrualPolicy, Employee
+from backend.workdays import BusinessCalendar
+
+_YEAR_END, _EXPIRY = 0, 1
+
+
+def _month_starts(first: date, days: int) -> List[int]:
+    """Offsets of every 1st of the month in [first, first + days)."""
+    out = []
+    y, m = (first.year, first.month) if first.day == 1 else (first.year + (first.month == 12), first.month % 12 + 1)
+    while True:
+        off = (date(y, m, 1) - first).days
+        if off >= days:
+            return out
+        out.append(off)
+        y, m = y + (m == 12), m % 12 + 1
+
+
+def _usage(first: date, days: int, index: Dict[str, int], rows: Iterable[Tuple]) -> np.ndarray:
+    """employees x days matrix, 1 where an approved request covers the day."""
+    use = np.zeros((len(index), days), dtype=np.float64)
+    emp, lo, hi = [], [], []
+    base = first.toordinal()
+    for emp_id, _, s, e in rows:
+        i = index.get(emp_id)
+        s, e = max(s - base, 0), min(e - base, days - 1)
+        if i is not None and s <= e:
+            emp.append(i)
+            lo.append(s)
+            hi.append(e)
+    if emp:
+        lo_a, lengths = np.array(lo), np.array(hi) - np.array(lo) + 1
+        within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        use[np.repeat(emp, lengths), np.repeat(lo_a, lengths) + within] = 1.0  # overlaps count once
+    return use
+
+
+class BalanceForecast:
+    """
+    Projected end-of-day PTO balance of every employee for each day in
+    [first, first + days), as one employees x days matrix.
+    """
+
+    def __init__(self, first: date, employee_ids: List[str], opening: np.ndarray,
+                 balance: np.ndarray, forfeited: np.ndarray, resets: List[int] = ()):
+        self.first = first
+        self.employee_ids = employee_ids
+        self.index = {e: i for i, e in enumerate(employee_ids)}
+        self.opening = opening      # balance before `first`
+        self.balance = balance
+        self.forfeited = forfeited  # days lost to the carry-over cap and expiry
+        self.resets = list(resets)  # offsets of the Jan 1 carry-over caps
+        self._suffix_min: Optional[np.ndarray] = None
+
+    @property
+    def days(self) -> int:
+        return self.balance.shape[1]
+
+    def suffix_min(self) -> np.ndarray:
+        """
+        Lowest balance from each day to the next carry-over cap (or the end of the
+        horizon); days spent before a cap only reduce what would be forfeited there.
+        """
+        if self._suffix_min is None:
+            out = np.empty_like(self.balance)
+            bounds = [0] + [r for r in self.resets if r > 0] + [self.days]
+            for a, b in zip(bounds, bounds[1:]):
+                out[:, a:b] = np.minimum.accumulate(self.balance[:, a:b][:, ::-1], axis=1)[:, ::-1]
+            self._suffix_min = out
+        return self._suffix_min
+
+    def available(self, employee_ids: Sequence[str], starts: Sequence[date]) -> np.ndarray:
+        """
+        Days each employee could spend on a window starting on `starts[i]` without any
+        later day up to the next carry-over cap (and the approved PTO on it) going
+        negative; NaN for unknown employees.
+        """
+        idx = np.array([self.index.get(e, -1) for e in employee_ids], dtype=np.int64)
+        off = np.array([(s - self.first).days for s in starts], dtype=np.int64)
+        off = np.clip(off, 0, self.days - 1)
+        known = idx >= 0
+        if not known.any():
+            return np.full(len(idx), np.nan)
+        i = np.where(known, idx, 0)
+        before = np.where(off > 0, self.balance[i, off - 1], self.opening[i])
+        out = np.minimum(before, self.suffix_min()[i, off])
+        return np.where(known, out, np.nan)
+
+    def affordable(self, employee_ids: Sequence[str], starts: Sequence[date],
+                   costs: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """(ok, available) for many windows at once."""
+        avail = self.available(employee_ids, starts)
+        return avail >= np.asarray(costs, dtype=np.float64), avail
+
+
+@timed("forecast.forecast_balances")
+def forecast_balances(first: date,
+                      days: int,
+                      employees: List[Employee],
+                      approved: Iterable[Tuple],
+                      policy: AccrualPolicy,
+                      calendar: BusinessCalendar) -> BalanceForecast:
+    """
+    Balances start from each employee's accrual_days, accrue accrual_per_month (or the
+    policy rate) on the 1st of every month and drop by one per working day of approved
+    PTO (`approved` rows are (employee_id, team, start_ordinal, end_ordinal)). On Jan 1
+    anything above carry_over_cap is forfeited; carried days not used by the 1st of
+    carry_over_expiry_month lapse. Days carried into the current year are unknown and
+    assumed to be zero. The arithmetic runs over all employees at once; only the few
+    year-end/expiry boundaries are stepped through.
+    """
+    ids = [e.id for e in employees]
+    index = {e: i for i, e in enumerate(ids)}
+    opening = np.array([e.accrual_days for e in employees], dtype=np.float64)
+    rates = np.array([policy.days_per_month if e.accrual_per_month is None else e.accrual_per_month
+                      for e in employees], dtype=np.float64)
+
+    use = _usage(first, days, index, approved)
+    use *= calendar.work_flags(first, days)[None, :]
+    delta = -use
+    delta[:, _month_starts(first, days)] += rates[:, None]
+
+    events = []
+    for year in range(first.year, (first + timedelta(days=days)).year + 1):
+        for when, kind in ((date(year, 1, 1), _YEAR_END), (date(year, policy.carry_over_expiry_month, 1), _EXPIRY)):
+            off = (when - first).days
+            if 0 <= off < days:
+                events.append((off, kind))
+    events.sort()
+
+    balance = np.empty((len(ids), days), dtype=np.float64)
+    forfeited = np.zeros(len(ids), dtype=np.float64)
+    carried = np.zeros(len(ids), dtype=np.float64)
+    bal = opening.copy()
+    pos = year_start = 0
+    for off, kind in events + [(days, None)]:
+        if off > pos:
+            seg = balance[:, pos:off]
+            np.cumsum(delta[:, pos:off], axis=1, out=seg)
+            seg += bal[:, None]
+            bal = seg[:, -1].copy()
+            pos = off
+        if kind == _YEAR_END:
+            carried = np.clip(bal, 0.0, policy.carry_over_cap)
+            forfeited += np.maximum(bal - policy.carry_over_cap, 0.0)
+            bal = np.minimum(bal, policy.carry_over_cap)
+            year_start = off
+        elif kind == _EXPIRY:
+            lapse = np.minimum(np.maximum(carried - use[:, year_start:off].sum(axis=1), 0.0), np.maximum(bal, 0.0))
+            forfeited += lapse
+            bal = bal - lapse
+            carried[:] = 0.0
+    resets = [off for off, kind in events if kind == _YEAR_END]
+    return BalanceForecast(first, ids, opening, balance, forfeited, resets)
@@ -1,6 +1,9 @@
 # backend/gemini.py
 import os, json
-import google.generativeai as genai
+
+from backend import providers
+from backend.llm_cache import cached_generate
+from backend.metrics import timed
 
 MODEL = "gemini-1.5-flash"
 
@@ -8,10 +11,18 @@ def _setup() -> bool:
     key = ""   # <--- paste API
     if not key:
         return False
+    genai = providers.genai()
+    if genai is None:
+        return False
     genai.configure(api_key=key)
     return True
 
 
+def _generate(prompt: str) -> str:
+    return providers.genai().GenerativeModel(MODEL).generate_content(prompt).text
+
+
+@timed("gemini.pick_best_window")
 def pick_best_window(employee, candidates, desired_len_days, horizon_days):
     """
     candidates: list of {window_start, window_end, coverage_ratio}
@@ -32,9 +43,9 @@ def pick_best_window(employee, candidates, desired_len_days, horizon_days):
         "constraints": {"desired_len_days": desired_len_days, "horizon_days": horizon_days},
         "candidates": candidates
     }
-    text = genai.GenerativeModel(MODEL).generate_content(
-        f"{system}\nRespond ONLY with JSON.\n{json.dumps(payload)}"
-    ).text.strip()
+    text = cached_generate(
+        MODEL, f"{system}\nRespond ONLY with JSON.\n{json.dumps(payload)}", _generate
+    ).strip()
 
     if text.startswith("```"):
         # strip code fences / leading "json"
@@ -49,6 +60,7 @@ def pick_best_window(employee, candidates, desired_len_days, horizon_days):
         "ai_model": MODEL,
     }
 
+@timed("gemini.summarize_pto_request")
 def summarize_pto_request(employee_name: str, days: int, reason: str = "") -> str:
     """
     Simple text summary so /ai_recommend works.
@@ -62,6 +74,5 @@ def summarize_pto_request(employee_name: str, days: int, reason: str = "") -> st
         f"{'Reason: ' + reason if reason else ''} "
         "Write a kind, brief note to their manager explaining that coverage looks reasonable."
     )
-    resp = genai.GenerativeModel(MODEL).generate_content(prompt)
-    return (resp.text or "").strip()
+    return (cached_generate(MODEL, prompt, _generate) or "").strip()
 
@@ -0,0 +1,124 @@
+# backend/gmail_cache.py
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+CACHE_PATH = os.environ.get("GMAIL_CACHE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            "gmail_cache.db"))
+# bumped when cached suggestions are computed differently; older caches are emptied on open
+# (1: relative dates resolve against the message date instead of the scan time;
+#  2: messages pruned by triage record the threshold they were pruned at)
+CACHE_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    account TEXT NOT NULL,
+    id TEXT NOT NULL,
+    headers TEXT NOT NULL,      -- json
+    body TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    internal_date TEXT,         -- ms since epoch (Gmail internalDate): relative dates resolve against it
+    suggestions TEXT,           -- json list, NULL until analyzed
+    pruned_below REAL,          -- triage threshold the message scored below (not analyzed); NULL if analyzed
+    PRIMARY KEY (account, id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    account TEXT PRIMARY KEY,
+    history_id TEXT,
+    listing TEXT,               -- json list of message ids from the last query
+    max_results INTEGER
+);
+"""
+
+
+class MessageCache:
+    """
+    On-disk store of parsed messages (as returned by _get_full_message) and their
+    suggestions, plus the historyId and listing of the last scan, per mailbox.
+    Suggestions are a function of the stored message alone (relative dates resolve
+    against its internal_date), so replaying them later gives the same windows.
+    Messages pruned by triage are stored with the threshold they missed, and only
+    count as known to scans using that same threshold.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        if self._con.execute("PRAGMA user_version").fetchone()[0] < CACHE_VERSION:
+            self._con.executescript("DROP TABLE IF EXISTS messages; DROP TABLE IF EXISTS sync_state;")
+            self._con.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self._con.executescript(SCHEMA)
+
+    # ---------- sync state ----------
+    def state(self, account: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._con.execute(
+                "SELECT history_id, listing, max_results FROM sync_state WHERE account = ?", (account,)
+            ).fetchone()
+        if not row:
+            return {"history_id": None, "listing": [], "max_results": None}
+        return {"history_id": row[0], "listing": json.loads(row[1] or "[]"), "max_results": row[2]}
+
+    def set_state(self, account: str, history_id: Optional[str], listing: List[str], max_results: int):
+        with self._lock:
+            self._con.execute(
+                "INSERT INTO sync_state (account, history_id, listing, max_results) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(account) DO UPDATE SET history_id=excluded.history_id, "
+                "listing=excluded.listing, max_results=excluded.max_results",
+                (account, history_id, json.dumps(listing), max_results),
+            )
+
+    # ---------- messages ----------
+    def known_ids(self, account: str, ids: Iterable[str], triage_threshold: float = 0.0) -> set:
+        """Ids analyzed already, or pruned at `triage_threshold` (0 = triage off, nothing pruned is known)."""
+        ids = list(ids)
+        found = set()
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                found.update(r[0] for r in self._con.execute(
+                    "SELECT id FROM messages WHERE account = ? AND suggestions IS NOT NULL "
+                    f"AND (pruned_below IS NULL OR pruned_below = ?) AND id IN ({marks})",
+                    [account, triage_threshold, *chunk],
+                ))
+        return found
+
+    def put(self, account: str, messages: List[Dict[str, Any]], suggestions: Dict[str, List[Dict[str, Any]]],
+            pruned_below: Optional[float] = None):
+        """Store analyzed messages, or with `pruned_below` messages triage skipped at that threshold."""
+        rows = [
+            (account, m["id"], json.dumps(m.get("headers", {})), m.get("body") or "",
+             m.get("snippet") or "", m.get("internal_date"), json.dumps(suggestions.get(m["id"], [])), pruned_below)
+            for m in messages
+        ]
+        with self._lock:
+            self._con.execute("BEGIN")
+            self._con.executemany(
+                "INSERT OR REPLACE INTO messages "
+                "(account, id, headers, body, snippet, internal_date, suggestions, pruned_below) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+            self._con.execute("COMMIT")
+
+    def delete(self, account: str, ids: Iterable[str]):
+        with self._lock:
+            self._con.executemany("DELETE FROM messages WHERE account = ? AND id = ?", [(account, i) for i in ids])
+
+    def suggestions(self, account: str, ids: List[str]) -> List[Dict[str, Any]]:
+        """Stored suggestions for `ids`, in listing order."""
+        by_id: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for mid, sug in self._con.execute(
+                    f"SELECT id, suggestions FROM messages WHERE account = ? AND id IN ({marks})",
+                    [account, *chunk],
+                ):
+                    by_id[mid] = json.loads(sug or "[]")
+        return [s for i in ids for s in by_id.get(i, [])]
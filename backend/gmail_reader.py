@@ -3,204 +3,768 @@
 
 # backend/gmail_reader.py
 from __future__ import annotations
+import base64
+import os
 import re
 import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from email.utils import parsedate_to_datetime
-from typing import List, Dict, Any, Tuple
-from datetime import datetime
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-
-# If you installed google-generativeai and configured GEMINI key, we'll call it
-try:
-    import google.generativeai as genai
-except Exception:
-    genai = None
+from html import unescape
+from typing import List, Dict, Any, Tuple, Callable, Optional, Iterable, Iterator
+from datetime import datetime, timezone
+
+from backend import providers
+from backend.llm_cache import cached_generate
+from backend.metrics import FALLBACKS, MESSAGES_FETCHED, REGISTRY, stage, timed
 
 SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
-CREDENTIALS_FILE = "backend/credentials.json"
-TOKEN_FILE = "backend/token.json"
+CREDENTIALS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "credentials.json")
+TOKEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "token.json")
 MODEL = "gemini-1.5-flash"
+FETCH_CONCURRENCY = int(os.environ.get("GMAIL_FETCH_CONCURRENCY", "8"))
+# threads shared by every scan in the process; each scan keeps at most its own concurrency in flight
+FETCH_POOL_SIZE = int(os.environ.get("GMAIL_FETCH_POOL", "32"))
+FETCH_RETRIES = 5
+FETCH_BACKOFF_S = 0.5
+RETRY_STATUSES = {429, 500, 502, 503}
+SKIP_STATUSES = RETRY_STATUSES | {404}  # a message failing with these is skipped, not the whole scan
+LIST_PAGE_MAX = 500  # messages.list returns at most this many ids per page
+ANALYZE_BATCH = int(os.environ.get("GMAIL_ANALYZE_BATCH", "10"))
+# decoded body bytes kept per message; parts past the budget are not decoded at all
+BODY_BYTES = int(os.environ.get("GMAIL_BODY_BYTES", str(16 * 1024)))
+# messages scoring below this on subject + snippet are not fetched in full; 0 disables triage
+TRIAGE_THRESHOLD = float(os.environ.get("GMAIL_TRIAGE_THRESHOLD", "2"))
+
+log = logging.getLogger(__name__)
 
 # ---------------- Gmail auth / service ----------------
-def _get_service():
-    creds = None
-    try:
-        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
-    except Exception:
-        creds = None
+class GmailServiceManager:
+    """
+    Process-wide Gmail credentials and services for one token file.
+    Credentials are loaded once and refreshed by a background timer shortly before
+    they expire. Each thread gets its own service (API clients are not thread-safe),
+    built from the bundled discovery document over a persistent HTTP connection.
+    """
+
+    def __init__(self, token_file: str = TOKEN_FILE, credentials_file: str = CREDENTIALS_FILE,
+                 refresh_margin_s: float = 300.0, interactive: bool = True):
+        self.token_file = token_file
+        self.credentials_file = credentials_file
+        self.refresh_margin_s = refresh_margin_s
+        self.interactive = interactive  # False: never open a browser consent flow, fail instead
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._creds = None
+        self._timer: Optional[threading.Timer] = None
 
-    if not creds or not creds.valid:
-        flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
-        creds = flow.run_local_server(port=0)
-        with open(TOKEN_FILE, "w", encoding="utf-8") as f:
+    def _save(self, creds):
+        with open(self.token_file, "w", encoding="utf-8") as f:
             f.write(creds.to_json())
-    return build("gmail", "v1", credentials=creds)
 
-def _get_full_message(service, msg_id: str) -> Dict[str, Any]:
-    # returns dict with headers and a plain-text body (best effort)
-    msg = service.users().messages().get(userId="me", id=msg_id, format="full").execute()
-    headers = {h["name"].lower(): h["value"] for h in msg.get("payload", {}).get("headers", [])}
-    # extract plain text from payload (walk)
-    body = ""
-    def _walk_parts(p):
-        nonlocal body
-        if p is None:
+    def credentials(self):
+        g = providers.gmail_client()
+        with self._lock:
+            if self._creds is None or not self._creds.valid:
+                creds = None
+                try:
+                    creds = g.Credentials.from_authorized_user_file(self.token_file, SCOPES)
+                except Exception:
+                    creds = None
+                if creds and not creds.valid and creds.refresh_token:
+                    try:
+                        creds.refresh(g.Request())
+                        self._save(creds)
+                    except Exception:
+                        creds = None
+                if (not creds or not creds.valid) and not self.interactive:
+                    raise RuntimeError(f"no valid Gmail token in {self.token_file}")
+                if not creds or not creds.valid:
+                    flow = g.InstalledAppFlow.from_client_secrets_file(self.credentials_file, SCOPES)
+                    creds = flow.run_local_server(port=0)
+                    self._save(creds)
+                self._creds = creds
+                self._schedule_refresh()
+            return self._creds
+
+    def _schedule_refresh(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        expiry = getattr(self._creds, "expiry", None)
+        if expiry is None or not self._creds.refresh_token:
             return
-        mime = p.get("mimeType", "")
-        if mime == "text/plain" and "data" in (p.get("body") or {}):
-            import base64
-            data = p["body"]["data"]
-            body += base64.urlsafe_b64decode(data.encode("ascii")).decode("utf-8", errors="replace")
-        for part in p.get("parts", []) or []:
-            _walk_parts(part)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # google-auth keeps expiry as naive UTC
+        delay = max((expiry - now).total_seconds() - self.refresh_margin_s, 1.0)
+        self._timer = threading.Timer(delay, self._refresh)
+        self._timer.daemon = True
+        self._timer.start()
 
-    _walk_parts(msg.get("payload"))
-    return {"id": msg_id, "headers": headers, "body": body, "snippet": msg.get("snippet", "")}
+    def _refresh(self):
+        with self._lock:
+            try:
+                # refreshed in place, so every thread's AuthorizedHttp sees the new token
+                self._creds.refresh(providers.gmail_client().Request())
+                self._save(self._creds)
+            except Exception:
+                return  # next credentials() call falls back to a reload
+            self._schedule_refresh()
 
-# -------------- rule based date extraction (fallback) --------------
-# Simple regexes for common date phrases (very approximate)
-DATE_PATTERNS = [
-    r"\b(?:on\s)?(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2}\b",
-    r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b",
-    r"\b(?:next|this|coming)\s+(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\b",
-    r"\b(?:in\s)?(\d{1,2})\s+days\b",
-    r"\b(?:from)\s+(?P<start>.+?)\s+(?:to|-|through)\s+(?P<end>.+?)\b",
-    r"\b(?:going to|go to|trip to|travel to)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b",  # location
-]
-
-def find_date_strings(text: str) -> List[str]:
-    found = []
-    for pat in DATE_PATTERNS:
-        for m in re.finditer(pat, text, flags=re.IGNORECASE):
-            found.append(m.group(0))
-    return list(dict.fromkeys(found))  # dedupe preserve order
-
-# convert some strings to a candidate start/end date (best-effort)
-def normalize_date_string(s: str, ref: datetime) -> Tuple[datetime | None, datetime | None]:
-    s = s.strip()
-    # try common simple formats
+    def service(self):
+        creds = self.credentials()
+        svc = getattr(self._local, "service", None)
+        if svc is None or self._local.creds is not creds:
+            g = providers.gmail_client()
+            http = g.AuthorizedHttp(creds, http=g.build_http())
+            svc = g.build_from_document(_discovery_doc(), http=http)
+            self._local.service, self._local.creds = svc, creds
+        return svc
+
+_discovery = None
+
+def _discovery_doc():
+    # the Gmail discovery document ships with googleapiclient; parse it once per process
+    global _discovery
+    if _discovery is None:
+        _discovery = json.loads(providers.gmail_client().get_static_doc("gmail", "v1"))
+    return _discovery
+
+_manager = GmailServiceManager()
+
+def _get_service():
+    return _manager.service()
+
+# ---------------- MIME body extraction ----------------
+_HTML_DROP = re.compile(r"<(script|style|head)\b.*?</\1\s*>|<!--.*?-->", re.IGNORECASE | re.DOTALL)
+_HTML_BREAK = re.compile(r"<(?:br|/p|/div|/tr|/li|/h[1-6])\b[^>]*>", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<[^>]*>")
+_SPACES = re.compile(r"[ \t\r\f\v]{2,}|[\t\r\f\v]")  # leaves single spaces alone: far fewer subs
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_CHARSET = re.compile(r"charset=\"?([\w.:-]+)", re.IGNORECASE)
+
+def _html_to_text(html: str) -> str:
+    """Regex HTML-to-text: drops script/style/comments, keeps line breaks, unescapes entities."""
+    text = _HTML_TAG.sub(" ", _HTML_BREAK.sub("\n", _HTML_DROP.sub(" ", html)))
+    text = _SPACES.sub(" ", unescape(text))
+    return _BLANK_LINES.sub("\n", text).strip()
+
+def _decode_prefix(data: str, max_bytes: int) -> bytes:
+    """First max_bytes (rounded up to 3) of a base64url string, decoding only that prefix."""
+    chunk = data[:-(-max_bytes // 3) * 4]
+    return base64.urlsafe_b64decode(chunk + "=" * (-len(chunk) % 4))
+
+def _part_charset(part: Dict[str, Any]) -> str:
+    for h in part.get("headers") or []:
+        if h.get("name", "").lower() == "content-type":
+            m = _CHARSET.search(h.get("value", ""))
+            if m:
+                return m.group(1)
+    return "utf-8"
+
+def _to_text(chunks: List[Tuple[bytes, str]]) -> str:
+    out = []
+    for raw, charset in chunks:
+        try:
+            out.append(raw.decode(charset, errors="replace"))
+        except LookupError:
+            out.append(raw.decode("utf-8", errors="replace"))
+    return "\n".join(out)
+
+def extract_body(payload: Optional[Dict[str, Any]], max_bytes: int = BODY_BYTES) -> str:
+    """
+    Text of a Gmail "full" payload: its text/plain parts in document order, or the
+    text/html parts converted to text when there is no plain part. Parts are walked
+    with an explicit stack; attachments are skipped, and decoding stops once
+    max_bytes of text (4x that of raw HTML) has been collected.
+    """
+    plain: List[Tuple[bytes, str]] = []
+    html: List[Tuple[bytes, str]] = []
+    plain_left, html_left = max_bytes, 4 * max_bytes
+    stack = [payload] if payload else []
+    while stack and plain_left > 0:
+        part = stack.pop()
+        children = part.get("parts")
+        if children:
+            stack.extend(reversed(children))  # pop() then visits them in order
+            continue
+        data = (part.get("body") or {}).get("data")
+        if not data or part.get("filename"):
+            continue
+        mime = part.get("mimeType", "")
+        if mime == "text/plain":
+            raw = _decode_prefix(data, plain_left)
+            plain_left -= len(raw)
+            plain.append((raw, _part_charset(part)))
+        elif mime == "text/html" and not plain and html_left > 0:
+            raw = _decode_prefix(data, html_left)
+            html_left -= len(raw)
+            html.append((raw, _part_charset(part)))
+    if plain:
+        return _to_text(plain)
+    return _html_to_text(_to_text(html))[:max_bytes] if html else ""
+
+def _get_full_message(service, msg_id: str, max_bytes: int = BODY_BYTES) -> Dict[str, Any]:
+    # returns dict with headers and a plain-text body (best effort, at most max_bytes decoded)
+    with stage("gmail.get"):
+        msg = service.users().messages().get(userId="me", id=msg_id, format="full").execute()
+    headers = {h["name"].lower(): h["value"] for h in msg.get("payload", {}).get("headers", [])}
+    with stage("gmail.decode"):
+        body = extract_body(msg.get("payload"), max_bytes)
+    return {"id": msg_id, "headers": headers, "body": body, "snippet": msg.get("snippet", ""),
+            "internal_date": msg.get("internalDate")}
+
+def _get_metadata(service, msg_id: str) -> Dict[str, Any]:
+    # headers and snippet only: a few hundred bytes instead of the whole message
+    with stage("gmail.get_metadata"):
+        msg = service.users().messages().get(userId="me", id=msg_id, format="metadata",
+                                             metadataHeaders=["Subject", "From", "Date"]).execute()
+    headers = {h["name"].lower(): h["value"] for h in msg.get("payload", {}).get("headers", [])}
+    return {"id": msg_id, "headers": headers, "body": "", "snippet": msg.get("snippet", ""),
+            "internal_date": msg.get("internalDate")}
+
+def _message_time(fm: Dict[str, Any]) -> datetime:
+    """When the message was received (Gmail's internalDate, else its Date header, else now)."""
+    ms = fm.get("internal_date")
+    if ms:
+        try:
+            return datetime.fromtimestamp(int(ms) / 1000)
+        except (TypeError, ValueError, OverflowError, OSError):
+            pass
+    raw = fm.get("headers", {}).get("date")
+    if raw:
+        try:
+            return parsedate_to_datetime(raw)
+        except (TypeError, ValueError, IndexError):
+            pass
+    return datetime.now()
+
+def _http_status(exc: Exception) -> Optional[int]:
+    status = getattr(getattr(exc, "resp", None), "status", None)
     try:
-        # try mm/dd or mm/dd/yyyy
-        from dateutil import parser
-        dt = parser.parse(s, default=ref)
-        return dt.date(), dt.date()
-    except Exception:
-        pass
-    # naive "in N days"
-    m = re.search(r"(\d{1,2})\s+days", s, flags=re.IGNORECASE)
-    if m:
-        days = int(m.group(1))
-        start = ref.date() + timedelta(days=days)
-        return start, start
-    return None, None
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+def _with_retry(fn: Callable[[], Any], retries: int = FETCH_RETRIES, backoff: float = FETCH_BACKOFF_S):
+    """Call fn, retrying 429/5xx with exponential backoff and jitter."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if _http_status(e) not in RETRY_STATUSES or attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+_fetch_pool: Optional[ThreadPoolExecutor] = None
+_fetch_pool_lock = threading.Lock()
+
+def _get_fetch_pool() -> ThreadPoolExecutor:
+    # long-lived, so per-thread state (GmailServiceManager services, HTTP connections) outlives a scan
+    global _fetch_pool
+    with _fetch_pool_lock:
+        if _fetch_pool is None:
+            _fetch_pool = ThreadPoolExecutor(max_workers=FETCH_POOL_SIZE, thread_name_prefix="gmail-fetch")
+        return _fetch_pool
+
+def iter_full_messages(service_factory: Callable[[], Any], ids: Iterable[str],
+                       concurrency: int = FETCH_CONCURRENCY,
+                       get: Callable[[Any, str], Dict[str, Any]] = None,
+                       failed: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Fetch messages on the process-wide fetch pool, yielding them in the order of `ids`
+    (any iterable, consumed lazily, e.g. the ids surviving triage as they come).
+    At most `concurrency` fetches of this call are queued or in flight, so memory stays
+    flat however many ids there are. API clients are not thread-safe, so each pool
+    thread asks service_factory for its own service (GmailServiceManager caches one
+    per thread, so it is built once per thread, not once per scan).
+    A message that is gone (404) or still throttled/failing after retries is skipped
+    and its id appended to `failed`; any other error ends the iteration.
+    `get` defaults to _get_full_message; iter_metadata passes _get_metadata.
+    """
+    local = threading.local()
+    full = get is None
+    get = get or _get_full_message
+
+    def _one(msg_id: str) -> Optional[Dict[str, Any]]:
+        svc = getattr(local, "service", None)
+        if svc is None:
+            svc = local.service = service_factory()
+        try:
+            fm = _with_retry(lambda: get(svc, msg_id))
+        except Exception as e:
+            status = _http_status(e)
+            if status not in SKIP_STATUSES:
+                raise
+            log.warning("skipping message %s: %s", msg_id, e)
+            FETCH_FAILURES.inc(status=status)
+            return None
+        if full:
+            MESSAGES_FETCHED.inc()
+        return fm
+
+    def _done(fut) -> Iterator[Dict[str, Any]]:
+        fm, msg_id = fut.result(), fut.msg_id
+        if fm is None:
+            if failed is not None:
+                failed.append(msg_id)
+        else:
+            yield fm
+
+    window = max(1, concurrency)
+    pool = _get_fetch_pool()
+    pending: deque = deque()
+    try:
+        for msg_id in ids:
+            if len(pending) >= window:
+                yield from _done(pending.popleft())
+            fut = pool.submit(_one, msg_id)
+            fut.msg_id = msg_id
+            pending.append(fut)
+        while pending:
+            yield from _done(pending.popleft())
+    finally:
+        for f in pending:
+            f.cancel()
+        for f in pending:  # let started fetches finish before the caller's service goes away
+            if not f.cancelled():
+                try:
+                    f.result()
+                except Exception:
+                    pass
+
+def iter_metadata(service_factory: Callable[[], Any], ids: Iterable[str],
+                  concurrency: int = FETCH_CONCURRENCY,
+                  failed: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    return iter_full_messages(service_factory, ids, concurrency, get=_get_metadata, failed=failed)
+
+def fetch_full_messages(service_factory: Callable[[], Any], ids: List[str],
+                        concurrency: int = FETCH_CONCURRENCY,
+                        failed: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    return list(iter_full_messages(service_factory, ids, concurrency, failed=failed))
+
+def _list_ids(service, max_results: int) -> List[str]:
+    """Ids of the newest max_results messages matching GMAIL_QUERY, following nextPageToken."""
+    ids: List[str] = []
+    page = None
+    while len(ids) < max_results:
+        resp = service.users().messages().list(userId="me", q=GMAIL_QUERY, pageToken=page,
+                                               maxResults=min(max_results - len(ids), LIST_PAGE_MAX)).execute()
+        ids.extend(m["id"] for m in resp.get("messages", []))
+        page = resp.get("nextPageToken")
+        if not page:
+            break
+    return ids[:max_results]
+
+# -------------- rule based date extraction (fallback) --------------
+# single-pass compiled extractor; names re-exported for existing callers
+from backend.date_extract import (
+    DATE_PATTERNS, extract_spans, find_date_strings, find_travel_keyword, normalize_date_string,
+)
 
 # -------------- Gemini / LLM wrapper --------------
 def _setup_gemini():
-    key = None
-    if genai is None:
-        return False
-    # look for env var
-    import os
+    # check the key first: without one the Gemini client is never imported
     key = os.environ.get("GEMINI_API_KEY")
     if not key:
         return False
+    genai = providers.genai()
+    if genai is None:
+        return False
     genai.configure(api_key=key)
     return True
 
-def analyze_with_gemini(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """
-    Ask Gemini to scan the messages and return structured suggested PTO windows.
-    We prompt it to return JSON like:
-    [{ "window_start": "YYYY-MM-DD", "window_end": "YYYY-MM-DD", "reason": "...", "source": "<msg_id>", "confidence": 0.8 }, ...]
-    """
-    if not _setup_gemini():
-        return []
+PROMPT_HEADER = (
+    "You are an assistant that scans email content and finds potential requests or signals "
+    "that would justify suggesting PTO windows for the user. For each message, look for travel plans, event dates, interviews, or explicit time-off requests. "
+    "Return a JSON array of suggestions. Each suggestion should include keys: "
+    '"window_start" (ISO date), "window_end" (ISO date), "reason" (short text), "source_message_id", and "confidence" (0.0-1.0). '
+    "If no suggestion for a message, do not include it. Be conservative; only propose windows that are clearly implied. "
+    "Resolve relative dates (\"next Friday\", \"in 10 days\") against the message's date.\n\n"
+    "Messages:\n"
+)
+BODY_CHARS = 1500
+CHUNK_TOKENS = int(os.environ.get("GEMINI_CHUNK_TOKENS", "6000"))
+LLM_CONCURRENCY = int(os.environ.get("GEMINI_CONCURRENCY", "4"))
 
-    # Build a compact prompt with messages (trim long bodies)
-    snippets = []
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text; good enough for budgeting
+    return len(text) // 4 + 1
+
+def _message_block(m: Dict[str, Any]) -> str:
+    body = m.get("body") or m.get("snippet") or ""
+    if len(body) > BODY_CHARS:
+        body = body[:BODY_CHARS] + " ...[truncated]"
+    headers = m.get("headers", {})
+    sent = _message_time(m).date().isoformat()
+    return (f"---\nid: {m['id']}\ndate: {sent}\nfrom: {headers.get('from','')}\n"
+            f"subject: {headers.get('subject','')}\nbody: {body}\n\n")
+
+def _chunk_prompts(messages: List[Dict[str, Any]], token_budget: int) -> List[str]:
+    """Pack message blocks into prompts whose estimated size stays under token_budget."""
+    budget = max(token_budget - _estimate_tokens(PROMPT_HEADER), 1)
+    prompts, blocks, used = [], [], 0
     for m in messages:
-        body = m.get("body") or m.get("snippet") or ""
-        if len(body) > 1500:
-            body = body[:1500] + " ...[truncated]"
-        snippets.append({"id": m["id"], "from": m["headers"].get("from",""), "subject": m["headers"].get("subject",""), "body": body})
-
-    prompt_text = (
-        "You are an assistant that scans email content and finds potential requests or signals "
-        "that would justify suggesting PTO windows for the user. For each message, look for travel plans, event dates, interviews, or explicit time-off requests. "
-        "Return a JSON array of suggestions. Each suggestion should include keys: "
-        '"window_start" (ISO date), "window_end" (ISO date), "reason" (short text), "source_message_id", and "confidence" (0.0-1.0). '
-        "If no suggestion for a message, do not include it. Be conservative; only propose windows that are clearly implied.\n\n"
-        "Messages:\n"
-    )
-    for s in snippets:
-        prompt_text += f"---\nid: {s['id']}\nfrom: {s['from']}\nsubject: {s['subject']}\nbody: {s['body']}\n\n"
-
-    model = genai.GenerativeModel(MODEL)
-    res = model.generate_content(prompt_text)
-    raw = res.text if hasattr(res, "text") else getattr(res, "output", str(res))
-    # try parse JSON
+        block = _message_block(m)
+        cost = _estimate_tokens(block)
+        if blocks and used + cost > budget:
+            prompts.append(PROMPT_HEADER + "".join(blocks))
+            blocks, used = [], 0
+        blocks.append(block)
+        used += cost
+    if blocks:
+        prompts.append(PROMPT_HEADER + "".join(blocks))
+    return prompts
+
+def _parse_suggestions(raw: str) -> List[Dict[str, Any]]:
     try:
         data = json.loads(raw)
-        return data
     except Exception:
         # if model returned text, attempt to find a JSON block
-        jmatch = re.search(r"(\[.*\])", raw, flags=re.S)
-        if jmatch:
-            try:
-                return json.loads(jmatch.group(1))
-            except Exception:
-                pass
-    return []
+        jmatch = re.search(r"(\[.*\])", raw or "", flags=re.S)
+        if not jmatch:
+            return []
+        try:
+            data = json.loads(jmatch.group(1))
+        except Exception:
+            return []
+    return [d for d in data if isinstance(d, dict)] if isinstance(data, list) else []
+
+def _confidence(sug: Dict[str, Any]) -> float:
+    """The suggestion's confidence as a float; 0.0 when the model sent something unparseable."""
+    try:
+        conf = float(sug.get("confidence") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return conf if conf == conf else 0.0  # NaN
+
+@timed("analyze.gemini")
+def analyze_with_gemini(messages: List[Dict[str, Any]], model=None,
+                        concurrency: int = LLM_CONCURRENCY,
+                        token_budget: int = CHUNK_TOKENS) -> List[Dict[str, Any]]:
+    """
+    Ask Gemini to scan the messages and return structured suggested PTO windows.
+    We prompt it to return JSON like:
+    [{ "window_start": "YYYY-MM-DD", "window_end": "YYYY-MM-DD", "reason": "...", "source_message_id": "<msg_id>", "confidence": 0.8 }, ...]
+    Messages are split into prompts of about `token_budget` tokens that are sent
+    concurrently; results are merged keeping the most confident suggestion per message
+    and window, so several windows from one message (or from id-less suggestions) survive.
+    `model` is anything with generate_content(prompt) (e.g. fakes.FakeGenerativeModel).
+    """
+    if model is None:
+        if not _setup_gemini():
+            return []
+        model = providers.genai().GenerativeModel(MODEL)
+    model_name = getattr(model, "model_name", MODEL)
+
+    def _generate(prompt: str) -> str:
+        res = model.generate_content(prompt)
+        return res.text if hasattr(res, "text") else getattr(res, "output", str(res))
+
+    def _run(prompt: str):
+        try:
+            return _parse_suggestions(cached_generate(model_name, prompt, _generate)), None
+        except Exception as e:
+            return [], e
+
+    prompts = _chunk_prompts(messages, token_budget)
+    if not prompts:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(prompts))),
+                            thread_name_prefix="gemini") as pool:
+        results = list(pool.map(_run, prompts))
+    errors = [e for _, e in results if e is not None]
+    if errors and len(errors) == len(results):
+        raise errors[0]
+
+    best: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for suggestions, _ in results:
+        for sug in suggestions:
+            sug["confidence"] = _confidence(sug)
+            key = (str(sug.get("source_message_id") or sug.get("source") or ""),
+                   str(sug.get("window_start") or ""), str(sug.get("window_end") or ""))
+            if key not in best or sug["confidence"] > best[key]["confidence"]:
+                best[key] = sug
+    return list(best.values())
 
 # -------------- Public endpoint helper --------------
 from datetime import timedelta, datetime
-def scan_and_suggest(max_results: int = 50) -> Dict[str, Any]:
-    service = _get_service()
-    # search for messages with likely keywords (broad)
-    q = 'subject:(holiday OR PTO OR "out of office" OR OOO OR trip OR travel OR vacation) OR (body:(vacation OR "going to" OR "travel to" OR "trip to" OR "time off")) newer_than:365d'
-    resp = service.users().messages().list(userId="me", q=q, maxResults=max_results).execute()
-    messages = resp.get("messages", [])
-    fulls = []
-    for m in messages:
-        fulls.append(_get_full_message(service, m["id"]))
+from backend.gmail_cache import MessageCache
 
+# search for messages with likely keywords (broad)
+GMAIL_QUERY = 'subject:(holiday OR PTO OR "out of office" OR OOO OR trip OR travel OR vacation) OR (body:(vacation OR "going to" OR "travel to" OR "trip to" OR "time off")) newer_than:365d'
+
+# -------------- triage on metadata (subject + snippet) --------------
+TRIAGE_SPAN_WEIGHTS = {"range": 3.0, "month_day": 2.0, "numeric": 1.5, "weekday": 1.0, "in_days": 0.5,
+                       "location": 2.0}
+TRIAGE_KEYWORDS = re.compile(
+    r"\b(?:holiday|vacation|pto|ooo|out of (?:the )?office|time off|leave|trip|travel|flight|itinerary|"
+    r"booking|booked|reservation|hotel|wedding|conference)\b",
+    re.IGNORECASE,
+)
+TRIAGED = REGISTRY.counter("smartpto_gmail_triage_total", "Messages triaged on metadata, by result.", ["result"])
+FETCH_FAILURES = REGISTRY.counter(
+    "smartpto_gmail_fetch_failures_total", "Messages skipped after a failed fetch, by HTTP status.", ["status"])
+
+def triage_score(meta: Dict[str, Any]) -> float:
+    """
+    Cheap relevance score from subject and snippet: date/travel phrases (the
+    date_extract PATTERNS kinds, weighted), PTO/travel keywords and travel places.
+    """
+    text = (meta.get("headers", {}).get("subject") or "") + " \n " + (meta.get("snippet") or "")
+    score = 0.0
+    for kind in {span.kind for span in extract_spans(text)}:
+        score += TRIAGE_SPAN_WEIGHTS.get(kind, 0.0)
+    score += 2.0 * min(len(set(m.lower() for m in TRIAGE_KEYWORDS.findall(text))), 2)
+    if find_travel_keyword(text):
+        score += 2.0
+    return score
+
+@timed("analyze.rule_based")
+def _rule_based(fulls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # naive rule-based extractor, used when Gemini is unavailable or finds nothing.
+    # Relative dates resolve against the message's own date, so the result depends
+    # only on the message and stays valid in the cache.
+    suggestions = []
+    for fm in fulls:
+        text = (fm.get("body") or "") + " " + (fm.get("headers", {}).get("subject","") or "")
+        sent = _message_time(fm)
+        seen = set()
+        for span in extract_spans(text, sent):
+            if span.start is None or span.text in seen:
+                continue
+            seen.add(span.text)
+            suggestions.append({
+                "window_start": span.start.isoformat(),
+                "window_end": (span.end or span.start).isoformat(),
+                "reason": f"Found phrase `{span.text}` in message subject/body",
+                "source_message_id": fm["id"],
+                "confidence": 0.4  # mailbox_scan.MIN_CONFIDENCE keeps these by default
+            })
+        # also detect travel to configured places (PTO_TRAVEL_KEYWORDS)
+        place = find_travel_keyword(text)
+        if place:
+            # suggest a 7-day window starting ~30 days after the message as an example
+            s = (sent + timedelta(days=30)).date()
+            suggestions.append({
+                "window_start": s.isoformat(),
+                "window_end": (s + timedelta(days=6)).isoformat(),
+                "reason": f"Travel mention: {place.title()} found in message",
+                "source_message_id": fm["id"],
+                "confidence": 0.6
+            })
+    return suggestions
+
+def _analyze(fulls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if not fulls:
+        return []
     # Try LLM analysis first
     suggestions = []
-    if genai is not None and _setup_gemini():
+    if not _setup_gemini():
+        FALLBACKS.inc(reason="no_llm")
+    else:
         try:
             suggestions = analyze_with_gemini(fulls)
+            if not suggestions:
+                FALLBACKS.inc(reason="llm_empty")
+        except Exception:
+            log.warning("Gemini analysis of %d messages failed; using the rule-based extractor",
+                        len(fulls), exc_info=True)
+            FALLBACKS.inc(reason="llm_error")
+    return suggestions or _rule_based(fulls)
+
+def _history_delta(service, start_history_id: str) -> Optional[Tuple[set, set]]:
+    """(added ids, deleted ids) since start_history_id, or None if that history has expired."""
+    added, deleted = set(), set()
+    page = None
+    while True:
+        try:
+            resp = service.users().history().list(
+                userId="me", startHistoryId=start_history_id, pageToken=page,
+                historyTypes=["messageAdded", "messageDeleted"],
+            ).execute()
         except Exception as e:
-            suggestions = []
+            if _http_status(e) == 404:
+                return None
+            raise
+        for h in resp.get("history", []):
+            added.update(r["message"]["id"] for r in h.get("messagesAdded", []))
+            deleted.update(r["message"]["id"] for r in h.get("messagesDeleted", []))
+        page = resp.get("nextPageToken")
+        if not page:
+            return added - deleted, deleted
+
+_cache: Optional[MessageCache] = None
+_cache_lock = threading.Lock()
+
+def _message_cache() -> MessageCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MessageCache()
+        return _cache
+
+def iter_scan(max_results: int = 50, service=None,
+              concurrency: int = FETCH_CONCURRENCY,
+              cache: Optional[MessageCache] = None,
+              batch_size: int = ANALYZE_BATCH,
+              service_factory: Optional[Callable[[], Any]] = None,
+              triage_threshold: float = TRIAGE_THRESHOLD) -> Iterator[Dict[str, Any]]:
+    """
+    Incremental scan as a stream of events, so callers can show results early:
+      {"event": "start", "count_messages", "cached_messages"}
+      {"event": "suggestion", ...suggestion}      cached ones first, then as found
+      {"event": "progress", "fetched", "pruned", "to_fetch"}  after each analyzed batch
+      {"event": "triage", "kept", "pruned"}       once every new message is scored (triage on)
+      {"event": "done", "count_messages", "fetched_messages", "pruned_messages", "failed_messages"}
+    Messages and their suggestions are cached per mailbox with the last historyId,
+    so only new messages are fetched and analyzed; an unchanged mailbox costs one
+    getProfile and one history.list call. Messages flow fetch -> extract -> analyze
+    in batches that start at one message and double up to `batch_size`, so the first
+    suggestion does not wait for a full batch; only the current batch is held in memory.
+    New messages are first fetched as metadata and scored by triage_score; only
+    those scoring at least `triage_threshold` are fetched in full and analyzed. The
+    two fetches are pipelined: a message that passes triage is fetched in full while
+    the following ones are still being triaged. Pruned messages are cached with the
+    threshold they missed, so they are triaged again only once the threshold changes.
+    `to_fetch` counts the new messages; each ends up fetched, pruned or failed.
+    Messages that cannot be fetched are skipped and counted in failed_messages; they
+    are not cached, so the next scan lists the mailbox again and retries them.
+    Pass `service` (e.g. fakes.FakeGmailService) to scan without OAuth, or
+    `service_factory` to scan another mailbox with one service per fetch thread.
+    """
+    if service is not None:
+        factory = lambda: service
+    else:
+        factory = service_factory or _get_service
+        service = factory()
+    cache = cache or _message_cache()
+
+    with stage("gmail.profile"):
+        profile = service.users().getProfile(userId="me").execute()
+    account = profile.get("emailAddress", "me")
+    state = cache.state(account)
+    delta = None
+    if state["history_id"] and state["max_results"] == max_results:
+        with stage("gmail.history"):
+            delta = _history_delta(service, state["history_id"])
+        listing = state["listing"]
+        if (delta is not None and not delta[0] and not delta[1]
+                and len(cache.known_ids(account, listing, triage_threshold)) == len(set(listing))):
+            yield {"event": "start", "count_messages": len(listing), "cached_messages": len(listing)}
+            for sug in cache.suggestions(account, listing):
+                yield {"event": "suggestion", **sug}
+            yield {"event": "done", "count_messages": len(listing), "fetched_messages": 0, "pruned_messages": 0,
+                   "failed_messages": 0}
+            return
+    changed = set()
+    if delta is not None:
+        changed, deleted = delta
+        cache.delete(account, deleted)
+
+    with stage("gmail.list"):
+        ids = _list_ids(service, max_results)
+    known = cache.known_ids(account, ids, triage_threshold) - changed
+    todo = [i for i in ids if i not in known]
+    yield {"event": "start", "count_messages": len(ids), "cached_messages": len(ids) - len(todo)}
+    for sug in cache.suggestions(account, [i for i in ids if i in known]):
+        yield {"event": "suggestion", **sug}
+
+    failed: List[str] = []
+    triage = triage_threshold > 0 and bool(todo)
+    kept = pruned = 0
+    dropped: List[Dict[str, Any]] = []
+
+    def _prune():
+        cache.put(account, dropped, {}, pruned_below=triage_threshold)
+        dropped.clear()
 
-    # Fallback: naive rule-based extractor
-    if not suggestions:
-        now = datetime.now()
+    def _triaged(ids: List[str]) -> Iterator[str]:
+        # runs on the scan's thread, pulled by the full fetch as it needs ids
+        nonlocal kept, pruned
+        for meta in iter_metadata(factory, ids, concurrency, failed=failed):
+            if triage_score(meta) >= triage_threshold:
+                kept += 1
+                yield meta["id"]
+            else:
+                pruned += 1
+                dropped.append(meta)
+                if len(dropped) >= max(batch_size, 1):
+                    _prune()
+
+    fetched = 0
+    batch: List[Dict[str, Any]] = []
+    limit = 1
+
+    def _flush(batch):
+        ids = {m["id"] for m in batch}
+        by_id: Dict[str, List[Dict[str, Any]]] = {}
+        loose: List[Dict[str, Any]] = []
+        for sug in _analyze(batch):
+            source = sug.pop("source", None)  # the key the model was asked for before source_message_id
+            mid = sug["source_message_id"] = sug.get("source_message_id") or source
+            if mid in ids:
+                by_id.setdefault(mid, []).append(sug)
+            else:
+                loose.append(sug)
+        if loose:
+            # no id, or one the model made up: a one-message batch can only mean that
+            # message; otherwise keep them with the batch's first message so they are cached
+            if len(batch) == 1:
+                for sug in loose:
+                    sug["source_message_id"] = batch[0]["id"]
+            by_id.setdefault(batch[0]["id"], []).extend(loose)
+        cache.put(account, batch, by_id)
+        return [sug for m in batch for sug in by_id.get(m["id"], [])]
+
+    fetch_ids = _triaged(todo) if triage else todo
+    fulls = iter_full_messages(factory, fetch_ids, concurrency, failed=failed)
+    try:
         for fm in fulls:
-            text = (fm.get("body") or "") + " " + (fm.get("headers", {}).get("subject","") or "")
-            date_strs = find_date_strings(text)
-            if date_strs:
-                for ds in date_strs:
-                    start, end = normalize_date_string(ds, now)
-                    if start:
-                        suggestions.append({
-                            "window_start": start.isoformat(),
-                            "window_end": end.isoformat() if end else start.isoformat(),
-                            "reason": f"Found phrase `{ds}` in message subject/body",
-                            "source_message_id": fm["id"],
-                            "confidence": 0.4
-                        })
-            # also detect travel to Japan or other location words
-            if re.search(r"\b(japan|tokyo|travel to japan|going to japan|trip to japan)\b", text, flags=re.IGNORECASE):
-                # suggest a 7-day window starting ~30 days from now as an example
-                s = (now + timedelta(days=30)).date()
-                suggestions.append({
-                    "window_start": s.isoformat(),
-                    "window_end": (s + timedelta(days=6)).isoformat(),
-                    "reason": "Travel mention: Japan found in message",
-                    "source_message_id": fm["id"],
-                    "confidence": 0.6
-                })
-
-    return {"count_messages": len(fulls), "suggestions": suggestions}
+            batch.append(fm)
+            if len(batch) >= limit:
+                fetched += len(batch)
+                for sug in _flush(batch):
+                    yield {"event": "suggestion", **sug}
+                yield {"event": "progress", "fetched": fetched, "pruned": pruned, "to_fetch": len(todo)}
+                batch = []
+                limit = min(limit * 2, max(batch_size, 1))
+    finally:
+        fulls.close()
+        if triage:
+            fetch_ids.close()
+    if batch:
+        fetched += len(batch)
+        for sug in _flush(batch):
+            yield {"event": "suggestion", **sug}
+    if dropped:
+        _prune()
+    if batch or triage:
+        yield {"event": "progress", "fetched": fetched, "pruned": pruned, "to_fetch": len(todo)}
+    if triage:
+        TRIAGED.inc(kept, result="kept")
+        TRIAGED.inc(pruned, result="pruned")
+        yield {"event": "triage", "kept": kept, "pruned": pruned}
+    # without a historyId the next scan re-lists instead of trusting history, so failed messages are retried
+    cache.set_state(account, None if failed else profile.get("historyId"), ids, max_results)
+    yield {"event": "done", "count_messages": len(ids), "fetched_messages": fetched, "pruned_messages": pruned,
+           "failed_messages": len(failed)}
+
+def scan_and_suggest(max_results: int = 50, service=None,
+                     concurrency: int = FETCH_CONCURRENCY,
+                     cache: Optional[MessageCache] = None) -> Dict[str, Any]:
+    """
+    Run iter_scan to completion and return
+    {"count_messages", "fetched_messages", "pruned_messages", "failed_messages", "suggestions"}.
+    """
+    result: Dict[str, Any] = {"count_messages": 0, "fetched_messages": 0, "pruned_messages": 0,
+                              "failed_messages": 0, "suggestions": []}
+    for ev in iter_scan(max_results, service=service, concurrency=concurrency, cache=cache):
+        kind = ev.pop("event")
+        if kind == "suggestion":
+            result["suggestions"].append(ev)
+        elif kind == "done":
+            result.update(ev)
+    return result
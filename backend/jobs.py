@@ -0,0 +1,158 @@
+# backend/jobs.py
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+SCAN_WORKERS = int(os.environ.get("SMARTPTO_SCAN_WORKERS", "2"))
+SCAN_QUEUE_LIMIT = int(os.environ.get("SMARTPTO_SCAN_QUEUE", "16"))  # queued + running jobs
+JOB_HISTORY = 200  # finished jobs kept for polling, oldest dropped first
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = {DONE, FAILED, CANCELLED}
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    """One background scan: progress from its event stream, the suggestions found so far, and a cancel flag."""
+
+    def __init__(self, key: Hashable, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.params = params
+        self.status = QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.progress: Dict[str, Any] = {}
+        self.suggestions: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+
+    def to_dict(self, since: int = 0) -> Dict[str, Any]:
+        """
+        Status plus the suggestions from index `since` on, so pollers only get what is new.
+        suggestion_count is derived from the same slice, so `since=suggestion_count` on the
+        next poll neither skips nor repeats one; status is read first, so a finished job's
+        answer always holds its last suggestions.
+        """
+        status = self.status
+        new = self.suggestions[since:]  # one atomic copy; the job thread only appends
+        count = since + len(new) if new else min(since, len(self.suggestions))
+        return {
+            "job_id": self.id,
+            "status": status,
+            "params": self.params,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "progress": dict(self.progress),
+            "error": self.error,
+            "suggestion_count": count,
+            "suggestions": new,
+        }
+
+
+class JobQueue:
+    """
+    Runs scan jobs on a bounded thread pool so web workers stay free. A job is an
+    iterator of iter_scan-style events; submitting a job whose key matches one that is
+    still queued or running returns that job instead of starting a second scan.
+    Cancelling stops the job between events and closes its iterator.
+    """
+
+    def __init__(self, workers: int = SCAN_WORKERS, queue_limit: int = SCAN_QUEUE_LIMIT,
+                 history: int = JOB_HISTORY):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan-job")
+        self._queue_limit = queue_limit
+        self._history = history
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, params: Dict[str, Any],
+               run: Callable[[Job], Iterator[Dict[str, Any]]]) -> Tuple[Job, bool]:
+        """(job, created); created is False when an identical job was already in flight."""
+        with self._lock:
+            job_id = self._active.get(key)
+            if job_id is not None:
+                return self._jobs[job_id], False
+            if len(self._active) >= self._queue_limit:
+                raise QueueFull(f"{len(self._active)} scans already queued or running")
+            job = Job(key, params)
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+            self._prune()
+        job.future = self._pool.submit(self._run, job, run)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():  # never started
+            self._finish(job, CANCELLED)
+        return job
+
+    def shutdown(self):
+        for job in self.list():
+            job.cancel_event.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: Job, run: Callable[[Job], Iterator[Dict[str, Any]]]):
+        if job.cancel_event.is_set():
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        job.started = time.time()
+        events = None
+        try:
+            events = run(job)
+            for ev in events:
+                if job.cancel_event.is_set():
+                    break
+                kind = ev.pop("event", None)
+                if kind == "suggestion":
+                    job.suggestions.append(ev)
+                elif kind is not None:
+                    job.progress = {**job.progress, **ev}  # swapped, not mutated: pollers read it unlocked
+        except Exception as e:
+            self._finish(job, FAILED, f"{type(e).__name__}: {e}")
+            return
+        finally:
+            close = getattr(events, "close", None)  # None if run() itself raised
+            if close is not None:
+                close()  # stops in-flight fetches of a cancelled scan
+        self._finish(job, CANCELLED if job.cancel_event.is_set() else DONE)
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        with self._lock:
+            if job.status in FINISHED:
+                return
+            job.status = status
+            job.error = error
+            job.finished = time.time()
+            if self._active.get(job.key) == job.id:
+                del self._active[job.key]
+
+    def _prune(self):
+        # caller holds the lock
+        finished = [j.id for j in self._jobs.values() if j.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self._history)]:
+            del self._jobs[job_id]
@@ -0,0 +1,142 @@
+# backend/llm_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from backend.metrics import LLM_CACHE, LLM_CALLS, stage
+
+CACHE_DB = os.environ.get("GEMINI_CACHE_DB")  # unset = memory only
+CACHE_TTL_S = float(os.environ.get("GEMINI_CACHE_TTL_S", str(24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.environ.get("GEMINI_CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.environ.get("GEMINI_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))  # UTF-8 size of values
+DISK_MAX_ENTRIES = 50_000
+DISK_PRUNE_EVERY = 256  # puts between sweeps of expired and surplus disk rows
+
+
+def cache_key(model: str, payload: str) -> str:
+    h = hashlib.sha256()
+    h.update(model.encode("utf-8"))
+    h.update(b"\0")
+    h.update(payload.encode("utf-8"))
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache for model responses: an in-memory LRU bounded by entry
+    count and total UTF-8 bytes, optionally backed by a SQLite file. Entries expire
+    after ttl_s. The disk table is swept every `prune_every` puts, not on each one.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 ttl_s: float = CACHE_TTL_S, disk_path: Optional[str] = CACHE_DB,
+                 disk_max_entries: int = DISK_MAX_ENTRIES, prune_every: int = DISK_PRUNE_EVERY):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.disk_max_entries = disk_max_entries
+        self.prune_every = prune_every
+        self._puts = 0
+        self._mem: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()  # key -> (created, value, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.disk_hits = self.evictions = 0
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False, isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, created REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS ix_results_created ON results(created)")
+
+    def _put_mem(self, key: str, created: float, value: str):
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        size = len(value.encode("utf-8"))
+        self._mem[key] = (created, value, size)
+        self._bytes += size
+        while self._mem and (len(self._mem) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, _, size) = self._mem.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def _prune_disk(self, now: float):
+        # both deletes walk ix_results_created instead of sorting the table
+        self._disk.execute("DELETE FROM results WHERE created < ?", (now - self.ttl_s,))
+        cutoff = self._disk.execute("SELECT created FROM results ORDER BY created DESC LIMIT 1 OFFSET ?",
+                                    (self.disk_max_entries,)).fetchone()
+        if cutoff is not None:
+            self._disk.execute("DELETE FROM results WHERE created <= ?", (cutoff[0],))
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                if now - item[0] <= self.ttl_s:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return item[1]
+                del self._mem[key]
+                self._bytes -= item[2]
+            if self._disk is not None:
+                row = self._disk.execute("SELECT created, value FROM results WHERE key = ?", (key,)).fetchone()
+                if row and now - row[0] <= self.ttl_s:
+                    self._put_mem(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._put_mem(key, now, value)
+            if self._disk is not None:
+                self._disk.execute("INSERT OR REPLACE INTO results (key, created, value) VALUES (?, ?, ?)",
+                                   (key, now, value))
+                self._puts += 1
+                if self._puts % self.prune_every == 0:
+                    self._prune_disk(now)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._bytes = 0
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits,
+                    "evictions": self.evictions, "entries": len(self._mem), "bytes": self._bytes}
+
+
+RESULTS = ResultCache()
+
+
+def cached_generate(model: str, prompt: str, generate: Callable[[str], str],
+                    cache: Optional[ResultCache] = None) -> str:
+    """Return the cached response for (model, prompt), calling `generate` only on a miss."""
+    cache = cache or RESULTS
+    key = cache_key(model, prompt)
+    text = cache.get(key)
+    LLM_CACHE.inc(result="miss" if text is None else "hit")
+    if text is None:
+        try:
+            with stage("llm.generate"):
+                text = generate(prompt)
+        except Exception:
+            LLM_CALLS.inc(model=model, outcome="error")
+            raise
+        LLM_CALLS.inc(model=model, outcome="ok" if text else "empty")
+        if text:  # never cache empty answers
+            cache.put(key, text)
+    return text
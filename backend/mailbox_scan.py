@@ -0,0 +1,256 @@
+# backend/mailbox_scan.py
+"""
+Holiday-hint scans across many mailboxes (one credential set per employee), with
+Gmail quota enforced by token buckets: one per mailbox for the per-user limit and
+one shared by all mailboxes for the per-project limit.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from backend.metrics import REGISTRY, stage
+from backend.models import PTORequest
+
+# quota units per call (Gmail API usage limits)
+QUOTA_UNITS = {
+    "users.getProfile": 1,
+    "users.history.list": 2,
+    "users.messages.list": 5,
+    "users.messages.get": 5,
+}
+DEFAULT_UNITS = 5
+USER_UNITS_PER_S = float(os.environ.get("GMAIL_USER_QUOTA_UNITS_PER_S", "250"))
+PROJECT_UNITS_PER_S = float(os.environ.get("GMAIL_PROJECT_QUOTA_UNITS_PER_S", "20000"))  # 1.2M per minute
+TOKENS_DIR = os.environ.get(
+    "GMAIL_TOKENS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "gmail_tokens"))  # <employee_id>.json
+MAILBOX_WORKERS = int(os.environ.get("GMAIL_MAILBOX_WORKERS", "4"))
+FETCHES_PER_MAILBOX = int(os.environ.get("GMAIL_FETCHES_PER_MAILBOX", "4"))
+# rule-based hints score 0.4 (a date phrase) or 0.6 (a travel mention); Gemini rates its own
+MIN_CONFIDENCE = float(os.environ.get("SMARTPTO_HINT_MIN_CONFIDENCE", "0.4"))
+
+QUOTA_UNITS_USED = REGISTRY.counter(
+    "smartpto_gmail_quota_units_total", "Gmail quota units spent, by method.", ["method"])
+
+
+class TokenBucket:
+    """
+    `rate` tokens per second up to `capacity`. Waiters are served first come, first
+    served, so callers sharing a bucket get an equal share of its throughput.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters: deque = deque()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, units: float = 1.0):
+        units = min(units, self.capacity)
+        ticket = object()
+        with self._cond:
+            self._waiters.append(ticket)
+            while True:
+                self._refill()
+                if self._waiters[0] is ticket:
+                    if self._tokens >= units:
+                        self._tokens -= units
+                        self._waiters.popleft()
+                        self._cond.notify_all()
+                        return
+                    self._cond.wait((units - self._tokens) / self.rate)
+                else:
+                    self._cond.wait()
+
+
+class QuotaLimiter:
+    """Per-user buckets plus one project bucket; acquire() takes from both."""
+
+    def __init__(self, user_rate: float = USER_UNITS_PER_S, project_rate: float = PROJECT_UNITS_PER_S):
+        self.user_rate = user_rate
+        self.project = TokenBucket(project_rate)
+        self._users: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _user(self, account: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._users.get(account)
+            if bucket is None:
+                bucket = self._users[account] = TokenBucket(self.user_rate)
+            return bucket
+
+    def acquire(self, account: str, units: float):
+        with stage("gmail.quota_wait"):
+            self._user(account).acquire(units)
+            self.project.acquire(units)
+
+
+class MeteredService:
+    """
+    Wraps a Gmail service (real or fake) so every request's execute() first takes
+    its quota units from the limiter, e.g. users().messages().get(...).execute().
+    """
+
+    def __init__(self, target: Any, limiter: QuotaLimiter, account: str, path: str = ""):
+        self._target = target
+        self._limiter = limiter
+        self._account = account
+        self._path = path
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if name == "execute":
+            units = QUOTA_UNITS.get(self._path, DEFAULT_UNITS)
+
+            def execute(*args, **kwargs):
+                self._limiter.acquire(self._account, units)
+                QUOTA_UNITS_USED.inc(units, method=self._path)
+                return attr(*args, **kwargs)
+            return execute
+        if not callable(attr):
+            return attr
+        path = f"{self._path}.{name}" if self._path else name
+
+        def call(*args, **kwargs):
+            return MeteredService(attr(*args, **kwargs), self._limiter, self._account, path)
+        return call
+
+
+LIMITER = QuotaLimiter()  # the project quota is shared by every scan in this process
+
+
+_managers: Dict[str, Any] = {}  # token file -> GmailServiceManager, kept across scans
+_managers_lock = threading.Lock()
+
+
+def token_mailboxes(employee_ids: List[str], tokens_dir: str = TOKENS_DIR) -> Dict[str, Callable[[], Any]]:
+    """
+    Service factories for the employees that have a token file in tokens_dir. One
+    manager per token file lives for the process, so credentials and each fetch
+    thread's service are reused by later scans.
+    """
+    from backend.gmail_reader import GmailServiceManager
+
+    out = {}
+    for emp_id in employee_ids:
+        path = os.path.abspath(os.path.join(tokens_dir, f"{emp_id}.json"))
+        if os.path.exists(path):
+            with _managers_lock:
+                manager = _managers.get(path)
+                if manager is None:
+                    manager = _managers[path] = GmailServiceManager(token_file=path, interactive=False)
+            out[emp_id] = manager.service
+    return out
+
+
+def _to_requests(employee_id: str, suggestions: List[Dict[str, Any]], min_confidence: float,
+                 today: Optional[date] = None) -> List[PTORequest]:
+    """Pending requests for the suggestions that are confident enough and not over yet."""
+    today = today or date.today()
+    out = []
+    for s in suggestions:
+        try:
+            if float(s.get("confidence") or 0) < min_confidence:
+                continue
+            start = date.fromisoformat(str(s["window_start"]))
+            end = date.fromisoformat(str(s.get("window_end") or s["window_start"]))
+        except (KeyError, TypeError, ValueError):
+            continue  # LLM output we cannot place on the calendar
+        if end < start:
+            continue
+        if end < today:
+            continue  # leave that is already over, e.g. read from a months-old message
+        out.append(PTORequest(employee_id=employee_id, start_date=start, end_date=end, status="pending",
+                              note=f"gmail hint: {s.get('reason', '')}"[:200]))
+    return out
+
+
+def iter_team_scan(mailboxes: Dict[str, Callable[[], Any]],
+                   store=None,
+                   max_results: int = 50,
+                   workers: int = MAILBOX_WORKERS,
+                   fetches_per_mailbox: int = FETCHES_PER_MAILBOX,
+                   limiter: Optional[QuotaLimiter] = None,
+                   cache=None,
+                   min_confidence: float = MIN_CONFIDENCE,
+                   cancel: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Scan every mailbox ({employee_id: service factory}) on `workers` threads, each
+    mailbox fetching with `fetches_per_mailbox` threads, all calls metered by `limiter`
+    (the process-wide LIMITER by default).
+    Suggestions at or above min_confidence that have not ended yet are hints; with a
+    `store` they become pending PTO requests (existing requests are never touched), with
+    store=None it is a dry run that only counts them. Yields events like iter_scan:
+      {"event": "start", "mailboxes"}
+      {"event": "suggestion", "employee_id", ...suggestion}
+      {"event": "progress", "mailboxes_done", "mailboxes", "messages"}  per finished mailbox
+      {"event": "done", "mailboxes", "failed", "messages", "hints", "requests_added"}
+    """
+    from backend import gmail_reader
+
+    limiter = limiter or LIMITER
+    cancel = cancel or threading.Event()
+    stop = threading.Event()  # set when we finish or the consumer closes us early
+
+    def _scan(emp_id: str, factory: Callable[[], Any]) -> Dict[str, Any]:
+        local = threading.local()
+
+        def metered():
+            svc = getattr(local, "svc", None)
+            if svc is None:
+                svc = local.svc = MeteredService(factory(), limiter, emp_id)
+            return svc
+
+        suggestions, messages = [], 0
+        events = gmail_reader.iter_scan(max_results, concurrency=fetches_per_mailbox, cache=cache,
+                                        service_factory=metered)
+        try:
+            for ev in events:
+                if cancel.is_set() or stop.is_set():
+                    break
+                kind = ev.pop("event")
+                if kind == "suggestion":
+                    suggestions.append(ev)
+                elif kind == "done":
+                    messages = ev["count_messages"]
+        finally:
+            events.close()
+        return {"suggestions": suggestions, "messages": messages}
+
+    yield {"event": "start", "mailboxes": len(mailboxes)}
+    done = failed = messages = hints = added = 0
+    pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(mailboxes) or 1)), thread_name_prefix="mailbox")
+    try:
+        futures = {pool.submit(_scan, emp_id, f): emp_id for emp_id, f in mailboxes.items()}
+        for fut in as_completed(futures):
+            emp_id = futures[fut]
+            done += 1
+            try:
+                res = fut.result()
+            except Exception as e:
+                failed += 1
+                yield {"event": "mailbox_error", "employee_id": emp_id, "error": f"{type(e).__name__}: {e}"}
+                continue
+            messages += res["messages"]
+            for sug in res["suggestions"]:
+                yield {"event": "suggestion", "employee_id": emp_id, **sug}
+            requests = _to_requests(emp_id, res["suggestions"], min_confidence)
+            hints += len(requests)
+            if store is not None:
+                added += store.add_requests(requests)
+            yield {"event": "progress", "mailboxes_done": done, "mailboxes": len(mailboxes), "messages": messages}
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+    yield {"event": "done", "mailboxes": len(mailboxes), "failed": failed, "messages": messages,
+           "hints": hints, "requests_added": added}
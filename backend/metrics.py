@@ -0,0 +1,168 @@
+# backend/metrics.py
+"""
+Process-local counters and latency histograms, rendered in the Prometheus text
+format by /metrics. Kept dependency-free; every metric is thread-safe.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# seconds; covers cache hits (~ms) up to slow LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0.0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {v:g}" for k, v in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (non-cumulative) + overflow, sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            row[0][i] += 1
+            row[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def count(self, **labels) -> int:
+        row = self._values.get(tuple(str(labels[n]) for n in self.labelnames))
+        return sum(row[0]) if row else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._values.items())
+        out = []
+        for key, (counts, total) in items:
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                le = 'le="%g"' % bound
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {running}")
+            running += counts[-1]
+            inf = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_labels(self.labelnames, key, inf)} {running}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total:.6f}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, key)} {running}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # module reloads register the same names again
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_LATENCY = REGISTRY.histogram(
+    "smartpto_http_request_duration_seconds", "Time to produce the response headers, per route.",
+    ["method", "route", "status"])
+STAGE_LATENCY = REGISTRY.histogram(
+    "smartpto_stage_duration_seconds", "Time spent in each pipeline stage.", ["stage"])
+MESSAGES_FETCHED = REGISTRY.counter(
+    "smartpto_gmail_messages_fetched_total", "Messages fetched with format=full.")
+LLM_CALLS = REGISTRY.counter(
+    "smartpto_llm_calls_total", "Model calls that missed the result cache, by outcome.", ["model", "outcome"])
+LLM_CACHE = REGISTRY.counter(
+    "smartpto_llm_cache_lookups_total", "Result cache lookups.", ["result"])
+FALLBACKS = REGISTRY.counter(
+    "smartpto_analyze_fallbacks_total", "Batches analyzed by the rule-based extractor, by reason.", ["reason"])
+
+
+def stage(name: str):
+    """`with stage("gmail.list"): ...` records the block's duration under that stage."""
+    return STAGE_LATENCY.time(stage=name)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Decorator form of stage()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with STAGE_LATENCY.time(stage=name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import date
 
@@ -9,6 +9,7 @@ class Employee(BaseModel):
     team: str
     manager_id: Optional[str] = None
     accrual_days: float  # current available PTO days
+    accrual_per_month: Optional[float] = None  # None = AccrualPolicy default
 
 
 class PTORequest(BaseModel):
@@ -16,6 +17,7 @@ class PTORequest(BaseModel):
     start_date: date
     end_date: date
     status: str  # pending/approved/denied
+    note: Optional[str] = None
 
 
 class PTORecommendation(BaseModel):
@@ -24,3 +26,39 @@ class PTORecommendation(BaseModel):
     window_end: date
     reason: str
     coverage_ratio: float  # fraction of team out on those days
+    pto_days: Optional[int] = None  # working days the window costs
+
+
+class BatchRecommendRequest(BaseModel):
+    team: Optional[str] = None  # every member of this team
+    employee_ids: List[str] = []  # and/or these employees
+    desired_len_days: int = Field(3, ge=1, le=14)
+    horizon_days: int = Field(60, ge=7, le=365)
+    max_coverage_ratio: float = Field(0.3, ge=0.0, le=1.0)
+    top_k: int = Field(5, ge=1, le=20)
+
+
+class ScheduleDemand(BaseModel):
+    employee_id: str
+    desired_len_days: int = Field(5, ge=1, le=30)
+    preferred_start: Optional[date] = None
+
+
+class ScheduleRequest(BaseModel):
+    team: Optional[str] = None  # None = whole org
+    demands: List[ScheduleDemand] = []  # empty = every employee, default_len_days each
+    default_len_days: int = Field(5, ge=1, le=30)
+    horizon_days: int = Field(90, ge=7, le=730)
+    max_coverage_ratio: float = Field(0.3, ge=0.0, le=1.0)
+    include_pending: bool = True  # pending PTO requests become demands with a preferred start
+
+
+class ScheduleResult(BaseModel):
+    assignments: List[PTORecommendation]
+    unassigned: List[str]  # employee ids that could not be placed
+
+
+class AccrualPolicy(BaseModel):
+    days_per_month: float = Field(1.25, ge=0)  # accrued on the 1st of each month
+    carry_over_cap: float = Field(5.0, ge=0)  # balance above this is lost on Jan 1
+    carry_over_expiry_month: int = Field(4, ge=1, le=12)  # unused carried days lapse on the 1st of this month
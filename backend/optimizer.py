@@ -0,0 +1,179 @@
+# backend/optimizer.py
+import heapq
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.metrics import timed
+from backend.models import Employee, PTORecommendation, ScheduleDemand, ScheduleResult
+from backend.workdays import DEFAULT_REGION, BusinessCalendar, get_calendar
+
+# cost of moving one day away from a preferred start, relative to one person-day of overlap
+PREF_WEIGHT = 0.05
+# tiny bias towards earlier windows so ties resolve deterministically
+EARLY_WEIGHT = 1e-4
+
+
+def coverage_limit(size: int, max_coverage_ratio: float) -> int:
+    """
+    People of a team of `size` that may be out on one day: floor(ratio * size), but at
+    least one for any ratio > 0, or a team smaller than 1 / ratio (3 people at 0.3)
+    could never take leave. A ratio of 0 is a freeze.
+    """
+    if max_coverage_ratio <= 0 or size <= 0:
+        return 0
+    return max(int(np.floor(max_coverage_ratio * size + 1e-9)), 1)
+
+
+class _Team:
+    __slots__ = ("size", "cap", "used")
+
+    def __init__(self, size: int, occ: np.ndarray, max_coverage_ratio: float):
+        self.size = size
+        limit = coverage_limit(size, max_coverage_ratio)
+        self.cap = (limit - occ).astype(np.int32)   # how many more people may be out each day
+        self.used = occ.astype(np.int32).copy()     # people out each day (approved + scheduled)
+
+
+def _best_start(team: _Team, length: int, pref: Optional[int], lead: int, offsets: np.ndarray,
+                busy: np.ndarray, cost: np.ndarray, budget: float) -> int:
+    """
+    Start offset of the cheapest window that fits under capacity, avoids the employee's
+    `busy` days and whose PTO `cost` (per start) is within `budget`, or -1.
+    """
+    n = len(team.cap) - length + 1
+    if n <= lead:
+        return -1
+    ok = np.concatenate(([0], np.cumsum((team.cap > 0) & (busy == 0), dtype=np.int32)))
+    valid = ((ok[length:] - ok[:n]) == length) & (cost[:n] <= budget + 1e-9)
+    valid[:lead] = False
+    if not valid.any():
+        return -1
+    used = np.concatenate(([0], np.cumsum(team.used, dtype=np.int64)))
+    score = (used[length:] - used[:n]) + EARLY_WEIGHT * offsets[:n]
+    if pref is not None:
+        score = score + PREF_WEIGHT * np.abs(offsets[:n] - pref)
+    score[~valid] = np.inf
+    return int(np.argmin(score))
+
+
+@timed("optimizer.optimize_schedule")
+def optimize_schedule(today: date,
+                      horizon_days: int,
+                      max_coverage_ratio: float,
+                      employees: List[Employee],
+                      demands: List[ScheduleDemand],
+                      occupancy: Callable[[str], np.ndarray],
+                      team_sizes: Dict[str, int],
+                      passes: int = 1,
+                      min_lead_days: int = 1,
+                      calendar: Optional[BusinessCalendar] = None,
+                      approved: Iterable[Tuple[str, str, int, int]] = ()) -> ScheduleResult:
+    """
+    Place every demand over the horizon so no day has more of a team out than
+    coverage_limit(size, max_coverage_ratio) allows.
+    Greedy from a priority queue (preferred dates first, then longer windows, then larger
+    balances), each placement picking the least-overlapping window from prefix sums over
+    the team's day-capacity arrays; then `passes` rounds of local search re-place each
+    window given everyone else's. `occupancy(team)` returns approved out-counts per day;
+    `approved` (rows as Store.requests_between) keeps each employee's new windows off
+    the days they are already out, and an employee's windows never overlap each other.
+    An employee's windows together must fit their balance in PTO days (working days
+    from `calendar`, as /recommend reports them); demands for unknown employees, or
+    with no affordable window left, are returned in `unassigned`.
+    """
+    if calendar is None:
+        calendar = get_calendar(DEFAULT_REGION, today.year)
+    costs: Dict[int, np.ndarray] = {}  # window length -> PTO cost of each start
+
+    def _costs(length: int) -> np.ndarray:
+        if length not in costs:
+            costs[length] = calendar.window_costs(today, max(horizon_days - length + 1, 0), length)
+        return costs[length]
+
+    by_id = {e.id: e for e in employees}
+    offsets = np.arange(horizon_days, dtype=np.float64)
+    teams: Dict[str, _Team] = {}
+    heap = []
+    unassigned: List[str] = []
+    balance = {e.id: e.accrual_days for e in employees}
+    busy: Dict[str, np.ndarray] = {}  # days each employee is out: approved leave + windows placed so far
+    base = today.toordinal()
+    for emp_id, _, lo, hi in approved:
+        if emp_id in by_id:
+            days = busy.setdefault(emp_id, np.zeros(horizon_days, dtype=np.int32))
+            days[max(lo - base, 0):max(min(hi - base + 1, horizon_days), 0)] += 1
+    for i, d in enumerate(demands):
+        emp = by_id.get(d.employee_id)
+        if emp is None:
+            unassigned.append(d.employee_id)
+            continue
+        if emp.team not in teams:
+            teams[emp.team] = _Team(team_sizes[emp.team], occupancy(emp.team), max_coverage_ratio)
+        pref = None
+        if d.preferred_start is not None:
+            pref = min(max((d.preferred_start - today).days, 0), horizon_days - 1)
+        heapq.heappush(heap, (pref is None, -d.desired_len_days, -emp.accrual_days, i, pref))
+
+    placed = {}  # demand index -> (start offset, preferred offset)
+    order = []
+    while heap:
+        _, neg_len, _, i, pref = heapq.heappop(heap)
+        length = -neg_len
+        emp_id = demands[i].employee_id
+        team = teams[by_id[emp_id].team]
+        own = busy.setdefault(emp_id, np.zeros(horizon_days, dtype=np.int32))
+        s = _best_start(team, length, pref, min_lead_days, offsets, own, _costs(length), balance[emp_id])
+        if s < 0:
+            unassigned.append(emp_id)
+            continue
+        team.cap[s:s + length] -= 1
+        team.used[s:s + length] += 1
+        own[s:s + length] += 1
+        balance[emp_id] -= _costs(length)[s]
+        placed[i] = (s, pref)
+        order.append(i)
+
+    for _ in range(passes):
+        moved = 0
+        for i in order:
+            s, pref = placed[i]
+            length = demands[i].desired_len_days
+            emp_id = demands[i].employee_id
+            team = teams[by_id[emp_id].team]
+            own, cost = busy[emp_id], _costs(length)
+            team.cap[s:s + length] += 1
+            team.used[s:s + length] -= 1
+            own[s:s + length] -= 1
+            balance[emp_id] += cost[s]
+            s2 = _best_start(team, length, pref, min_lead_days, offsets, own, cost, balance[emp_id])
+            s2 = s if s2 < 0 else s2
+            team.cap[s2:s2 + length] -= 1
+            team.used[s2:s2 + length] += 1
+            own[s2:s2 + length] += 1
+            balance[emp_id] -= cost[s2]
+            moved += s2 != s
+            placed[i] = (s2, pref)
+        if not moved:
+            break
+
+    assignments = []
+    for i in sorted(placed):
+        s, pref = placed[i]
+        d = demands[i]
+        team_name = by_id[d.employee_id].team
+        team = teams[team_name]
+        start = today + timedelta(days=s)
+        end = start + timedelta(days=d.desired_len_days - 1)
+        cov = float(team.used[s:s + d.desired_len_days].mean()) / max(team.size, 1)
+        reason = "preferred start kept" if pref == s else f"{cov:.0%} of team {team_name} out on average"
+        assignments.append(PTORecommendation(
+            employee_id=d.employee_id,
+            window_start=start,
+            window_end=end,
+            reason=reason,
+            coverage_ratio=round(cov, 4),
+            pto_days=int(_costs(d.desired_len_days)[s]),
+        ))
+    return ScheduleResult(assignments=assignments, unassigned=unassigned)
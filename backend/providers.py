@@ -0,0 +1,34 @@
+# backend/providers.py
+"""
+Google client libraries, imported on first use. Together they take longer to import
+than the rest of the backend, and most processes (API workers serving /balance,
+benchmarks, scans of fake mailboxes) never call Google at all.
+"""
+import functools
+from types import SimpleNamespace
+
+
+@functools.lru_cache(maxsize=None)
+def gmail_client() -> SimpleNamespace:
+    """OAuth and Gmail API client pieces; raises ImportError if the libraries are missing."""
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+    from googleapiclient.http import build_http
+
+    return SimpleNamespace(Request=Request, Credentials=Credentials, AuthorizedHttp=AuthorizedHttp,
+                           InstalledAppFlow=InstalledAppFlow, build_from_document=build_from_document,
+                           get_static_doc=get_static_doc, build_http=build_http)
+
+
+@functools.lru_cache(maxsize=None)
+def genai():
+    """The google.generativeai module, or None when it is not installed."""
+    try:
+        import google.generativeai as module
+    except Exception:
+        return None
+    return module
@@ -1,5 +1,77 @@
 # backend/recommender.py
+import heapq
 from datetime import date, timedelta
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backend.metrics import timed
+from backend.optimizer import coverage_limit
+from backend.workdays import DEFAULT_REGION, BusinessCalendar, get_calendar
+
+Window = Tuple[date, date, float, int]  # start, end, coverage ratio, PTO days spent
+
+
+def occupancy(today: date, horizon_days: int, out_dates: Iterable[Union[str, date]]) -> np.ndarray:
+    """Per-day count of people out, index 0 == today, length horizon_days."""
+    occ = np.zeros(horizon_days, dtype=np.int32)
+    base = today.toordinal()
+    offsets = []
+    for d in out_dates:
+        if isinstance(d, str):
+            d = date.fromisoformat(d)
+        offsets.append(d.toordinal() - base)
+    if offsets:
+        idx = np.asarray(offsets, dtype=np.int64)
+        idx = idx[(idx >= 0) & (idx < horizon_days)]
+        np.add.at(occ, idx, 1)
+    return occ
+
+
+@timed("recommender.best_windows")
+def best_windows(today: date,
+                 occ: np.ndarray,
+                 desired_len_days: int,
+                 team_size: int,
+                 max_coverage_ratio: float,
+                 top_k: int = 5,
+                 min_lead_days: int = 1,
+                 calendar: Optional[BusinessCalendar] = None) -> List[Window]:
+    """
+    Score every window start over the occupancy array in one pass.
+    Coverage of a window is the mean fraction of the team already out on its days,
+    computed from prefix sums so each candidate costs O(1). A window is only offered
+    if the employee fits under coverage_limit(team_size, max_coverage_ratio) on every
+    one of its days, the cap /schedule/optimize applies. Windows are ranked by
+    coverage, then by the working days they cost (from `calendar`), then by date.
+    """
+    n = len(occ) - desired_len_days + 1
+    if n <= min_lead_days or desired_len_days < 1:
+        return []
+    prefix = np.concatenate(([0], np.cumsum(occ, dtype=np.int64)))
+    sums = prefix[desired_len_days:] - prefix[:n]
+    cov = sums / float(desired_len_days * max(team_size, 1))
+    full = np.concatenate(([0], np.cumsum(occ >= coverage_limit(max(team_size, 1), max_coverage_ratio))))
+    full_days = full[desired_len_days:] - full[:n]  # days in each window with no room left
+
+    if calendar is None:
+        calendar = get_calendar(DEFAULT_REGION, today.year)
+    cost = calendar.window_costs(today, n, desired_len_days)
+
+    starts = np.arange(min_lead_days, n)
+    cov, cost = cov[min_lead_days:], cost[min_lead_days:]
+    ok = full_days[min_lead_days:] == 0
+    starts, cov, cost = starts[ok], cov[ok], cost[ok]
+
+    # lowest coverage first, then fewest PTO days, earlier start breaks ties
+    best = heapq.nsmallest(top_k, zip(cov.tolist(), cost.tolist(), starts.tolist()))
+    results = []
+    for c, pto, s in best:
+        start = today + timedelta(days=s)
+        end = start + timedelta(days=desired_len_days - 1)
+        results.append((start, end, round(c, 4), int(pto)))
+    return results
+
 
 def suggest_windows(today: date,
                     horizon_days: int,
@@ -7,12 +79,8 @@ def suggest_windows(today: date,
                     team_size: int,
                     team_out_dates: list,
                     max_coverage_ratio: float,
-                    top_k: int = 5):
-    # Return a few dummy windows
-    results = []
-    for i in range(top_k):
-        start = today + timedelta(days=7 + i*desired_len_days)
-        end = start + timedelta(days=desired_len_days - 1)
-        cov = 0.1  # pretend coverage ratio
-        results.append((start, end, cov))
-    return results
+                    top_k: int = 5,
+                    region: str = DEFAULT_REGION) -> List[Window]:
+    occ = occupancy(today, horizon_days, team_out_dates)
+    return best_windows(today, occ, desired_len_days, team_size, max_coverage_ratio, top_k,
+                        calendar=get_calendar(region, today.year))
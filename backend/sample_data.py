@@ -1,3 +1,7 @@
+from datetime import date
+
+from backend.models import PTORequest
+
 EMPLOYEES = {
     "u1": {"id": "u1", "name": "Ryan", "accrual_days": 12, "team": "alpha"},
     "u2": {"id": "u2", "name": "Alex", "accrual_days": 7, "team": "alpha"},
@@ -5,8 +9,10 @@ EMPLOYEES = {
     "m1": {"id": "m1", "name": "Sam (Mgr)", "accrual_days": 20, "team": "alpha"},
 }
 
-TEAM_OUT = {
-    "alpha": ["2025-10-15", "2025-10-20"],
-    "beta": ["2025-10-10"],
-}
+# approved absences that make up each team's out-of-office calendar
+PTO_REQUESTS = [
+    PTORequest(employee_id="u1", start_date=date(2025, 10, 15), end_date=date(2025, 10, 15), status="approved"),
+    PTORequest(employee_id="u2", start_date=date(2025, 10, 20), end_date=date(2025, 10, 21), status="approved"),
+    PTORequest(employee_id="u3", start_date=date(2025, 10, 10), end_date=date(2025, 10, 10), status="approved"),
+]
 
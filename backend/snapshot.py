@@ -0,0 +1,287 @@
+# backend/snapshot.py
+"""
+Team occupancy snapshot shared by every worker process through mmap.
+
+One process (the first worker to see a new store revision, or a dedicated
+`python -m backend.snapshot --watch 5`) counts the people out per team and day,
+writes the result to a temp file and os.replace()s it over the snapshot path.
+Readers map the file read-only and answer from NumPy views into the mapping, so
+the arrays exist once in the page cache however many workers there are. A reader
+notices a rotated file by its inode and maps the new one on the next lookup.
+
+Layout (little-endian, sections start on 64-byte boundaries):
+  header   magic, version, team count, store id, store revision, first day (ordinal), days,
+           offset/length of the team index, offsets of the counts and prefix sections
+  teams    team names, UTF-8, newline separated, in row order
+  counts   int32[teams + 1, days]      people out per day; the extra last row is all zeros
+  prefix   int64[teams + 1, days + 1]  running totals of each counts row
+"""
+import argparse
+import logging
+import mmap
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from struct import Struct
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from backend.store import DB_PATH
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, concurrent rebuilds only waste work
+    fcntl = None
+
+SNAPSHOT_PATH = os.environ.get("SMARTPTO_SNAPSHOT", os.path.splitext(DB_PATH)[0] + ".occupancy")  # "" = off
+SPAN_DAYS = 3 * 366  # same window as AbsenceIndex: a year back, two years ahead
+
+MAGIC = b"SPTOOCC1"
+VERSION = 2
+HEADER = Struct("<8sIIqqqqqqqq")
+ALIGN = 64
+
+Row = Tuple[str, str, int, int]  # (employee_id, team, start_ordinal, end_ordinal), as Store.requests_between
+
+log = logging.getLogger(__name__)
+
+
+def _align(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+def build_counts(rows: Iterable[Row], base: int, span: int) -> Tuple[List[str], np.ndarray]:
+    """(team names, int32[teams, span] people out per day from `base`); intervals are clipped to the window."""
+    teams: Dict[str, int] = {}
+    team_idx, los, his = [], [], []
+    for _, team, lo, hi in rows:
+        team_idx.append(teams.setdefault(team, len(teams)))
+        los.append(lo)
+        his.append(hi)
+    diff = np.zeros((len(teams), span + 1), dtype=np.int32)
+    if team_idx:
+        t = np.asarray(team_idx)
+        lo = np.clip(np.asarray(los, dtype=np.int64) - base, 0, span)
+        hi = np.clip(np.asarray(his, dtype=np.int64) - base + 1, 0, span)
+        keep = hi > lo
+        np.add.at(diff, (t[keep], lo[keep]), 1)
+        np.add.at(diff, (t[keep], hi[keep]), -1)
+    return list(teams), np.cumsum(diff[:, :span], axis=1, dtype=np.int32)
+
+
+def encode(teams: List[str], counts: np.ndarray, store_id: int, revision: int, base: int) -> bytearray:
+    """The snapshot file's bytes for `counts` (one row per team, in `teams` order)."""
+    n, span = counts.shape
+    names = "\n".join(teams).encode("utf-8")
+    teams_off = _align(HEADER.size)
+    counts_off = _align(teams_off + len(names))
+    prefix_off = _align(counts_off + (n + 1) * span * 4)
+    buf = bytearray(prefix_off + (n + 1) * (span + 1) * 8)
+    HEADER.pack_into(buf, 0, MAGIC, VERSION, n, store_id, revision, base, span, teams_off, len(names),
+                     counts_off, prefix_off)
+    buf[teams_off:teams_off + len(names)] = names
+    c = np.frombuffer(buf, np.int32, (n + 1) * span, counts_off).reshape(n + 1, span)
+    c[:n] = counts
+    p = np.frombuffer(buf, np.int64, (n + 1) * (span + 1), prefix_off).reshape(n + 1, span + 1)
+    np.cumsum(c, axis=1, dtype=np.int64, out=p[:, 1:])
+    return buf
+
+
+def write_atomic(path: str, data: bytes):
+    """Write to a temp file next to `path`, then rename over it: readers see the old or the new file, never a mix."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class OccupancySnapshot:
+    """
+    Read-only view of one snapshot; same occupancy queries as AbsenceIndex.
+    Lookups inside the window return views into the buffer and copy nothing.
+    """
+
+    def __init__(self, buf):
+        magic, version, n, store_id, revision, base, span, teams_off, teams_len, counts_off, prefix_off = \
+            HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} occupancy snapshot")
+        self.store_id, self.revision, self.base, self.span = store_id, revision, base, span
+        names = bytes(buf[teams_off:teams_off + teams_len]).decode("utf-8")
+        self._rows = {team: i for i, team in enumerate(names.split("\n"))} if n else {}
+        self._empty = n  # the all-zero row, for teams nobody is out in
+        self._counts = np.frombuffer(buf, np.int32, (n + 1) * span, counts_off).reshape(n + 1, span)
+        self._prefix = np.frombuffer(buf, np.int64, (n + 1) * (span + 1), prefix_off).reshape(n + 1, span + 1)
+
+    @classmethod
+    def open(cls, path: str) -> "OccupancySnapshot":
+        with open(path, "rb") as f:
+            snap = cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))  # the map outlives the descriptor
+            st = os.fstat(f.fileno())
+        snap.file_id = (st.st_dev, st.st_ino)
+        return snap
+
+    def teams(self) -> List[str]:
+        return list(self._rows)
+
+    def out_days(self, team: str, start: date, end: date) -> int:
+        """Person-days out for the team in [start, end]."""
+        p = self._prefix[self._rows.get(team, self._empty)]
+        lo = min(max(start.toordinal() - self.base, 0), self.span)
+        hi = min(max(end.toordinal() - self.base + 1, 0), self.span)
+        return int(p[hi] - p[lo]) if hi > lo else 0
+
+    def occupancy(self, team: str, start: date, days: int) -> np.ndarray:
+        """Per-day counts for [start, start + days); a read-only view when fully inside the window."""
+        arr = self._counts[self._rows.get(team, self._empty)]
+        lo = start.toordinal() - self.base
+        if lo >= 0 and lo + days <= self.span:
+            return arr[lo:lo + days]
+        out = np.zeros(days, dtype=np.int32)
+        a, b = max(lo, 0), min(lo + days, self.span)
+        if b > a:
+            out[a - lo:b - lo] = arr[a:b]
+        return out
+
+
+def _window_start() -> date:
+    return date.today() - timedelta(days=366)
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SnapshotReader:
+    """
+    The newest snapshot at `path` for this process. current() costs one stat() and
+    maps a new file only after it was rotated; refresh() rebuilds it at most once per
+    store revision (and day) across all processes sharing the path, and
+    refresh_in_background() does so without making the caller wait.
+    """
+
+    def __init__(self, path: str = SNAPSHOT_PATH, span_days: int = SPAN_DAYS):
+        self.path = path
+        self.span_days = span_days
+        self._snap: Optional[OccupancySnapshot] = None
+        self._lock = threading.Lock()
+        self._builder: Optional[threading.Thread] = None
+        self._builder_lock = threading.Lock()
+
+    def current(self) -> Optional[OccupancySnapshot]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return self._snap
+        snap = self._snap
+        if snap is None or getattr(snap, "file_id", None) != (st.st_dev, st.st_ino):
+            try:
+                snap = self._snap = OccupancySnapshot.open(self.path)
+            except (OSError, ValueError) as e:
+                log.warning("cannot map occupancy snapshot %s: %s", self.path, e)
+        return snap
+
+    def usable(self, snap: Optional[OccupancySnapshot], store_id: int) -> bool:
+        """Whether `snap` was built from this store with today's window, at any revision."""
+        return (snap is not None and snap.store_id == store_id
+                and snap.base == _window_start().toordinal() and snap.span == self.span_days)
+
+    def up_to_date(self, snap: Optional[OccupancySnapshot], store_id: int, revision: int) -> bool:
+        """Whether `snap` was built from this store at `revision`, with today's window."""
+        return self.usable(snap, store_id) and snap.revision == revision
+
+    def refresh_in_background(self, store_id: int, revision: Callable[[], int],
+                              rows: Callable[[date, date], Iterable[Row]]) -> bool:
+        """
+        Run refresh() on a daemon thread, unless one is already running in this process;
+        readers keep the current snapshot meanwhile. Returns whether a thread was started.
+        """
+        def build():
+            try:
+                self.refresh(store_id, revision, rows)
+            except Exception:
+                log.exception("occupancy snapshot rebuild failed")
+
+        with self._builder_lock:
+            if self._builder is not None and self._builder.is_alive():
+                return False
+            self._builder = threading.Thread(target=build, name="snapshot-refresh", daemon=True)
+            self._builder.start()
+            return True
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wait for a background refresh started by this reader to finish."""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+
+    def refresh(self, store_id: int, revision: Callable[[], int],
+                rows: Callable[[date, date], Iterable[Row]]) -> OccupancySnapshot:
+        """
+        Snapshot of the store `store_id` (Store.store_id()) at its current revision,
+        rebuilding it from `rows` (e.g. Store.requests_between) unless another process
+        already has.
+        """
+        with self._lock, _file_lock(self.path + ".lock"):
+            rev = revision()  # read before the rows: a write racing the build only causes another rebuild
+            snap = self.current()
+            if self.up_to_date(snap, store_id, rev):
+                return snap
+            start = _window_start()
+            base = start.toordinal()
+            teams, counts = build_counts(rows(start, date.fromordinal(base + self.span_days - 1)),
+                                         base, self.span_days)
+            buf = encode(teams, counts, store_id, rev, base)
+            try:
+                write_atomic(self.path, buf)
+            except OSError as e:  # e.g. Windows refuses to replace a mapped file: keep a private copy
+                log.warning("cannot rotate occupancy snapshot %s: %s", self.path, e)
+                snap = self._snap = OccupancySnapshot(buf)
+                if os.path.exists(self.path):
+                    st = os.stat(self.path)
+                    snap.file_id = (st.st_dev, st.st_ino)  # current() keeps it until the file is rotated
+                return snap
+            return self.current()
+
+
+if __name__ == "__main__":
+    from backend.store import Store
+
+    ap = argparse.ArgumentParser(description="Build the shared occupancy snapshot from the store.")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--out", default=SNAPSHOT_PATH)
+    ap.add_argument("--watch", type=float, metavar="SECONDS",
+                    help="keep running, rebuilding whenever the store revision or the day changes")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    store, reader = Store(args.db), SnapshotReader(args.out)
+    while True:
+        t0 = time.perf_counter()
+        before = reader.current()
+        snap = reader.refresh(store.store_id(), store.revision, store.requests_between)
+        if snap is not before:
+            log.info("snapshot r%d: %d teams x %d days in %.1f ms -> %s", snap.revision, len(snap.teams()),
+                     snap.span, (time.perf_counter() - t0) * 1000, args.out)
+        if not args.watch:
+            break
+        time.sleep(args.watch)
@@ -0,0 +1,265 @@
+# backend/store.py
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from backend.models import Employee, PTORequest
+
+DB_PATH = os.environ.get("SMARTPTO_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "smartpto.db"))
+POOL_SIZE = int(os.environ.get("SMARTPTO_DB_POOL", "8"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    team TEXT NOT NULL,
+    manager_id TEXT,
+    accrual_days REAL NOT NULL,
+    accrual_per_month REAL
+);
+CREATE INDEX IF NOT EXISTS ix_employees_team ON employees(team);
+
+CREATE TABLE IF NOT EXISTS pto_requests (
+    employee_id TEXT NOT NULL,
+    team TEXT NOT NULL,
+    start_date INTEGER NOT NULL,  -- date ordinal
+    end_date INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    note TEXT,
+    PRIMARY KEY (employee_id, start_date, end_date)
+);
+CREATE INDEX IF NOT EXISTS ix_pto_team_date ON pto_requests(team, start_date);
+CREATE INDEX IF NOT EXISTS ix_pto_employee_status ON pto_requests(employee_id, status);
+CREATE INDEX IF NOT EXISTS ix_pto_status_end ON pto_requests(status, end_date);  -- requests_between
+
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('store_id', random());  -- tells databases apart, e.g. after a reseed
+"""
+
+# columns added after the first release; applied to older database files on open
+MIGRATIONS = [
+    "ALTER TABLE employees ADD COLUMN accrual_per_month REAL",
+]
+
+# statements are kept as constants so sqlite's per-connection statement cache reuses them
+_UPSERT_EMPLOYEE = (
+    "INSERT INTO employees (id, name, team, manager_id, accrual_days, accrual_per_month) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET name=excluded.name, team=excluded.team, "
+    "manager_id=excluded.manager_id, accrual_days=excluded.accrual_days, "
+    "accrual_per_month=excluded.accrual_per_month"
+)
+_UPSERT_REQUEST = (
+    "INSERT INTO pto_requests (employee_id, team, start_date, end_date, status, note) "
+    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(employee_id, start_date, end_date) "
+    "DO UPDATE SET team=excluded.team, status=excluded.status, note=excluded.note"
+)
+_INSERT_REQUEST = (
+    "INSERT INTO pto_requests (employee_id, team, start_date, end_date, status, note) "
+    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(employee_id, start_date, end_date) DO NOTHING"
+)
+_BUMP_REVISION = "UPDATE meta SET value = value + 1 WHERE key = 'revision'"
+_GET_REVISION = "SELECT value FROM meta WHERE key = 'revision'"
+_MOVE_REQUESTS = "UPDATE pto_requests SET team = ? WHERE employee_id = ? AND team != ?"
+_GET_STORE_ID = "SELECT value FROM meta WHERE key = 'store_id'"
+_GET_EMPLOYEE = "SELECT id, name, team, manager_id, accrual_days, accrual_per_month FROM employees WHERE id = ?"
+_LIST_EMPLOYEES = "SELECT id, name, team, manager_id, accrual_days, accrual_per_month FROM employees ORDER BY id"
+_TEAM_EMPLOYEES = "SELECT id, name, team, manager_id, accrual_days, accrual_per_month FROM employees WHERE team = ? ORDER BY id"
+_TEAM_SIZE = "SELECT COUNT(*) FROM employees WHERE team = ?"
+_TEAM_RANGE = (
+    "SELECT employee_id, start_date, end_date, status, note FROM pto_requests "
+    "WHERE team = ? AND start_date <= ? AND end_date >= ? AND status = ?"
+)
+_ALL_RANGE = (
+    "SELECT employee_id, team, start_date, end_date FROM pto_requests "
+    "WHERE start_date <= ? AND end_date >= ? AND status = ?"
+)
+_EMPLOYEE_REQUESTS = (
+    "SELECT employee_id, start_date, end_date, status, note FROM pto_requests "
+    "WHERE employee_id = ? AND status = ? ORDER BY start_date"
+)
+
+
+def _employee(row) -> Employee:
+    return Employee(id=row[0], name=row[1], team=row[2], manager_id=row[3], accrual_days=row[4],
+                    accrual_per_month=row[5])
+
+
+def _request(row) -> PTORequest:
+    return PTORequest(
+        employee_id=row[0],
+        start_date=date.fromordinal(row[1]),
+        end_date=date.fromordinal(row[2]),
+        status=row[3],
+        note=row[4],
+    )
+
+
+class Store:
+    """SQLite (WAL) store for employees and PTO requests, shared by every worker process."""
+
+    def __init__(self, path: str = DB_PATH, pool_size: int = POOL_SIZE):
+        self.path = path
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._pool_size = pool_size
+        self._lock = threading.Lock()
+        with self._conn() as con:
+            for stmt in MIGRATIONS:
+                try:
+                    con.execute(stmt)
+                except sqlite3.OperationalError:
+                    pass  # fresh database (table missing) or column already there
+            con.executescript(SCHEMA)
+            self._store_id = con.execute(_GET_STORE_ID).fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute("PRAGMA busy_timeout=5000")
+        return con
+
+    @contextmanager
+    def _conn(self) -> Iterator[sqlite3.Connection]:
+        try:
+            con = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._created < self._pool_size
+                if grow:
+                    self._created += 1
+            con = self._connect() if grow else self._pool.get()
+        try:
+            yield con
+        finally:
+            self._pool.put(con)
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        with self._conn() as con:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+
+    # ---------- bulk loaders ----------
+    def load_employees(self, employees: Iterable[Union[Employee, dict]]) -> int:
+        rows = []
+        for e in employees:
+            e = e if isinstance(e, Employee) else Employee(**e)
+            rows.append((e.id, e.name, e.team, e.manager_id, e.accrual_days, e.accrual_per_month))
+        with self._tx() as con:
+            con.executemany(_UPSERT_EMPLOYEE, rows)
+            con.executemany(_MOVE_REQUESTS, ((r[2], r[0], r[2]) for r in rows))  # requests follow a team change
+            con.execute(_BUMP_REVISION)
+        return len(rows)
+
+    def load_requests(self, requests: Iterable[PTORequest]) -> int:
+        rows = []
+        teams = {}
+        with self._conn() as con:
+            for r in requests:
+                if r.employee_id not in teams:
+                    row = con.execute(_GET_EMPLOYEE, (r.employee_id,)).fetchone()
+                    teams[r.employee_id] = row[2] if row else None
+                team = teams[r.employee_id]
+                if team is None:
+                    continue
+                rows.append((r.employee_id, team, r.start_date.toordinal(),
+                             r.end_date.toordinal(), r.status, r.note))
+        with self._tx() as con:
+            con.executemany(_UPSERT_REQUEST, rows)
+            con.execute(_BUMP_REVISION)
+        return len(rows)
+
+    def add_requests(self, requests: Iterable[PTORequest]) -> int:
+        """Insert requests that do not exist yet; existing ones (any status) are left alone."""
+        rows = []
+        with self._conn() as con:
+            teams = {}
+            for r in requests:
+                if r.employee_id not in teams:
+                    row = con.execute(_GET_EMPLOYEE, (r.employee_id,)).fetchone()
+                    teams[r.employee_id] = row[2] if row else None
+                if teams[r.employee_id] is not None:
+                    rows.append((r.employee_id, teams[r.employee_id], r.start_date.toordinal(),
+                                 r.end_date.toordinal(), r.status, r.note))
+        if not rows:
+            return 0
+        with self._tx() as con:
+            before = con.total_changes
+            con.executemany(_INSERT_REQUEST, rows)
+            added = con.total_changes - before
+            if added:
+                con.execute(_BUMP_REVISION)
+        return added
+
+    def seed_if_empty(self, employees: Iterable[dict], requests: Iterable[PTORequest] = ()):
+        with self._conn() as con:
+            empty = con.execute("SELECT 1 FROM employees LIMIT 1").fetchone() is None
+        if empty:
+            self.load_employees(employees)
+            self.load_requests(requests)
+
+    # ---------- lookups ----------
+    def revision(self) -> int:
+        with self._conn() as con:
+            return con.execute(_GET_REVISION).fetchone()[0]
+
+    def store_id(self) -> int:
+        """Random id fixed when the database file was created; revisions only count within one file."""
+        return self._store_id
+
+    def get_employee(self, employee_id: str) -> Optional[Employee]:
+        with self._conn() as con:
+            row = con.execute(_GET_EMPLOYEE, (employee_id,)).fetchone()
+        return _employee(row) if row else None
+
+    def list_employees(self, team: Optional[str] = None) -> List[Employee]:
+        with self._conn() as con:
+            if team is None:
+                rows = con.execute(_LIST_EMPLOYEES).fetchall()
+            else:
+                rows = con.execute(_TEAM_EMPLOYEES, (team,)).fetchall()
+        return [_employee(r) for r in rows]
+
+    def team_size(self, team: str) -> int:
+        with self._conn() as con:
+            return con.execute(_TEAM_SIZE, (team,)).fetchone()[0]
+
+    def team_requests(self, team: str, start: date, end: date, status: str = "approved") -> List[PTORequest]:
+        """Requests of the team overlapping [start, end]; a range scan on (team, start_date)."""
+        with self._conn() as con:
+            rows = con.execute(_TEAM_RANGE, (team, end.toordinal(), start.toordinal(), status)).fetchall()
+        return [_request(r) for r in rows]
+
+    def employee_requests(self, employee_id: str, status: str = "approved") -> List[PTORequest]:
+        with self._conn() as con:
+            rows = con.execute(_EMPLOYEE_REQUESTS, (employee_id, status)).fetchall()
+        return [_request(r) for r in rows]
+
+    def requests_between(self, start: date, end: date, status: str = "approved"):
+        """(employee_id, team, start_ordinal, end_ordinal) for requests with `status` overlapping the range."""
+        with self._conn() as con:
+            return con.execute(_ALL_RANGE, (end.toordinal(), start.toordinal(), status)).fetchall()
+
+    # ---------- writes ----------
+    def upsert_request(self, req: PTORequest) -> Tuple[Optional[str], int]:
+        """Store the request; returns (employee's team or None if unknown, new revision)."""
+        emp = self.get_employee(req.employee_id)
+        if emp is None:
+            return None, self.revision()
+        with self._tx() as con:
+            con.execute(_UPSERT_REQUEST, (req.employee_id, emp.team, req.start_date.toordinal(),
+                                          req.end_date.toordinal(), req.status, req.note))
+            con.execute(_BUMP_REVISION)
+            rev = con.execute(_GET_REVISION).fetchone()[0]
+        return emp.team, rev
@@ -0,0 +1,187 @@
+# backend/workdays.py
+import heapq
+import os
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+DEFAULT_REGION = os.environ.get("SMARTPTO_REGION", "US")
+
+# ("fixed", month, day) is moved to Fri/Mon when it falls on a weekend (US observance);
+# ("substitute", month, day) falls on the next weekday not already a holiday when it is
+# on a weekend (UK substitute days: Christmas on a Saturday gives Mon + Tue off);
+# ("nth", month, weekday, n) is the n-th weekday of the month, n = -1 for the last one;
+# ("easter", days) is that many days from Easter Sunday.
+HOLIDAY_RULES: Dict[str, List[tuple]] = {
+    "US": [
+        ("fixed", 1, 1),      # New Year's Day
+        ("nth", 1, 0, 3),     # Martin Luther King Jr. Day
+        ("nth", 2, 0, 3),     # Presidents' Day
+        ("nth", 5, 0, -1),    # Memorial Day
+        ("fixed", 6, 19),     # Juneteenth
+        ("fixed", 7, 4),      # Independence Day
+        ("nth", 9, 0, 1),     # Labor Day
+        ("nth", 10, 0, 2),    # Columbus Day
+        ("fixed", 11, 11),    # Veterans Day
+        ("nth", 11, 3, 4),    # Thanksgiving
+        ("fixed", 12, 25),    # Christmas Day
+    ],
+    "UK": [
+        ("substitute", 1, 1),
+        ("easter", -2),       # Good Friday
+        ("easter", 1),        # Easter Monday
+        ("nth", 5, 0, 1),     # Early May bank holiday
+        ("nth", 5, 0, -1),    # Spring bank holiday
+        ("nth", 8, 0, -1),    # Summer bank holiday
+        ("substitute", 12, 25),
+        ("substitute", 12, 26),
+    ],
+    "NONE": [],
+}
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Easter Sunday (Gregorian; anonymous computus)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def holidays(region: str, year: int) -> List[date]:
+    out = []
+    substitutes = []
+    for rule in HOLIDAY_RULES.get(region, []):
+        if rule[0] == "fixed":
+            d = date(year, rule[1], rule[2])
+            if d.weekday() == 5:
+                d -= timedelta(days=1)
+            elif d.weekday() == 6:
+                d += timedelta(days=1)
+        elif rule[0] == "substitute":
+            substitutes.append(date(year, rule[1], rule[2]))
+            continue
+        elif rule[0] == "easter":
+            d = _easter(year) + timedelta(days=rule[1])
+        else:
+            d = _nth_weekday(year, rule[1], rule[2], rule[3])
+        out.append(d)
+    taken = set(out)
+    for d in substitutes:  # in rule order, so Boxing Day moves past a substituted Christmas
+        while d.weekday() >= 5 or d in taken:
+            d += timedelta(days=1)
+        taken.add(d)
+        out.append(d)
+    return sorted(out)
+
+
+def _weekdays(lo: int, hi: int) -> int:
+    """Mon-Fri days among the ordinals [lo, hi); ordinal 1 (0001-01-01) is a Monday."""
+    def upto(n: int) -> int:
+        return 5 * (n // 7) + min(n % 7, 5)
+    return upto(hi - 1) - upto(lo - 1) if hi > lo else 0
+
+
+class BusinessCalendar:
+    """
+    Working-day flags and their prefix sums for a region over [start, start + days).
+    pto_cost() is O(1); outside the range only Mon-Fri count, without holidays.
+    """
+
+    def __init__(self, region: str, start: date, days: int):
+        self.region = region
+        self.start = start
+        self.base = start.toordinal()
+        self.days = days
+        ords = np.arange(self.base, self.base + days)
+        work = ((ords - 1) % 7 < 5).astype(np.uint8)  # ordinal 1 (0001-01-01) is a Monday
+        for year in range(start.year, (start + timedelta(days=days)).year + 1):
+            for h in holidays(region, year):
+                i = h.toordinal() - self.base
+                if 0 <= i < days:
+                    work[i] = 0
+        self.work = work
+        self.prefix = np.concatenate(([0], np.cumsum(work, dtype=np.int32)))
+
+    def _offset(self, d: date) -> int:
+        return d.toordinal() - self.base
+
+    def pto_cost(self, start: date, end: date) -> int:
+        """Working days (= PTO days spent) in [start, end]."""
+        lo, hi = self._offset(start), self._offset(end) + 1
+        if hi <= lo:
+            return 0
+        inside_lo, inside_hi = max(lo, 0), min(hi, self.days)
+        if inside_hi <= inside_lo:
+            return _weekdays(self.base + lo, self.base + hi)
+        return (int(self.prefix[inside_hi] - self.prefix[inside_lo])
+                + _weekdays(self.base + lo, self.base + inside_lo) + _weekdays(self.base + inside_hi, self.base + hi))
+
+    def work_flags(self, first: date, n: int) -> np.ndarray:
+        """1 for each working day in [first, first + n); days outside the range use Mon-Fri."""
+        lo = self._offset(first)
+        if 0 <= lo and lo + n <= self.days:
+            return self.work[lo:lo + n]
+        ords = np.arange(first.toordinal(), first.toordinal() + n)
+        flags = ((ords - 1) % 7 < 5).astype(np.uint8)
+        a, b = max(lo, 0), min(lo + n, self.days)
+        if b > a:
+            flags[a - lo:b - lo] = self.work[a:b]
+        return flags
+
+    def window_costs(self, first: date, n: int, length: int) -> np.ndarray:
+        """PTO cost of the windows starting on each of n consecutive days from `first`."""
+        lo = self._offset(first)
+        if lo < 0 or lo + n + length - 1 > self.days:
+            return np.array([self.pto_cost(first + timedelta(days=i), first + timedelta(days=i + length - 1))
+                             for i in range(n)], dtype=np.int32)
+        return self.prefix[lo + length:lo + length + n] - self.prefix[lo:lo + n]
+
+    def bridges(self, first: date, horizon_days: int, max_pto_days: int,
+                max_span_days: int = 16, top_k: int = 5) -> List[Tuple[date, date, int, int]]:
+        """
+        Windows in the horizon that give the most days off per PTO day spent, as
+        (start, end, days_off, pto_days). Only maximal windows count: the days just
+        before and after are working days, so weekends/holidays next to them are included.
+        """
+        lo = self._offset(first)
+        hi = min(lo + horizon_days, self.days - 1)
+        if lo < 1 or hi - lo < 1:
+            return []
+        work = self.work
+        cands = []
+        for span in range(1, max_span_days + 1):
+            starts = np.arange(lo, hi - span + 1)
+            if len(starts) == 0:
+                break
+            cost = self.prefix[starts + span] - self.prefix[starts]
+            ok = (cost > 0) & (cost <= max_pto_days) & (work[starts - 1] == 1) & (work[starts + span] == 1)
+            for s, c in zip(starts[ok].tolist(), cost[ok].tolist()):
+                cands.append((-span / c, -span, s, c))
+        out = []
+        for _, neg_span, s, c in heapq.nsmallest(top_k, cands):
+            start = date.fromordinal(self.base + s)
+            out.append((start, start + timedelta(days=-neg_span - 1), -neg_span, c))
+        return out
+
+
+@lru_cache(maxsize=32)
+def get_calendar(region: str, year: int) -> BusinessCalendar:
+    """Calendar for `year` and the following one, built once per (region, year)."""
+    start = date(year, 1, 1)
+    return BusinessCalendar(region, start, (date(year + 2, 1, 1) - start).days)
@@ -0,0 +1,63 @@
+# bench/bench_extract.py
+"""
+Compare the single-pass date extractor with the old one-pass-per-pattern loop.
+The legacy timing covers matching only; it used to add a dateutil parse per string.
+
+    python -m bench.bench_extract --bodies 5000
+"""
+import argparse
+import json
+import random
+import re
+import time
+from datetime import datetime
+
+from backend.date_extract import DATE_PATTERNS, extract_spans
+
+PHRASES = [
+    "We are going to Japan from Dec 20 to Dec 27.",
+    "I'll be out next Friday, back on Monday.",
+    "Flight departs 04/12/2026 at 7am.",
+    "Let's regroup in 14 days.",
+    "The offsite is on Sep 22 in the main office.",
+    "Trip to Lisbon booked!",
+]
+FILLER = ("Please find the quarterly numbers attached. Let me know if anything looks off. "
+          "Thanks for the quick turnaround on the review last week. ")
+
+
+def corpus(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    bodies = []
+    for _ in range(n):
+        parts = [FILLER * rnd.randint(1, 8)]
+        parts += rnd.sample(PHRASES, rnd.randint(0, 3))
+        rnd.shuffle(parts)
+        bodies.append(" ".join(parts))
+    return bodies
+
+
+def legacy_extract(text: str):
+    found = []
+    for pat in DATE_PATTERNS:
+        for m in re.finditer(pat, text, flags=re.IGNORECASE):
+            found.append(m.group(0))
+    return list(dict.fromkeys(found))
+
+
+def run(bodies):
+    ref = datetime(2026, 1, 1)
+    out = {}
+    for name, fn in (("legacy_per_pattern", legacy_extract),
+                     ("single_pass", lambda t: extract_spans(t, ref))):
+        t0 = time.perf_counter()
+        hits = sum(len(fn(b)) for b in bodies)
+        out[name] = {"seconds": round(time.perf_counter() - t0, 4), "spans": hits}
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bodies", type=int, default=5000)
+    args = ap.parse_args()
+    print(json.dumps({"bodies": args.bodies, **run(corpus(args.bodies))}, indent=2))
@@ -0,0 +1,59 @@
+# bench/bench_team_scan.py
+"""
+Throughput of multi-mailbox scans against fake mailboxes with per-call latency, for
+a range of worker counts. Messages/s should grow with workers until the quota
+(--project-units units/s shared by all mailboxes) becomes the ceiling.
+
+    python -m bench.bench_team_scan --mailboxes 16 --messages 40 --project-units 4000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from bench.synth import make_mailbox
+from backend.fakes import FakeGmailService
+from backend.gmail_cache import MessageCache
+from backend.mailbox_scan import QUOTA_UNITS, QuotaLimiter, iter_team_scan
+
+
+def run(mailboxes: int, messages: int, latency: float, user_units: float, project_units: float,
+        worker_counts, fetches: int):
+    os.environ.pop("GEMINI_API_KEY", None)
+    tmp = tempfile.mkdtemp(prefix="smartpto-team-scan-")
+    boxes = {f"e{i:04d}": make_mailbox(messages, seed=i) for i in range(mailboxes)}
+    out = []
+    for workers in worker_counts:
+        services = {e: FakeGmailService(msgs, latency=latency, email=f"{e}@example.com") for e, msgs in boxes.items()}
+        factories = {e: (lambda s=s: s) for e, s in services.items()}
+        limiter = QuotaLimiter(user_rate=user_units, project_rate=project_units)
+        cache = MessageCache(os.path.join(tmp, f"cache-{workers}.db"))  # cold for every worker count
+        t0 = time.perf_counter()
+        for _ in iter_team_scan(factories, max_results=messages, workers=workers, fetches_per_mailbox=fetches,
+                                limiter=limiter, cache=cache):
+            pass
+        secs = time.perf_counter() - t0
+        units = sum(n * QUOTA_UNITS["users." + name] for s in services.values() for name, n in s.calls.items())
+        out.append({
+            "workers": workers,
+            "seconds": round(secs, 3),
+            "messages_per_s": round(mailboxes * messages / secs, 1),
+            "quota_units_per_s": round(units / secs, 1),
+        })
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mailboxes", type=int, default=16)
+    ap.add_argument("--messages", type=int, default=40)
+    ap.add_argument("--latency", type=float, default=0.02, help="seconds per fake API call")
+    ap.add_argument("--user-units", type=float, default=250)
+    ap.add_argument("--project-units", type=float, default=4000)
+    ap.add_argument("--fetches", type=int, default=4, help="fetch threads per mailbox")
+    ap.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4, 8, 16])
+    args = ap.parse_args()
+    print(json.dumps({"params": vars(args),
+                      "runs": run(args.mailboxes, args.messages, args.latency, args.user_units,
+                                  args.project_units, args.workers, args.fetches)}, indent=2))
@@ -0,0 +1,98 @@
+# bench/bench_workers.py
+"""
+Memory held for team occupancy by N concurrent worker processes: each building its
+own AbsenceIndex ("index") versus all mapping one shared snapshot ("snapshot").
+Reports the workers' summed private and proportional (PSS) memory growth after
+loading; with the snapshot the total should stay flat as workers are added.
+Reads /proc/self/smaps_rollup, so Linux only.
+
+    python -m bench.bench_workers --employees 20000 --workers 1 2 4 8
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import tempfile
+from datetime import date
+
+import numpy as np
+
+
+def _mem_kb() -> dict:
+    out = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                out[parts[0].rstrip(":")] = int(parts[1])
+    return {"private": out["Private_Clean"] + out["Private_Dirty"], "pss": out["Pss"]}
+
+
+def _worker(mode: str, db: str, snapshot: str, loaded, done, results):
+    from backend.absence import AbsenceIndex
+    from backend.snapshot import SnapshotReader
+    from backend.store import Store
+
+    store = Store(db)
+    before = _mem_kb()
+    if mode == "index":
+        idx = AbsenceIndex()
+        occ = AbsenceIndex.from_rows(store.requests_between(date.fromordinal(idx.base),
+                                                            date.fromordinal(idx.base + idx.span - 1)))
+        teams = list(occ._counts)
+    else:
+        occ = SnapshotReader(snapshot).current()
+        teams = occ.teams()
+    today = date.today()
+    total = sum(int(occ.occupancy(t, today, 365).sum()) + occ.out_days(t, today, today) for t in teams)
+    loaded.wait()  # every worker holds its data before anyone measures
+    after = _mem_kb()
+    results.put({"private": after["private"] - before["private"], "pss": after["pss"] - before["pss"],
+                 "checksum": total})
+    done.wait()
+
+
+def run(employees: int, worker_counts, seed: int):
+    tmp = tempfile.mkdtemp(prefix="smartpto-workers-")
+    db, snapshot = os.path.join(tmp, "bench.db"), os.path.join(tmp, "bench.occupancy")
+    from bench.synth import make_org
+    from backend.snapshot import SnapshotReader
+    from backend.store import Store
+
+    org, requests = make_org(employees, seed=seed)
+    store = Store(db)
+    store.load_employees(org)
+    store.load_requests(requests)
+    snap = SnapshotReader(snapshot).refresh(store.store_id(), store.revision, store.requests_between)
+
+    ctx = mp.get_context("spawn")
+    out = []
+    for mode in ("index", "snapshot"):
+        for n in worker_counts:
+            loaded, done, results = ctx.Barrier(n), ctx.Barrier(n + 1), ctx.Queue()
+            procs = [ctx.Process(target=_worker, args=(mode, db, snapshot, loaded, done, results)) for _ in range(n)]
+            for p in procs:
+                p.start()
+            rows = [results.get() for _ in procs]
+            done.wait()
+            for p in procs:
+                p.join()
+            assert len({r["checksum"] for r in rows}) == 1
+            out.append({
+                "mode": mode,
+                "workers": n,
+                "private_kb": sum(r["private"] for r in rows),
+                "pss_kb": sum(r["pss"] for r in rows),
+                "private_kb_per_worker": round(float(np.mean([r["private"] for r in rows])), 1),
+            })
+    return {"employees": employees, "teams": len(snap.teams()), "snapshot_kb": os.path.getsize(snapshot) // 1024,
+            "results": out}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--employees", type=int, default=20000)
+    ap.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4, 8])
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    print(json.dumps(run(args.employees, args.workers, args.seed), indent=2))
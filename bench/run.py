@@ -0,0 +1,221 @@
+# bench/run.py
+"""
+Benchmark suite over synthetic data (bench/synth.py). Every case runs against a
+throwaway SQLite store and a fake Gmail mailbox, so no credentials or network are needed.
+
+    python -m bench.run --employees 5000 --messages 2000 --out bench_output.json
+    python -m bench.run --baseline bench_output.json     # flag cases that got slower
+
+Timings are in milliseconds (min / median / p95 over --repeat runs).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from typing import Any, Callable, Dict, List
+
+CASES = ["import_app", "suggest_windows", "api_recommend", "api_balance", "extract_dates", "mime_walk",
+         "mime_walk_heavy", "scan_fallback"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# run in a fresh interpreter: prints the import time of backend.app and the Google client modules it loaded
+IMPORT_APP = (
+    "import json, sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "import backend.app\n"
+    "ms = (time.perf_counter() - t0) * 1000\n"
+    "google = sorted(m for m in sys.modules if m.startswith(('google.', 'googleapiclient', 'google_auth')))\n"
+    "print(json.dumps({'ms': ms, 'google_modules': len(google)}))\n"
+)
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return {
+        "min_ms": round(times[0], 3),
+        "median_ms": round(statistics.median(times), 3),
+        "p95_ms": round(times[min(len(times) - 1, int(0.95 * len(times)))], 3),
+        "runs": repeat,
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _peak_kb(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def _import_app(repeat: int) -> Dict[str, Any]:
+    """Cold `import backend.app` timings, one fresh interpreter per run."""
+    samples = [json.loads(subprocess.check_output([sys.executable, "-W", "ignore", "-c", IMPORT_APP],
+                                          text=True, cwd=ROOT))
+               for _ in range(repeat)]
+    times = sorted(s["ms"] for s in samples)
+    return {
+        "min_ms": round(times[0], 3),
+        "median_ms": round(statistics.median(times), 3),
+        "p95_ms": round(times[min(len(times) - 1, int(0.95 * len(times)))], 3),
+        "runs": repeat,
+        "google_modules": samples[-1]["google_modules"],  # should stay 0: clients load on first use
+    }
+
+
+def run(employees: int, messages: int, repeat: int, seed: int, only: List[str]) -> Dict[str, Any]:
+    tmp = tempfile.mkdtemp(prefix="smartpto-bench-")
+    # the store and caches read their paths at import time
+    os.environ["SMARTPTO_DB"] = os.path.join(tmp, "bench.db")
+    os.environ["GMAIL_CACHE_DB"] = os.path.join(tmp, "gmail_cache.db")
+    os.environ.pop("GEMINI_API_KEY", None)  # the scan case measures the rule-based fallback
+
+    from bench.synth import make_heavy_mailbox, make_mailbox, make_org
+    from backend.store import Store
+
+    today = date.today()
+    org, requests = make_org(employees, seed=seed, today=today)
+    mailbox = make_mailbox(messages, seed=seed)
+    store = Store()
+    store.load_employees(org)
+    store.load_requests(requests)
+
+    results: Dict[str, Any] = {}
+    if "import_app" in only:
+        results["import_app"] = _import_app(repeat)  # before this process imports anything heavy
+    by_team: Dict[str, List[str]] = {}
+    for e in org:
+        by_team.setdefault(e["team"], []).append(e["id"])
+    sample_ids = [org[i]["id"] for i in range(0, len(org), max(1, len(org) // 50))]
+
+    if "suggest_windows" in only:
+        from backend.recommender import suggest_windows
+        team = max(by_team, key=lambda t: len(by_team[t]))
+        members = set(by_team[team])
+        out_dates = [date.fromordinal(o) for r in requests if r.employee_id in members and r.status == "approved"
+                     for o in range(r.start_date.toordinal(), r.end_date.toordinal() + 1)]
+        results["suggest_windows"] = _timed(
+            lambda: suggest_windows(today, 365, 5, len(members), out_dates, 0.3), repeat)
+
+    if "api_recommend" in only or "api_balance" in only:
+        from fastapi.testclient import TestClient
+        from backend.app import app
+        client = TestClient(app)
+        client.get("/recommend", params={"employee_id": sample_ids[0]})  # build the absence index once
+        if "api_recommend" in only:
+            results["api_recommend"] = _timed(
+                lambda: [client.get("/recommend", params={"employee_id": e, "horizon_days": 90})
+                         for e in sample_ids], repeat)
+            results["api_recommend"]["requests_per_run"] = len(sample_ids)
+        if "api_balance" in only:
+            results["api_balance"] = _timed(
+                lambda: [client.get("/balance", params={"employee_id": e}) for e in sample_ids], repeat)
+            results["api_balance"]["requests_per_run"] = len(sample_ids)
+
+    if {"extract_dates", "mime_walk", "mime_walk_heavy", "scan_fallback"} & set(only):
+        from backend.fakes import FakeGmailService
+        from backend.gmail_cache import MessageCache
+        from backend import gmail_reader
+        service = FakeGmailService(mailbox)
+        ids = [m["id"] for m in mailbox]
+
+        if "mime_walk" in only:
+            results["mime_walk"] = _timed(lambda: [gmail_reader._get_full_message(service, i) for i in ids], repeat)
+
+        if "mime_walk_heavy" in only:
+            heavy = make_heavy_mailbox(max(1, messages // 50), seed=seed)
+            heavy_service = FakeGmailService(heavy)
+            heavy_ids = [m["id"] for m in heavy]
+
+            def walk_heavy():
+                for i in heavy_ids:
+                    gmail_reader._get_full_message(heavy_service, i)
+            results["mime_walk_heavy"] = _timed(walk_heavy, repeat)
+            results["mime_walk_heavy"]["messages_per_run"] = len(heavy_ids)
+            results["mime_walk_heavy"]["peak_kb"] = _peak_kb(walk_heavy)
+
+        if "extract_dates" in only:
+            from datetime import datetime
+            bodies = [gmail_reader._get_full_message(service, i)["body"] for i in ids]
+            ref = datetime.combine(today, datetime.min.time())
+
+            def extract():
+                for b in bodies:
+                    for s in gmail_reader.find_date_strings(b):
+                        gmail_reader.normalize_date_string(s, ref)
+            results["extract_dates"] = _timed(extract, repeat)
+
+        if "scan_fallback" in only:
+            def scan():
+                cache = MessageCache(os.path.join(tmp, f"scan-{time.perf_counter_ns()}.db"))  # cold every run
+                gmail_reader.scan_and_suggest(max_results=len(ids), service=service, cache=cache)
+            results["scan_fallback"] = _timed(scan, repeat)
+
+    return {
+        "commit": _commit(),
+        "python": sys.version.split()[0],
+        "params": {"employees": employees, "messages": messages, "repeat": repeat, "seed": seed,
+                   "requests": len(requests)},
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Cases whose median grew by more than `threshold` (0.2 = 20%) against the baseline."""
+    if current["params"] != baseline.get("params"):
+        print("warning: baseline was run with different params", baseline.get("params"), file=sys.stderr)
+    slower = []
+    for name, cur in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        ratio = cur["median_ms"] / max(old["median_ms"], 1e-9)
+        cur["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            slower.append(f"{name}: {old['median_ms']}ms -> {cur['median_ms']}ms (x{ratio:.2f})")
+    return slower
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--employees", type=int, default=2000)
+    ap.add_argument("--messages", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--only", nargs="*", choices=CASES, default=CASES)
+    ap.add_argument("--out", help="write the JSON report here as well as to stdout")
+    ap.add_argument("--baseline", help="earlier JSON report to compare medians against")
+    ap.add_argument("--threshold", type=float, default=0.2)
+    args = ap.parse_args()
+
+    report = run(args.employees, args.messages, args.repeat, args.seed, args.only)
+    slower = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower = compare(report, json.load(f), args.threshold)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    if slower:
+        print("slower than baseline:\n  " + "\n  ".join(slower), file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,141 @@
+# bench/synth.py
+"""
+Seeded generators for benchmark data: an org of N employees with a plausible
+absence pattern, and a mailbox of M messages in the Gmail API's "full" shape.
+The same seed always yields the same data, so timings are comparable across commits.
+"""
+import base64
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+from backend.fakes import make_message
+from backend.models import PTORequest
+
+TEAM_SIZES = (4, 6, 8, 12, 20)
+# relative chance of starting PTO in each month: summer and the December holidays peak
+MONTH_WEIGHTS = [3, 4, 6, 5, 6, 10, 12, 11, 5, 4, 5, 12]
+# (length in days, weight): long weekends are common, whole weeks less so
+LENGTHS = [(1, 30), (2, 20), (3, 15), (4, 8), (5, 12), (7, 6), (10, 5), (14, 4)]
+REQUESTS_PER_YEAR = (2, 7)
+PENDING_RATIO = 0.1
+
+
+def make_org(n_employees: int, seed: int = 0, today: date = None) -> Tuple[List[Dict[str, Any]], List[PTORequest]]:
+    """(employees as dicts, PTO requests) covering today - 1 year .. today + 1 year."""
+    rnd = random.Random(seed)
+    today = today or date.today()
+    employees = []
+    team, left = 0, 0
+    for i in range(n_employees):
+        if left == 0:
+            team += 1
+            left = rnd.choice(TEAM_SIZES)
+        left -= 1
+        employees.append({
+            "id": f"e{i:06d}",
+            "name": f"Employee {i}",
+            "team": f"team{team:04d}",
+            "manager_id": None,
+            "accrual_days": round(rnd.uniform(0, 25), 1),
+        })
+
+    months = list(range(1, 13))
+    lengths, weights = zip(*LENGTHS)
+    requests = []
+    for emp in employees:
+        for year in (today.year - 1, today.year, today.year + 1):
+            for _ in range(rnd.randint(*REQUESTS_PER_YEAR)):
+                month = rnd.choices(months, MONTH_WEIGHTS)[0]
+                start = date(year, month, rnd.randint(1, 28))
+                if abs((start - today).days) > 366:
+                    continue
+                end = start + timedelta(days=rnd.choices(lengths, weights)[0] - 1)
+                status = "pending" if start > today and rnd.random() < PENDING_RATIO else "approved"
+                requests.append(PTORequest(employee_id=emp["id"], start_date=start, end_date=end, status=status))
+    return employees, requests
+
+
+SIGNALS = [
+    "We are going to {place} from {mon} {d1} to {mon} {d2}.",
+    "I'll be out next {weekday}, back the week after.",
+    "Your flight departs {m}/{d1}/2026 at 7am.",
+    "Let's regroup in {n} days once the release is out.",
+    "Booking confirmed: trip to {place} on {mon} {d1}.",
+]
+PLACES = ["Japan", "Lisbon", "Tokyo", "New York", "Cape Town"]
+MON = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+FILLER = [
+    "Please find the quarterly numbers attached.",
+    "Let me know if anything looks off before Thursday's sync.",
+    "Thanks for the quick turnaround on the review last week.",
+    "The build is green again after the dependency bump.",
+    "Reminder: expense reports are due at the end of the month.",
+]
+
+
+def _body(rnd: random.Random) -> str:
+    parts = [rnd.choice(FILLER) for _ in range(rnd.randint(2, 20))]
+    for _ in range(rnd.choices((0, 1, 2), (5, 4, 1))[0]):
+        d1 = rnd.randint(1, 20)
+        parts.insert(rnd.randrange(len(parts) + 1), rnd.choice(SIGNALS).format(
+            place=rnd.choice(PLACES), mon=rnd.choice(MON), m=rnd.randint(1, 12), d1=d1,
+            d2=d1 + rnd.randint(1, 8), weekday=rnd.choice(WEEKDAYS), n=rnd.randint(2, 30)))
+    return " ".join(parts)
+
+
+def make_mailbox(n_messages: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Messages with a mix of MIME layouts: plain, plain + html alternatives, and
+    mixed messages nesting an alternative part next to an attachment.
+    """
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n_messages):
+        body = _body(rnd)
+        subject = rnd.choice(["Weekly update", "Trip plans", "Re: offsite", "OOO", "Invoice", "Lunch?"])
+        layout = rnd.random()
+        if layout < 0.5:
+            msg = make_message(f"m{i:07d}", subject, body)
+        else:
+            msg = make_message(f"m{i:07d}", subject, body, html=f"<html><body><p>{body}</p></body></html>")
+            if layout > 0.8:
+                alternative = msg["payload"]
+                pdf = b"%PDF-1.4 " + b"0" * rnd.randint(200, 4000)
+                attachment = {"mimeType": "application/pdf", "filename": "itinerary.pdf",
+                              "body": {"data": base64.urlsafe_b64encode(pdf).decode("ascii")}}
+                msg["payload"] = {"mimeType": "multipart/mixed", "headers": alternative.pop("headers"),
+                                  "parts": [alternative, attachment]}
+        out.append(msg)
+    return out
+
+
+def make_heavy_mailbox(n_messages: int, seed: int = 0, size_kb: int = 256) -> List[Dict[str, Any]]:
+    """
+    Large messages: HTML-only newsletters and long forwarded threads (plain text
+    nested in message/rfc822 parts), each about size_kb, plus a large attachment.
+    """
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n_messages):
+        chunks, size = [], 0
+        while size < size_kb * 1024:
+            chunks.append(_body(rnd))
+            size += len(chunks[-1]) + 1
+        if i % 2:
+            html = "<html><head><style>p{margin:0}</style></head><body>" + "".join(
+                f"<table><tr><td><p>{c}</p></td></tr></table>" for c in chunks) + "</body></html>"
+            msg = make_message(f"h{i:07d}", "Newsletter", "", html=html)
+            msg["payload"]["parts"] = msg["payload"]["parts"][1:]  # html only
+        else:
+            msg = make_message(f"h{i:07d}", "Fwd: Trip plans", chunks[0])
+            forwarded = {"mimeType": "message/rfc822",
+                         "parts": [make_message("", "", "\n".join(chunks[1:]))["payload"]]}
+            msg["payload"]["parts"].append(forwarded)
+        zip_ = b"PK" + bytes(rnd.getrandbits(8) for _ in range(size_kb * 256))
+        msg["payload"] = {"mimeType": "multipart/mixed", "headers": msg["payload"].pop("headers"),
+                          "parts": [msg["payload"], {"mimeType": "application/zip", "filename": "photos.zip",
+                                                     "body": {"data": base64.urlsafe_b64encode(zip_).decode("ascii")}}]}
+        out.append(msg)
+    return out
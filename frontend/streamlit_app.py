@@ -1,4 +1,5 @@
 import data
+import time
 import requests
 import streamlit as st
 from datetime import date, timedelta
@@ -8,21 +9,62 @@ API = "http://127.0.0.1:8001"  # Backend
 st.set_page_config(page_title="SmartPTO", page_icon="🗓️", layout="centered")
 st.title("🗓️ SmartPTO — Demo")
 
+# --- HTTP client (one pooled session per server process) ---
+@st.cache_resource
+def http() -> requests.Session:
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Reruns (every slider move) hit these caches instead of the backend.
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_health():
+    return http().get(f"{API}/health", timeout=5).json()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_employees():
+    return [(e["id"], e["name"]) for e in http().get(f"{API}/employees", timeout=5).json()]
+
+
+def fetch_revision():
+    # uncached and cheap: any write on the server (PTO requests, Gmail team scans) changes it
+    try:
+        return http().get(f"{API}/revision", timeout=5).json()["revision"]
+    except Exception:
+        return None  # older server: fall back to the TTL alone
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_dashboard(emp_id, desired_len, horizon, max_cov, revision):
+    params = {
+        "employee_id": emp_id,
+        "desired_len_days": desired_len,
+        "horizon_days": horizon,
+        "max_coverage_ratio": max_cov,
+    }
+    r = http().get(f"{API}/dashboard", params=params, timeout=5)
+    r.raise_for_status()
+    return r.json()
+
+
 # --- Health ---
 with st.expander("Server status", expanded=True):
     try:
-        r = requests.get(f"{API}/health", timeout=5)
-        st.success(f"API OK: {r.json()}")
+        st.success(f"API OK: {fetch_health()}")
     except Exception as e:
         st.error(f"API not reachable: {e}")
         st.stop()
 
 # --- Sidebar controls ---
-employees = [
-    ("u1", "Ryan"),
-    ("u2", "Alex"),
-    ("u3", "Priya"),
-]
+try:
+    employees = fetch_employees()
+except Exception as e:
+    st.error(f"Could not load employees: {e}")
+    st.stop()
 
 with st.sidebar:
     st.header("Inputs")
@@ -31,22 +73,25 @@ with st.sidebar:
     horizon = st.slider("Planning horizon (days)", 7, 90, 60)
     max_cov = st.slider("Max coverage ratio", 0.0, 1.0, 0.3)
 
-# --- Balance ---
-st.subheader("Accrual balance")
-balance_data = {}
+# --- Balance + recommendations in one call ---
+dashboard = {}
+dashboard_error = None
 try:
-    r = requests.get(f"{API}/balance", params={"employee_id": emp_id}, timeout=5)
-    balance_data = r.json()
-    if "error" in balance_data:
-        st.warning(balance_data["error"])
-    else:
-        st.metric(
-            label=f"{balance_data['name']}'s PTO balance",
-            value=balance_data["accrual_days"]
-        )
+    dashboard = fetch_dashboard(emp_id, desired_len, horizon, max_cov, fetch_revision())
 except Exception as e:
-    st.error(f"Error fetching balance: {e}")
-    balance_data = {}
+    dashboard_error = e
+
+st.subheader("Accrual balance")
+balance_data = dashboard.get("balance", {})
+if dashboard_error is not None:
+    st.error(f"Error fetching balance: {dashboard_error}")
+elif "error" in dashboard:
+    st.warning(dashboard["error"])
+else:
+    st.metric(
+        label=f"{balance_data['name']}'s PTO balance",
+        value=balance_data["accrual_days"]
+    )
 
 # --- Recommendations ---
 st.subheader("Recommendations")
@@ -65,25 +110,16 @@ END:VCALENDAR"""
 start = end = None
 reason = None
 
-try:
-    params = {
-        "employee_id": emp_id,
-        "desired_len_days": desired_len,
-    }
-    r = requests.get(f"{API}/recommend", params=params, timeout=5)
-    if r.status_code == 200:
-        recs = r.json()
-        if isinstance(recs, list) and recs:
-            rec = recs[0]
-            start = date.fromisoformat(rec["window_start"])
-            end = date.fromisoformat(rec["window_end"])
-            reason = rec.get("reason", "coverage OK")
-        else:
-            st.info("No suitable windows found from API.")
-    else:
-        st.warning(f"/recommend returned HTTP {r.status_code}. Using fallback.")
-except Exception as e:
-    st.warning(f"Could not fetch recommendations: {e}")
+recs = dashboard.get("recommendations", [])
+if recs:
+    rec = recs[0]
+    start = date.fromisoformat(rec["window_start"])
+    end = date.fromisoformat(rec["window_end"])
+    reason = rec.get("reason", "coverage OK")
+elif dashboard_error is None and "error" not in dashboard:
+    st.info("No suitable windows found from API.")
+else:
+    st.warning("Could not fetch recommendations. Using fallback.")
 
 # --- Always show something (fallback if API failed) ---
 if start is None:
@@ -91,15 +127,18 @@ if start is None:
     end = start + timedelta(days=desired_len - 1)
     reason = "naive fallback"
 
-# --- Compare against accrual balance ---
+# --- Compare against accrual balance (weekends/holidays in the window are free) ---
 accrual = float(balance_data.get("accrual_days", 0))
-if desired_len > accrual:
+pto_days = recs[0].get("pto_days") if recs else None
+if pto_days is None:
+    pto_days = desired_len
+if pto_days > accrual:
     st.warning(
-        f"Requested {desired_len} day(s) but balance is only {accrual}. "
+        f"Window costs {pto_days} PTO day(s) but balance is only {accrual}. "
         "Window is shown anyway."
     )
 
-st.success(f"Suggested window ({reason}): {start} → {end}")
+st.success(f"Suggested window ({reason}): {start} → {end} ({pto_days} PTO day(s))")
 
 
 # Calendar download
@@ -115,13 +154,17 @@ with st.form("request_pto"):
     if submitted and start and end:
         payload = {
             "employee_id": emp_id,
-            "window_start": start.isoformat(),
-            "window_end": end.isoformat(),
-            "note": note,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "status": "pending",
+            "note": note or None,
         }
-        # For now, just show payload (no backend endpoint yet)
-        st.json(payload)
-        st.success("PTO request (demo) submitted!")
+        try:
+            r = http().post(f"{API}/pto", json=payload, timeout=5)
+            st.json(r.json())
+            st.success("PTO request submitted!")
+        except Exception as e:
+            st.error(f"Could not submit PTO request: {e}")
 
 
 
@@ -139,7 +182,7 @@ st.subheader("📧 Scan Gmail for holiday hints")
 limit = st.number_input("Max emails", min_value=5, max_value=100, value=20, step=5, key="limit1")
 if st.button("Scan Gmail"):
     try:
-        r = requests.get(f"{API}/gmail/holiday-suggestions", params={"max_results": int(limit)}, timeout=10)
+        r = http().get(f"{API}/gmail/holiday-suggestions", params={"max_results": int(limit)}, timeout=10)
         data = r.json()
         items = data.get("items", [])
         if not items:
@@ -154,13 +197,35 @@ if st.button("Scan Gmail"):
 st.subheader("🤖 AI-assisted Gmail PTO scan")
 limit_ai = st.number_input("Max messages to scan (AI)", min_value=5, max_value=200, value=50, step=5, key="limit2")
 if st.button("Analyze Gmail for PTO hints"):
-    with st.spinner("Scanning Gmail..."):
-        try:
-            r = requests.get(f"{API}/gmail/analyze", params={"max_results": int(limit_ai)}, timeout=20)
-            data = r.json()
-            st.info(f"Scanned {data.get('count_messages',0)} messages")
-            for s in data.get("suggestions", []):
-                st.success(f"{s['window_start']} → {s['window_end']} — {s['reason']} "
-                           f"(confidence {s.get('confidence',0):.2f})")
-        except Exception as e:
-            st.error(f"AI Gmail analysis failed: {e}")
+    status = st.empty()
+    progress = st.progress(0.0)
+    status.info("Scanning Gmail...")
+    try:
+        # the scan runs as a background job on the server; poll it so no request
+        # has to stay open for the whole scan, and show new suggestions as they arrive
+        job = http().post(f"{API}/gmail/scan", params={"max_results": int(limit_ai)}, timeout=5).json()
+        if "job_id" not in job:
+            raise RuntimeError(job.get("error", job))
+        seen = 0
+        while True:
+            res = http().get(f"{API}/gmail/scan/{job['job_id']}", params={"since": seen}, timeout=5).json()
+            prog = res.get("progress", {})
+            if prog.get("count_messages") is not None:
+                status.info(f"Scanning {prog['count_messages']} messages ({prog.get('cached_messages', 0)} cached)...")
+            if prog.get("to_fetch"):
+                done_msgs = prog.get("fetched", 0) + prog.get("pruned", 0)  # pruned by triage: never fetched
+                progress.progress(min(done_msgs / prog["to_fetch"], 1.0))
+            for ev in res.get("suggestions", []):
+                st.success(f"{ev['window_start']} → {ev['window_end']} — {ev['reason']} "
+                           f"(confidence {ev.get('confidence',0):.2f})")
+            seen = res.get("suggestion_count", seen)
+            if res.get("status") in ("done", "failed", "cancelled"):
+                break
+            time.sleep(0.5)
+        if res["status"] == "done":
+            progress.progress(1.0)
+            status.info(f"Scanned {prog.get('count_messages', 0)} messages")
+        else:
+            st.error(f"Scan {res['status']}: {res.get('error') or ''}")
+    except Exception as e:
+        st.error(f"AI Gmail analysis failed: {e}")
@@ -0,0 +1,15 @@
+# tests/conftest.py
+# Every on-disk path points into a throwaway directory before any backend module reads it.
+import os
+import sys
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="smartpto-tests-")
+os.environ["SMARTPTO_DB"] = os.path.join(_TMP, "smartpto.db")
+os.environ["SMARTPTO_SNAPSHOT"] = os.path.join(_TMP, "smartpto.occupancy")
+os.environ["GMAIL_CACHE_DB"] = os.path.join(_TMP, "gmail_cache.db")
+os.environ["GMAIL_TOKENS_DIR"] = os.path.join(_TMP, "gmail_tokens")
+os.environ.pop("GEMINI_CACHE_DB", None)
+os.environ.pop("GEMINI_API_KEY", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,61 @@
+# tests/test_absence.py
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+from backend.absence import AbsenceIndex
+
+START = date(2026, 1, 1)
+
+
+def test_counts_and_range_sums():
+    idx = AbsenceIndex(start=START, span_days=365)
+    idx.add_interval("alpha", "u1", date(2026, 3, 2), date(2026, 3, 4))
+    idx.add_interval("alpha", "u2", date(2026, 3, 3), date(2026, 3, 3))
+    assert idx.occupancy("alpha", date(2026, 3, 1), 5).tolist() == [0, 1, 2, 1, 0]
+    assert idx.out_days("alpha", date(2026, 3, 1), date(2026, 3, 31)) == 4
+    idx.add_interval("alpha", "u1", date(2026, 3, 2), date(2026, 3, 4))  # duplicate: ignored
+    assert idx.out_days("alpha", date(2026, 3, 1), date(2026, 3, 31)) == 4
+    idx.remove_interval("u1", date(2026, 3, 2), date(2026, 3, 4))
+    assert idx.out_days("alpha", date(2026, 3, 1), date(2026, 3, 31)) == 1
+
+
+def test_grows_outside_the_window():
+    idx = AbsenceIndex(start=START, span_days=30)
+    idx.add_interval("alpha", "u1", date(2025, 12, 30), date(2026, 2, 2))
+    assert idx.out_days("alpha", date(2025, 12, 1), date(2026, 3, 1)) == 35
+    assert idx.occupancy("alpha", date(2025, 12, 29), 3).tolist() == [0, 1, 1]
+
+
+def test_employee_changing_teams_moves_their_interval():
+    idx = AbsenceIndex(start=START, span_days=365)
+    day = date(2026, 5, 4)
+    idx.add_interval("alpha", "u1", day, day)
+    idx.add_interval("beta", "u1", day, day)  # same request stored after u1 moved to beta
+    assert idx.out_days("alpha", day, day) == 0
+    assert idx.out_days("beta", day, day) == 1
+    idx.remove_interval("u1", day, day)
+    assert idx.out_days("beta", day, day) == 0
+    assert idx.occupancy("alpha", day, 1).tolist() == [0]
+
+
+def test_concurrent_readers_never_see_a_stale_prefix():
+    idx = AbsenceIndex(start=START, span_days=365)
+    days = [START + timedelta(days=i) for i in range(200)]
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            idx.out_days("alpha", START, START + timedelta(days=364))
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for t in readers:
+        t.start()
+    for i, d in enumerate(days):
+        idx.add_interval("alpha", f"u{i}", d, d)
+    stop.set()
+    for t in readers:
+        t.join()
+    assert idx.out_days("alpha", START, START + timedelta(days=364)) == len(days)
+    assert np.array_equal(idx.occupancy("alpha", START, 200), np.ones(200, dtype=np.int32))
@@ -0,0 +1,73 @@
+# tests/test_app_pto.py
+import importlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+
+import backend.app as app_module
+from backend.absence import AbsenceIndex
+from backend.models import PTORequest
+
+
+def _fresh_index() -> AbsenceIndex:
+    idx = AbsenceIndex()
+    end = date.fromordinal(idx.base + idx.span - 1)
+    return AbsenceIndex.from_rows(app_module.STORE.requests_between(date.fromordinal(idx.base), end))
+
+
+def test_concurrent_submits_keep_the_per_process_index_exact(monkeypatch):
+    monkeypatch.setattr(app_module, "SNAPSHOTS", None)
+    today = date.today()
+    reqs = [PTORequest(employee_id=emp, start_date=today + timedelta(days=10 + i),
+                       end_date=today + timedelta(days=11 + i), status="approved")
+            for i in range(60) for emp in ("u1", "u2", "u3")]
+
+    def submit(i_req):
+        i, req = i_req
+        if i % 3 == 2:
+            app_module.STORE.upsert_request(req)  # another worker's write: forces reloads
+            return {}
+        return app_module.submit_pto(req)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(submit, enumerate(reqs)))
+    assert all("error" not in r for r in results)
+
+    idx = app_module._absence_index()
+    assert app_module._absences_rev == app_module.STORE.revision()
+    fresh = _fresh_index()
+    for team in ("alpha", "beta"):
+        assert np.array_equal(idx.occupancy(team, today, 90), fresh.occupancy(team, today, 90))
+
+
+def test_submit_for_unknown_employee():
+    req = PTORequest(employee_id="nobody", start_date=date.today(), end_date=date.today(), status="approved")
+    assert app_module.submit_pto(req) == {"error": "employee not found", "employee_id": "nobody"}
+
+
+def test_default_db_path_does_not_depend_on_cwd(monkeypatch):
+    import backend.store as store_module
+    monkeypatch.delenv("SMARTPTO_DB")
+    try:
+        default = importlib.reload(store_module).DB_PATH
+    finally:
+        monkeypatch.undo()
+        importlib.reload(store_module)
+    assert os.path.isabs(default)
+    assert os.path.dirname(default) == os.path.dirname(os.path.abspath(store_module.__file__))
+
+
+def test_revision_moves_with_writes_so_dashboard_caches_invalidate():
+    from fastapi.testclient import TestClient
+
+    client = TestClient(app_module.app)
+    before = client.get("/revision").json()["revision"]
+    dash = client.get("/dashboard", params={"employee_id": "u1"}).json()
+    assert dash["revision"] == before
+    day = (date.today() + timedelta(days=40)).isoformat()
+    client.post("/pto", json={"employee_id": "u1", "start_date": day, "end_date": day, "status": "pending"})
+    after = client.get("/revision").json()["revision"]
+    assert after > before
+    assert client.get("/dashboard", params={"employee_id": "u1"}).json()["revision"] == after
@@ -0,0 +1,48 @@
+# tests/test_date_extract.py
+from datetime import date, datetime
+
+import pytest
+
+from backend.date_extract import extract_spans
+
+REF = datetime(2026, 3, 4, 9, 0)  # a Wednesday
+
+
+def _dates(text, ref=REF):
+    return [(s.kind, s.start, s.end) for s in extract_spans(text, ref) if s.kind != "location"]
+
+
+@pytest.mark.parametrize("text", ["meet 1/1/0000 ok", "on 2/30/2026", "13/01/2026",
+                                  "Apr 31", "Feb 30"])
+def test_impossible_dates_normalize_to_none(text):
+    spans = extract_spans(text, REF)
+    assert spans and all(s.start is None and s.end is None for s in spans)
+
+
+def test_edge_years_that_exist():
+    assert _dates("1/1/0001 and 12/31/9998") == [("numeric", date(1, 1, 1), date(1, 1, 1)),
+                                                 ("numeric", date(9998, 12, 31), date(9998, 12, 31))]
+
+
+def test_month_day_rolls_to_the_next_occurrence():
+    assert _dates("back Mar 10, left Mar 1") == [("month_day", date(2026, 3, 10), date(2026, 3, 10)),
+                                                 ("month_day", date(2027, 3, 1), date(2027, 3, 1))]
+    assert _dates("Dec 31") == [("month_day", date(2026, 12, 31), date(2026, 12, 31))]
+
+
+def test_feb_29_means_the_next_leap_day():
+    assert _dates("off Feb 29") == [("month_day", date(2028, 2, 29), date(2028, 2, 29))]
+    assert _dates("off Feb 29", datetime(2028, 1, 5)) == [("month_day", date(2028, 2, 29), date(2028, 2, 29))]
+    assert _dates("off Feb 29", datetime(2028, 3, 1)) == [("month_day", date(2032, 2, 29), date(2032, 2, 29))]
+
+
+def test_ranges_and_relative_phrases():
+    assert _dates("from Dec 28 to Jan 3") == [("range", date(2026, 12, 28), date(2027, 1, 3))]
+    assert _dates("next Friday, in 12 days") == [("weekday", date(2026, 3, 6), date(2026, 3, 6)),
+                                                 ("in_days", date(2026, 3, 16), date(2026, 3, 16))]
+    assert _dates("see you 3/20/26") == [("numeric", date(2026, 3, 20), date(2026, 3, 20))]
+
+
+def test_locations_carry_no_dates():
+    spans = extract_spans("trip to Tokyo", REF)
+    assert [(s.kind, s.start) for s in spans] == [("location", None)]
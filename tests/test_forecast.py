@@ -0,0 +1,58 @@
+# tests/test_forecast.py
+from datetime import date
+
+import numpy as np
+
+from backend.forecast import forecast_balances
+from backend.models import AccrualPolicy, Employee
+from backend.workdays import get_calendar
+
+POLICY = AccrualPolicy(days_per_month=1.0, carry_over_cap=5.0, carry_over_expiry_month=4)
+
+
+def _emp(emp_id, days, rate=None):
+    return Employee(id=emp_id, name=emp_id, team="t", accrual_days=days, accrual_per_month=rate)
+
+
+def _row(emp_id, start, end):
+    return (emp_id, "t", start.toordinal(), end.toordinal())
+
+
+def _on(fc, emp_id, day):
+    return float(fc.balance[fc.index[emp_id], (day - fc.first).days])
+
+
+def test_accrual_and_working_days_of_approved_pto():
+    first = date(2026, 3, 2)
+    rows = [_row("a", date(2026, 3, 9), date(2026, 3, 15)),   # Mon-Sun: 5 working days
+            _row("a", date(2026, 3, 11), date(2026, 3, 12))]  # overlaps count once
+    fc = forecast_balances(first, 60, [_emp("a", 10), _emp("b", 10, rate=2.0)], rows, POLICY,
+                           get_calendar("US", 2026))
+    assert _on(fc, "a", date(2026, 3, 8)) == 10
+    assert _on(fc, "a", date(2026, 3, 15)) == 5
+    assert _on(fc, "a", date(2026, 4, 1)) == 6
+    assert _on(fc, "b", date(2026, 4, 1)) == 12
+
+
+def test_year_end_cap_and_expiry_of_carried_days():
+    first = date(2026, 12, 1)
+    rows = [_row("used", date(2027, 2, 1), date(2027, 2, 2))]  # Mon-Tue: 2 of the 5 carried days
+    fc = forecast_balances(first, 200, [_emp("idle", 10), _emp("used", 10)], rows, POLICY,
+                           get_calendar("US", 2026))
+    assert _on(fc, "idle", date(2026, 12, 31)) == 11
+    assert _on(fc, "idle", date(2027, 1, 1)) == 6  # capped to 5, then January's accrual
+    assert _on(fc, "idle", date(2027, 3, 31)) == 8
+    assert _on(fc, "idle", date(2027, 4, 1)) == 4  # the 5 carried days lapse
+    assert _on(fc, "used", date(2027, 4, 1)) == 4  # 8 - 2 used, 3 unused carried days lapse
+    assert fc.forfeited.tolist() == [11.0, 9.0]
+
+
+def test_affordability_looks_ahead_to_later_approved_pto():
+    first = date(2026, 3, 2)
+    rows = [_row("a", date(2026, 5, 4), date(2026, 5, 8))]  # 5 days already approved in May
+    fc = forecast_balances(first, 200, [_emp("a", 6)], rows, POLICY, get_calendar("US", 2026))
+    ok, avail = fc.affordable(["a", "a", "nobody"], [date(2026, 3, 16)] * 2 + [date(2026, 3, 16)], [3, 4, 1])
+    # 6 + Apr/May accrual = 8 before May; 8 - 5 leaves 3 to spend in March
+    assert avail[:2].tolist() == [3.0, 3.0]
+    assert ok.tolist() == [True, False, False]
+    assert np.isnan(avail[2])
@@ -0,0 +1,109 @@
+# tests/test_gemini_merge.py
+import itertools
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from backend import gmail_reader, providers
+from backend.fakes import FakeGenerativeModel, FakeGmailService, make_message
+from backend.gmail_cache import MessageCache
+
+_names = itertools.count()
+
+
+def _model(responder, **kw):
+    # a fresh model name per test keeps the shared response cache from answering
+    return FakeGenerativeModel(model_name=f"merge-test-{next(_names)}", responder=responder, **kw)
+
+
+def _messages(n):
+    return [{"id": f"m{i}", "headers": {"subject": f"s{i}"}, "body": "x " * 200} for i in range(n)]
+
+
+def _sug(mid, start, end, conf, reason="r"):
+    return {"source_message_id": mid, "window_start": start, "window_end": end, "reason": reason, "confidence": conf}
+
+
+def test_several_windows_from_one_message_are_kept():
+    model = _model(lambda prompt: json.dumps([
+        _sug("m0", "2026-05-01", "2026-05-03", 0.7),
+        _sug("m0", "2026-07-10", "2026-07-20", 0.6),
+    ]))
+    got = gmail_reader.analyze_with_gemini(_messages(1), model=model)
+    assert sorted(s["window_start"] for s in got) == ["2026-05-01", "2026-07-10"]
+
+
+def test_duplicates_across_chunks_keep_the_most_confident():
+    def responder(prompt):
+        ids = re.findall(r"^id: (\S+)$", prompt, flags=re.M)
+        conf = 0.9 if "m3" in ids else 0.3
+        return json.dumps([_sug("m0", "2026-05-01", "2026-05-03", conf, reason=f"chunk {ids[0]}")])
+
+    model = _model(responder)
+    got = gmail_reader.analyze_with_gemini(_messages(4), model=model, token_budget=300)
+    assert model.calls > 1  # the messages really were split
+    assert len(got) == 1
+    assert got[0]["confidence"] == 0.9
+
+
+def test_suggestions_without_a_message_id_are_not_collapsed():
+    model = _model(lambda prompt: json.dumps([
+        {"window_start": "2026-05-01", "window_end": "2026-05-02", "reason": "a"},
+        {"window_start": "2026-06-01", "window_end": "2026-06-02", "reason": "b"},
+    ]))
+    got = gmail_reader.analyze_with_gemini(_messages(1), model=model)
+    assert sorted(s["reason"] for s in got) == ["a", "b"]
+
+
+def test_unparseable_confidence_counts_as_zero():
+    model = _model(lambda prompt: json.dumps([
+        _sug("m0", "2026-05-01", "2026-05-03", "high"),
+        _sug("m0", "2026-05-01", "2026-05-03", 0.2, reason="numeric"),
+        _sug("m1", "2026-06-01", "2026-06-03", None),
+        _sug("m2", "2026-06-01", "2026-06-03", "NaN"),
+        _sug("m3", "2026-06-01", "2026-06-03", [0.5]),
+    ]))
+    got = {s["source_message_id"]: s for s in gmail_reader.analyze_with_gemini(_messages(4), model=model)}
+    assert got["m0"]["reason"] == "numeric"
+    assert [got[m]["confidence"] for m in ("m0", "m1", "m2", "m3")] == [0.2, 0.0, 0.0, 0.0]
+
+
+@pytest.fixture
+def scan(monkeypatch, tmp_path):
+    """scan_and_suggest over three OOO messages, with Gemini answered by `responder`."""
+    def run(responder):
+        model = _model(responder)
+        monkeypatch.setattr(gmail_reader, "_setup_gemini", lambda: True)
+        monkeypatch.setattr(providers, "genai", lambda: SimpleNamespace(GenerativeModel=lambda name: model))
+        svc = FakeGmailService([make_message(f"t{i}", "OOO", "Out of office, back in 5 days.") for i in range(3)])
+        cache = MessageCache(str(tmp_path / "cache.db"))
+        first = gmail_reader.scan_and_suggest(10, service=svc, cache=cache)
+        return first, gmail_reader.scan_and_suggest(10, service=svc, cache=cache)
+    return run
+
+
+def _ids(prompt):
+    return re.findall(r"^id: (\S+)$", prompt, flags=re.M)
+
+
+def test_scan_accepts_suggestions_keyed_source(scan):
+    first, again = scan(lambda prompt: json.dumps([
+        {"source": i, "window_start": "2026-05-01", "window_end": "2026-05-03", "reason": "r", "confidence": 0.8}
+        for i in _ids(prompt)]))
+    assert sorted(s["source_message_id"] for s in first["suggestions"]) == ["t0", "t1", "t2"]
+    assert all("source" not in s for s in first["suggestions"])
+    assert again["fetched_messages"] == 0 and len(again["suggestions"]) == 3  # cached under their messages
+
+
+def test_scan_keeps_suggestions_without_a_matching_id(scan):
+    def responder(prompt):
+        return json.dumps([_sug(None, "2026-05-01", "2026-05-03", 0.8, reason=f"for {_ids(prompt)}"),
+                           _sug("made-up", "2026-06-01", "2026-06-02", 0.7)])
+
+    first, again = scan(responder)
+    assert len(first["suggestions"]) == 4  # two per batch: [t2], then [t1, t0]
+    assert not any(s["reason"].startswith("Found phrase") for s in first["suggestions"])  # no rule-based fallback
+    assert [s["source_message_id"] for s in first["suggestions"]][:2] == ["t2", "t2"]  # a lone message owns them
+    assert len(again["suggestions"]) == len(first["suggestions"])
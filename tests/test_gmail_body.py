@@ -0,0 +1,69 @@
+# tests/test_gmail_body.py
+import base64
+
+from bench.synth import make_heavy_mailbox
+from backend.fakes import make_message
+from backend.gmail_reader import extract_body
+
+
+def _part(mime, raw, charset=None, filename=None):
+    part = {"mimeType": mime, "body": {"data": base64.urlsafe_b64encode(raw).decode("ascii")}}
+    if charset:
+        part["headers"] = [{"name": "Content-Type", "value": f'{mime}; charset="{charset}"'}]
+    if filename:
+        part["filename"] = filename
+    return part
+
+
+def test_plain_parts_are_joined_in_document_order_and_attachments_skipped():
+    payload = {"mimeType": "multipart/mixed", "parts": [
+        {"mimeType": "multipart/alternative", "parts": [_part("text/plain", b"first"),
+                                                        _part("text/html", b"<p>ignored</p>")]},
+        _part("text/plain", b"attached", filename="notes.txt"),
+        {"mimeType": "message/rfc822", "parts": [_part("text/plain", b"second")]},
+    ]}
+    assert extract_body(payload) == "first\nsecond"
+    assert extract_body(None) == ""
+
+
+def test_html_only_messages_are_converted_to_text():
+    html = ("<html><head><style>p{color:red}</style></head><body><script>x()</script>"
+            "<p>Out of office &amp; away</p><p>Back on Dec 27</p><!-- tracking --></body></html>")
+    msg = make_message("m", "s", "", html=html)
+    msg["payload"]["parts"] = msg["payload"]["parts"][1:]
+    text = extract_body(msg["payload"])
+    assert [line.strip() for line in text.splitlines()] == ["Out of office & away", "Back on Dec 27"]
+
+
+def test_part_charsets_are_honoured():
+    payload = {"mimeType": "multipart/mixed", "parts": [
+        _part("text/plain", "Café fermé".encode("latin-1"), charset="iso-8859-1"),
+        _part("text/plain", "naïve".encode("utf-8")),
+        _part("text/plain", b"plain", charset="no-such-codec"),
+    ]}
+    assert extract_body(payload) == "Café fermé\nnaïve\nplain"
+
+
+def test_decoding_stops_at_the_byte_budget():
+    payload = {"mimeType": "multipart/mixed", "parts": [_part("text/plain", b"a" * 5000),
+                                                        _part("text/plain", b"b" * 5000)]}
+    body = extract_body(payload, max_bytes=300)
+    assert body.startswith("a" * 300) and len(body) <= 303  # whole base64 quanta only
+    assert "b" not in body
+    split = extract_body(payload, max_bytes=5100)
+    assert split.count("a") == 5000 and 100 <= split.count("b") <= 102
+
+
+def test_deeply_nested_forwards_do_not_recurse():
+    payload = _part("text/plain", b"innermost")
+    for _ in range(5000):  # far past the interpreter's recursion limit
+        payload = {"mimeType": "message/rfc822", "parts": [payload]}
+    assert extract_body(payload) == "innermost"
+
+
+def test_heavy_mailbox_bodies_stay_within_budget():
+    forwarded, newsletter = make_heavy_mailbox(2, size_kb=64)
+    fwd = extract_body(forwarded["payload"], max_bytes=4096)
+    assert 0 < len(fwd.encode("utf-8")) <= 4096 + 2
+    news = extract_body(newsletter["payload"], max_bytes=4096)
+    assert news and "<" not in news and "margin" not in news
@@ -0,0 +1,76 @@
+# tests/test_gmail_cache.py
+import sqlite3
+from datetime import date, datetime, timedelta
+
+from backend import gmail_reader
+from backend.fakes import FakeGmailService, make_message
+from backend.gmail_cache import MessageCache
+
+SENT = "Wed, 4 Mar 2026 09:00:00 +0000"  # a Wednesday
+
+
+def _scan(svc, cache):
+    return gmail_reader.scan_and_suggest(10, service=svc, cache=cache)
+
+
+def _windows(result):
+    return sorted((s["window_start"], s["window_end"], s["reason"]) for s in result["suggestions"])
+
+
+def test_relative_dates_resolve_against_the_message_date(tmp_path):
+    svc = FakeGmailService([
+        make_message("m1", "OOO next week", "I'll be out next Friday and back in 12 days.", date=SENT),
+        make_message("m2", "Trip to Japan", "Booked the flight to Japan!", date=SENT),
+    ])
+    got = _windows(_scan(svc, MessageCache(str(tmp_path / "c.db"))))
+    starts = {reason.split("`")[1] if "`" in reason else reason: start for start, _, reason in got}
+    assert starts["next Friday"] == "2026-03-06"
+    assert starts["in 12 days"] == "2026-03-16"
+    assert starts["Travel mention: Japan found in message"] == (date(2026, 3, 4) + timedelta(days=30)).isoformat()
+
+
+def test_replayed_suggestions_match_a_fresh_analysis(tmp_path, monkeypatch):
+    msgs = [make_message("m1", "OOO", "Out next Monday, back in 3 days. Trip to Japan.", date=SENT)]
+    cache = MessageCache(str(tmp_path / "c.db"))
+    first = _scan(FakeGmailService(msgs), cache)
+    assert first["fetched_messages"] == 1
+
+    class Later(datetime):  # a later scan must not shift the cached windows
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2026, 9, 1, tzinfo=tz)
+    monkeypatch.setattr(gmail_reader, "datetime", Later)
+
+    svc = FakeGmailService(msgs)
+    replay = _scan(svc, cache)
+    assert replay["fetched_messages"] == 0
+    assert _windows(replay) == _windows(first)
+    fresh = _scan(FakeGmailService(msgs), MessageCache(str(tmp_path / "fresh.db")))
+    assert _windows(fresh) == _windows(first)
+
+
+def test_date_header_is_the_fallback_without_internal_date():
+    fm = {"id": "x", "headers": {"date": SENT}, "body": "back in 2 days"}
+    assert gmail_reader._message_time(fm).date() == date(2026, 3, 4)
+    assert gmail_reader._rule_based([fm])[0]["window_start"] == "2026-03-06"
+    assert gmail_reader._message_time({"headers": {"date": "garbage"}}).date() == date.today()
+
+
+def test_prompt_blocks_carry_the_message_date():
+    block = gmail_reader._message_block({"id": "m1", "headers": {"date": SENT}, "body": "hi"})
+    assert "date: 2026-03-04" in block
+
+
+def test_caches_from_an_older_version_are_emptied(tmp_path):
+    path = str(tmp_path / "old.db")
+    con = sqlite3.connect(path)
+    con.executescript("""
+        CREATE TABLE messages (account TEXT, id TEXT, headers TEXT, body TEXT, snippet TEXT, suggestions TEXT,
+                               PRIMARY KEY (account, id));
+        INSERT INTO messages VALUES ('a', 'm1', '{}', '', '', '[{"window_start": "2020-01-01"}]');
+    """)
+    con.close()
+    cache = MessageCache(path)
+    assert cache.known_ids("a", ["m1"]) == set()
+    cache.put("a", [{"id": "m1", "internal_date": "1772614800000"}], {"m1": []})
+    assert cache.known_ids("a", ["m1"]) == {"m1"}
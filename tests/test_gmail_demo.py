@@ -0,0 +1,64 @@
+# tests/test_gmail_demo.py
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.app as app_module
+from backend import gmail_reader
+from backend.fakes import FakeGmailService, make_message
+from backend.gmail_cache import MessageCache
+
+
+@pytest.fixture
+def client():
+    return TestClient(app_module.app)
+
+
+@pytest.fixture
+def no_credentials(monkeypatch, tmp_path):
+    monkeypatch.setattr(gmail_reader, "CREDENTIALS_FILE", str(tmp_path / "missing.json"))
+
+
+def test_missing_credentials_answer_in_explicit_demo_mode(client, no_credentials):
+    body = client.get("/gmail/analyze").json()
+    assert body["demo"] is True
+    assert body["count_messages"] == 3
+
+
+def test_demo_mode_can_be_refused(client, no_credentials, monkeypatch):
+    monkeypatch.setattr(app_module, "GMAIL_DEMO", "0")
+    resp = client.get("/gmail/analyze")
+    assert resp.status_code == 503
+    assert resp.json()["error"] == "gmail not configured"
+    assert client.post("/gmail/team-scan", params={"team": "alpha"}).status_code == 503
+
+
+def test_demo_mode_can_be_forced_with_credentials(client, monkeypatch, tmp_path):
+    creds = tmp_path / "credentials.json"
+    creds.write_text("{}")
+    monkeypatch.setattr(gmail_reader, "CREDENTIALS_FILE", str(creds))
+    monkeypatch.setattr(app_module, "GMAIL_DEMO", "1")
+    assert client.get("/gmail/analyze").json()["demo"] is True
+
+
+def test_streamed_scans_flag_demo_on_start_and_done(client, no_credentials):
+    lines = [json.loads(l) for l in client.get("/gmail/analyze", params={"stream": "ndjson"}).text.splitlines()]
+    assert lines[0]["event"] == "start" and lines[0]["demo"] is True
+    assert lines[-1]["event"] == "done" and lines[-1]["demo"] is True
+    assert all("demo" not in ev for ev in lines[1:-1])
+
+
+def test_credentials_path_does_not_depend_on_cwd():
+    assert gmail_reader.CREDENTIALS_FILE == gmail_reader.os.path.join(
+        gmail_reader.os.path.dirname(gmail_reader.__file__), "credentials.json")
+
+
+def test_first_suggestion_does_not_wait_for_a_full_batch(tmp_path):
+    msgs = [make_message(f"m{i:02d}", "OOO", f"I'm out in {i + 2} days.") for i in range(20)]
+    events = list(gmail_reader.iter_scan(20, service=FakeGmailService(msgs), cache=MessageCache(str(tmp_path / "c.db")),
+                                         batch_size=8, triage_threshold=0))
+    kinds = [ev["event"] for ev in events]
+    assert kinds[1] == "suggestion"  # analyzed on its own, ahead of the rest
+    assert [ev["fetched"] for ev in events if ev["event"] == "progress"] == [1, 3, 7, 15, 20]
+    assert kinds.count("suggestion") == 20
@@ -0,0 +1,154 @@
+# tests/test_gmail_fetch.py
+import pytest
+
+from backend import gmail_reader
+from backend.fakes import FakeGmailService, FakeHttpError, make_message
+from backend.gmail_cache import MessageCache
+
+
+def _mailbox(n):
+    return [make_message(f"m{i:03d}", f"subject {i}", f"body {i}") for i in range(n)]
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(gmail_reader.time, "sleep", sleeps.append)
+    return sleeps
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return MessageCache(str(tmp_path / "cache.db"))
+
+
+def test_fetch_keeps_listing_order_with_many_workers():
+    svc = FakeGmailService(_mailbox(30), latency=0.002)
+    ids = [f"m{i:03d}" for i in range(30)][::-1]
+    got = gmail_reader.fetch_full_messages(lambda: svc, ids, concurrency=8)
+    assert [m["id"] for m in got] == ids
+    assert got[0]["body"] == "body 29"
+    assert got[0]["headers"]["subject"] == "subject 29"
+    assert svc.calls["messages.get"] == 30
+
+
+def test_fetch_retries_throttled_calls(no_sleep):
+    svc = FakeGmailService(_mailbox(20), throttle_every=3)
+    ids = [f"m{i:03d}" for i in range(20)]
+    failed = []
+    got = gmail_reader.fetch_full_messages(lambda: svc, ids, concurrency=4, failed=failed)
+    assert [m["id"] for m in got] == ids
+    assert failed == []
+    assert svc.calls["messages.get"] > 20  # the 429s were retried
+    assert no_sleep
+
+
+def test_with_retry_backs_off_exponentially(no_sleep):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 4:
+            raise FakeHttpError(503)
+        return "ok"
+
+    assert gmail_reader._with_retry(flaky, retries=5, backoff=1.0) == "ok"
+    assert len(no_sleep) == 3
+    for attempt, slept in enumerate(no_sleep):
+        assert 0.5 * 2 ** attempt <= slept <= 1.5 * 2 ** attempt  # backoff * 2^n with +-50% jitter
+
+
+def test_with_retry_gives_up_and_skips_non_retryable(no_sleep):
+    def throttled():
+        raise FakeHttpError(429)
+
+    with pytest.raises(FakeHttpError):
+        gmail_reader._with_retry(throttled, retries=2, backoff=0.01)
+    assert len(no_sleep) == 2
+
+    calls = []
+
+    def forbidden():
+        calls.append(1)
+        raise FakeHttpError(403)
+
+    with pytest.raises(FakeHttpError):
+        gmail_reader._with_retry(forbidden, retries=5)
+    assert len(calls) == 1
+
+
+def test_partial_failures_skip_only_the_failing_messages(no_sleep):
+    svc = FakeGmailService(_mailbox(10), failures={"m003": 404, "m007": 500})
+    ids = [f"m{i:03d}" for i in range(10)]
+    failed = []
+    got = gmail_reader.fetch_full_messages(lambda: svc, ids, concurrency=3, failed=failed)
+    assert [m["id"] for m in got] == [i for i in ids if i not in ("m003", "m007")]
+    assert sorted(failed) == ["m003", "m007"]
+
+
+def test_auth_errors_still_abort_the_fetch():
+    svc = FakeGmailService(_mailbox(5), failures={"m002": 401})
+    with pytest.raises(FakeHttpError):
+        gmail_reader.fetch_full_messages(lambda: svc, [f"m{i:03d}" for i in range(5)], concurrency=2)
+
+
+def test_listing_follows_next_page_token():
+    svc = FakeGmailService(_mailbox(1200))
+    ids = gmail_reader._list_ids(svc, 1100)
+    assert len(ids) == 1100
+    assert ids[0] == "m1199"  # newest first
+    assert svc.calls["messages.list"] == 3  # 500 + 500 + 100
+    assert gmail_reader._list_ids(FakeGmailService(_mailbox(7)), 50) == [f"m{i:03d}" for i in range(6, -1, -1)]
+
+
+def test_scan_reports_failed_messages_and_retries_them_next_time(cache, no_sleep):
+    svc = FakeGmailService(_mailbox(6), failures={"m002": 503})
+    first = gmail_reader.scan_and_suggest(10, service=svc, cache=cache)
+    assert first["count_messages"] == 6
+    assert first["failed_messages"] == 1
+    assert first["pruned_messages"] == 5  # "subject i" / "body i" score nothing
+
+    del svc.failures["m002"]
+    events = list(gmail_reader.iter_scan(10, service=svc, cache=cache))
+    assert events[0] == {"event": "start", "count_messages": 6, "cached_messages": 5}
+    assert events[-1]["failed_messages"] == 0
+    assert events[-1]["pruned_messages"] == 1
+
+
+def _trips(n):
+    return [make_message(f"t{i:03d}", "Vacation booked", f"Flight and hotel booked, back in {i % 20 + 2} days.") for i in range(n)]
+
+
+def test_pruned_messages_are_triaged_again_when_the_threshold_changes(cache):
+    svc = FakeGmailService(_mailbox(4) + _trips(2))
+    first = gmail_reader.scan_and_suggest(10, service=svc, cache=cache)
+    assert (first["fetched_messages"], first["pruned_messages"]) == (2, 4)
+
+    gets = svc.calls["messages.get"]
+    same = list(gmail_reader.iter_scan(10, service=svc, cache=cache))
+    assert same[0]["cached_messages"] == 6
+    assert svc.calls["messages.get"] == gets  # unchanged mailbox, same threshold: nothing refetched
+
+    lower = list(gmail_reader.iter_scan(10, service=svc, cache=cache, triage_threshold=0))
+    assert lower[0]["cached_messages"] == 2  # the 4 pruned at threshold 2 are not known at 0
+    assert lower[-1]["fetched_messages"] == 4
+
+    again = list(gmail_reader.iter_scan(10, service=svc, cache=cache, triage_threshold=0))
+    assert again[0]["cached_messages"] == 6
+
+
+def test_triage_feeds_the_full_fetch_without_a_barrier(cache, monkeypatch):
+    log = []
+    meta, full = gmail_reader._get_metadata, gmail_reader._get_full_message
+    monkeypatch.setattr(gmail_reader, "_get_metadata", lambda svc, i: log.append(("meta", i)) or meta(svc, i))
+    monkeypatch.setattr(gmail_reader, "_get_full_message", lambda svc, i: log.append(("full", i)) or full(svc, i))
+    svc = FakeGmailService([m for pair in zip(_mailbox(30), _trips(30)) for m in pair])  # trips listed first
+    events = list(gmail_reader.iter_scan(100, service=svc, cache=cache, concurrency=2))
+
+    kinds = [k for k, _ in log]
+    assert kinds.count("meta") == 60 and kinds.count("full") == 30
+    assert kinds.index("full") < len(kinds) - 1 - kinds[::-1].index("meta")  # fetching began mid-triage
+    assert events[1]["event"] == "suggestion"  # the first hint arrives before triage is over
+    progress = [ev for ev in events if ev["event"] == "progress"][-1]
+    assert progress["fetched"] + progress["pruned"] == progress["to_fetch"] == 60
+    assert [ev for ev in events if ev["event"] == "triage"] == [{"event": "triage", "kept": 30, "pruned": 30}]
@@ -0,0 +1,73 @@
+# tests/test_gmail_service.py
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from backend import gmail_reader, mailbox_scan, providers
+from backend.fakes import FakeGmailService, make_message
+
+
+class _Creds:
+    valid = True
+    refresh_token = None
+    expiry = None
+
+
+def _fake_client(svc, builds):
+    def build_from_document(doc, http=None):
+        builds.append(threading.get_ident())
+        return svc
+    return SimpleNamespace(AuthorizedHttp=lambda creds, http=None: object(), build_http=lambda: None,
+                           build_from_document=build_from_document, get_static_doc=lambda name, version: "{}")
+
+
+def test_services_are_built_once_per_pool_thread_not_per_scan(monkeypatch):
+    svc = FakeGmailService([make_message(f"m{i}", "s", "b") for i in range(40)])
+    builds = []
+    monkeypatch.setattr(providers, "gmail_client", lambda: _fake_client(svc, builds))
+    manager = gmail_reader.GmailServiceManager(interactive=False)
+    manager._creds = _Creds()
+    ids = [f"m{i}" for i in range(40)]
+
+    for _ in range(3):
+        assert len(gmail_reader.fetch_full_messages(manager.service, ids, concurrency=4)) == 40
+    assert len(builds) == len(set(builds))  # one service per thread...
+    assert len(builds) <= gmail_reader.FETCH_POOL_SIZE  # ...and the threads outlive each scan
+
+
+def test_each_call_keeps_its_own_concurrency_bound():
+    svc = FakeGmailService([make_message(f"m{i}", "s", "b") for i in range(30)])
+    lock, state = threading.Lock(), {"now": 0, "max": 0}
+
+    def get(service, msg_id):
+        with lock:
+            state["now"] += 1
+            state["max"] = max(state["max"], state["now"])
+        time.sleep(0.002)
+        with lock:
+            state["now"] -= 1
+        return gmail_reader._get_full_message(service, msg_id)
+
+    got = list(gmail_reader.iter_full_messages(lambda: svc, [f"m{i}" for i in range(30)], concurrency=3, get=get))
+    assert len(got) == 30
+    assert 1 <= state["max"] <= 3
+
+
+def test_refresh_is_scheduled_from_a_naive_utc_expiry():
+    manager = gmail_reader.GmailServiceManager(interactive=False, refresh_margin_s=300)
+    manager._creds = SimpleNamespace(refresh_token="r",
+                                     expiry=datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1))
+    manager._schedule_refresh()
+    try:
+        assert 3290 <= manager._timer.interval <= 3300
+    finally:
+        manager._timer.cancel()
+
+
+def test_token_mailboxes_reuse_one_manager_per_token_file(tmp_path):
+    (tmp_path / "u1.json").write_text("{}")
+    first = mailbox_scan.token_mailboxes(["u1", "u2"], str(tmp_path))
+    second = mailbox_scan.token_mailboxes(["u1"], str(tmp_path))
+    assert list(first) == ["u1"]
+    assert first["u1"].__self__ is second["u1"].__self__
@@ -0,0 +1,113 @@
+# tests/test_jobs.py
+import threading
+
+import pytest
+
+from backend.jobs import CANCELLED, DONE, FAILED, JobQueue, QueueFull
+
+
+def _wait(job, timeout=5):
+    job.future.result(timeout)
+    return job
+
+
+def _events(n, gate=None, closed=None):
+    def run(job):
+        try:
+            yield {"event": "start", "count_messages": n}
+            for i in range(n):
+                if gate is not None:
+                    gate.wait(5)
+                yield {"event": "suggestion", "i": i}
+            yield {"event": "done", "count_messages": n}
+        finally:
+            if closed is not None:
+                closed.set()
+    return run
+
+
+@pytest.fixture
+def queue():
+    q = JobQueue(workers=2, queue_limit=2)
+    yield q
+    q.shutdown()
+
+
+def test_job_collects_progress_and_suggestions(queue):
+    job, created = queue.submit("k", {"n": 3}, _events(3))
+    assert created
+    _wait(job)
+    d = job.to_dict()
+    assert d["status"] == DONE
+    assert d["progress"] == {"count_messages": 3}
+    assert [s["i"] for s in d["suggestions"]] == [0, 1, 2]
+    assert d["suggestion_count"] == 3
+
+
+def test_polling_with_since_never_skips_or_repeats(queue):
+    gate = threading.Semaphore(0)
+
+    class Gate:
+        def wait(self, timeout):
+            gate.acquire(timeout=timeout)
+
+    job, _ = queue.submit("k", {}, _events(50, gate=Gate()))
+    seen, since = [], 0
+    for _ in range(50):
+        gate.release()
+        d = job.to_dict(since)
+        seen.extend(s["i"] for s in d["suggestions"])
+        since = d["suggestion_count"]
+    _wait(job)
+    seen.extend(s["i"] for s in job.to_dict(since)["suggestions"])
+    assert seen == list(range(50))
+    assert job.to_dict(500)["suggestion_count"] == 50  # a since past the end is clamped
+    assert job.to_dict(500)["suggestions"] == []
+
+
+def test_identical_jobs_are_shared_and_the_queue_is_bounded(queue):
+    gate = threading.Event()
+    first, _ = queue.submit("a", {}, _events(1, gate=gate))
+    again, created = queue.submit("a", {}, _events(1))
+    assert again is first and not created
+    queue.submit("b", {}, _events(1, gate=gate))
+    with pytest.raises(QueueFull):
+        queue.submit("c", {}, _events(1))
+    gate.set()
+    _wait(first)
+    assert queue.submit("a", {}, _events(1))[1]  # finished jobs no longer deduplicate
+
+
+def test_cancel_stops_a_running_job_and_closes_its_events(queue):
+    gate, closed = threading.Event(), threading.Event()
+    job, _ = queue.submit("k", {}, _events(5, gate=gate, closed=closed))
+    assert queue.cancel(job.id) is job
+    gate.set()
+    _wait(job)
+    assert job.status == CANCELLED
+    assert closed.is_set()
+
+
+def test_failures_are_reported(queue):
+    def boom(job):
+        yield {"event": "start"}
+        raise ValueError("bad mailbox")
+
+    job, _ = queue.submit("k", {}, boom)
+    _wait(job)
+    assert job.status == FAILED
+    assert job.error == "ValueError: bad mailbox"
+
+
+def test_app_shutdown_cancels_scan_jobs(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import backend.app as app_module
+
+    queue = JobQueue(workers=1)
+    monkeypatch.setattr(app_module, "SCAN_JOBS", queue)
+    gate = threading.Event()
+    with TestClient(app_module.app):
+        job, _ = queue.submit("k", {}, _events(3, gate=gate))
+    assert job.cancel_event.is_set()
+    gate.set()
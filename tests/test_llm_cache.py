@@ -0,0 +1,86 @@
+# tests/test_llm_cache.py
+import sqlite3
+
+from backend import llm_cache
+from backend.llm_cache import ResultCache
+
+
+def _disk_rows(path):
+    con = sqlite3.connect(path)
+    try:
+        return con.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    finally:
+        con.close()
+
+
+def test_memory_budget_counts_utf8_bytes():
+    cache = ResultCache(max_entries=100, max_bytes=20, disk_path=None)
+    cache.put("a", "é" * 6)  # 6 characters, 12 bytes
+    cache.put("b", "ü" * 4)  # 8 bytes: exactly at the budget
+    assert cache.stats()["bytes"] == 20
+    assert cache.get("a") is not None
+    cache.put("c", "x")  # over budget: the least recently used entry ("b") goes
+    assert cache.get("b") is None
+    assert cache.get("a") == "é" * 6
+    assert cache.stats()["bytes"] == 13
+    assert cache.stats()["evictions"] == 1
+
+
+def test_replacing_a_key_does_not_leak_bytes():
+    cache = ResultCache(disk_path=None)
+    cache.put("k", "ñ" * 10)
+    cache.put("k", "ñ")
+    assert cache.stats()["bytes"] == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = ResultCache(ttl_s=10, disk_path=None)
+    cache.put("k", "v")
+    now[0] += 9
+    assert cache.get("k") == "v"
+    now[0] += 2
+    assert cache.get("k") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_disk_entries_survive_a_new_instance(tmp_path):
+    path = str(tmp_path / "llm.db")
+    ResultCache(disk_path=path).put("k", "persisted")
+    cache = ResultCache(disk_path=path)
+    assert cache.get("k") == "persisted"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_is_pruned_periodically_not_on_every_put(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "llm.db")
+    cache = ResultCache(disk_path=path, disk_max_entries=5, prune_every=4)
+    sweeps = []
+    cache._disk.set_trace_callback(lambda sql: sweeps.append(sql) if sql.startswith("DELETE") else None)
+
+    for i in range(11):
+        now[0] += 1
+        cache.put(f"k{i}", "v")
+    assert _disk_rows(path) == 8  # trimmed to 5 at the 8th put, 3 added since
+    now[0] += 1
+    cache.put("k11", "v")
+    assert _disk_rows(path) == 5
+    assert sum(sql.startswith("DELETE FROM results WHERE created < ") for sql in sweeps) == 3
+
+    fresh = ResultCache(disk_path=path)
+    assert fresh.get("k11") == "v" and fresh.get("k6") is None  # the oldest rows went
+
+
+def test_expired_disk_rows_are_swept(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "llm.db")
+    cache = ResultCache(disk_path=path, ttl_s=10, prune_every=2)
+    cache.put("old", "v")
+    now[0] += 60
+    cache.put("new", "v")
+    assert _disk_rows(path) == 1
@@ -0,0 +1,154 @@
+# tests/test_mailbox_scan.py
+import importlib
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from backend.fakes import FakeGmailService, make_message
+from backend.gmail_cache import MessageCache
+from backend.mailbox_scan import MIN_CONFIDENCE, QuotaLimiter, TokenBucket, _to_requests, iter_team_scan
+from backend.store import Store
+
+SENT = format_datetime(datetime.now(timezone.utc) - timedelta(days=1))
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = Store(str(tmp_path / "store.db"))
+    s.load_employees([{"id": f"e{i}", "name": f"E{i}", "team": "t", "accrual_days": 10} for i in range(3)])
+    return s
+
+
+def _mailboxes(n=3):
+    out = {}
+    for i in range(n):
+        svc = FakeGmailService([make_message(f"m{i}", "OOO", "Out of office, back in 5 days.", date=SENT)],
+                               email=f"e{i}@example.com")
+        out[f"e{i}"] = lambda svc=svc: svc
+    return out
+
+
+def _scan(store, tmp_path, **kw):
+    events = list(iter_team_scan(_mailboxes(), store, 10, cache=MessageCache(str(tmp_path / "c.db")),
+                                 limiter=QuotaLimiter(1e6, 1e6), **kw))
+    return events, events[-1]
+
+
+def test_rule_based_date_hints_pass_the_default_threshold():
+    today = date(2026, 4, 1)
+    sug = {"window_start": "2026-05-01", "window_end": "2026-05-02", "reason": "r"}
+    assert MIN_CONFIDENCE <= 0.4
+    assert len(_to_requests("e0", [dict(sug, confidence=0.4)], MIN_CONFIDENCE, today)) == 1
+    assert _to_requests("e0", [dict(sug, confidence=0.39)], MIN_CONFIDENCE, today) == []
+    assert _to_requests("e0", [dict(sug, confidence="high"), dict(sug, window_start="soon", confidence=1)], 0,
+                        today) == []
+    assert _to_requests("e0", [dict(sug, window_end="2026-04-20", confidence=1)], 0, today) == []  # ends before it starts
+
+
+def test_hints_that_are_already_over_are_dropped():
+    sug = {"window_start": "2026-03-25", "window_end": "2026-04-01", "reason": "r", "confidence": 1}
+    assert len(_to_requests("e0", [sug], 0, date(2026, 4, 1))) == 1  # ends today: still useful
+    assert _to_requests("e0", [sug], 0, date(2026, 4, 2)) == []
+    past = (date.today() - timedelta(days=3)).isoformat()
+    assert _to_requests("e0", [dict(sug, window_start=past, window_end=past)], 0) == []
+
+
+def test_default_tokens_dir_does_not_depend_on_cwd(monkeypatch):
+    import backend.mailbox_scan as scan_module
+    monkeypatch.delenv("GMAIL_TOKENS_DIR")
+    try:
+        default = importlib.reload(scan_module).TOKENS_DIR
+    finally:
+        monkeypatch.undo()
+        importlib.reload(scan_module)
+    assert default == os.path.join(os.path.dirname(os.path.abspath(scan_module.__file__)), "gmail_tokens")
+
+
+def test_token_bucket_limits_the_rate():
+    bucket = TokenBucket(rate=100, capacity=10)
+    t0 = time.monotonic()
+    bucket.acquire(10)  # a full bucket is spent at once
+    assert time.monotonic() - t0 < 0.05
+    for _ in range(10):
+        bucket.acquire(2)
+    assert time.monotonic() - t0 >= 0.18  # 20 more units at 100/s
+    bucket.acquire(50)  # more than the capacity waits for a full bucket, not forever
+    assert time.monotonic() - t0 < 1
+
+
+def test_token_bucket_serves_callers_in_turn():
+    bucket = TokenBucket(rate=200, capacity=1)
+    finished = {}
+
+    def worker(name):
+        for _ in range(20):
+            bucket.acquire(1)
+        finished[name] = time.monotonic()
+
+    t0 = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in "ab"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    first, last = sorted(v - t0 for v in finished.values())
+    assert first > 0.75 * last  # neither caller drains the bucket while the other waits
+
+
+def test_user_quota_is_per_account_and_the_project_quota_is_shared():
+    limiter = QuotaLimiter(user_rate=10, project_rate=1000)
+    t0 = time.monotonic()
+    limiter.acquire("a", 10)
+    limiter.acquire("b", 10)  # another mailbox has its own per-user bucket
+    assert time.monotonic() - t0 < 0.05
+    limiter.acquire("a", 3)
+    assert time.monotonic() - t0 >= 0.25
+    shared = QuotaLimiter(user_rate=1000, project_rate=10)
+    t0 = time.monotonic()
+    shared.acquire("a", 10)
+    shared.acquire("b", 3)  # the project bucket is empty for every mailbox
+    assert time.monotonic() - t0 >= 0.25
+
+
+def test_team_scan_stores_hints_as_pending_requests(store, tmp_path):
+    rev = store.revision()
+    _, done = _scan(store, tmp_path)
+    assert done["mailboxes"] == 3 and done["failed"] == 0
+    assert done["hints"] == done["requests_added"] == 3
+    assert store.revision() > rev
+    [req] = store.employee_requests("e1", status="pending")
+    assert req.note.startswith("gmail hint:")
+    _, again = _scan(store, tmp_path)
+    assert again["hints"] == 3 and again["requests_added"] == 0  # existing requests are left alone
+
+
+def test_dry_run_reports_hints_without_writing(tmp_path, store):
+    rev = store.revision()
+    events, done = _scan(None, tmp_path)
+    assert done["hints"] == 3 and done["requests_added"] == 0
+    assert sum(ev["event"] == "suggestion" for ev in events) == 3
+    assert store.revision() == rev
+
+
+def test_demo_team_scan_never_touches_the_store(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    import backend.app as app_module
+    from backend import gmail_reader
+
+    monkeypatch.setattr(gmail_reader, "CREDENTIALS_FILE", str(tmp_path / "missing.json"))
+    client = TestClient(app_module.app)
+    rev = app_module.STORE.revision()
+    resp = client.post("/gmail/team-scan", params={"team": "beta"}).json()
+    job = app_module.SCAN_JOBS.get(resp["job_id"])
+    job.future.result(10)
+    body = client.get(f"/gmail/scan/{job.id}").json()
+    assert body["params"]["demo"] is True and body["params"]["dry_run"] is True
+    assert body["status"] == "done"
+    assert body["progress"]["hints"] > 0
+    assert body["progress"]["requests_added"] == 0
+    assert app_module.STORE.revision() == rev
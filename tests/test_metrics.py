@@ -0,0 +1,70 @@
+# tests/test_metrics.py
+import re
+
+from backend.metrics import STAGE_LATENCY, Registry, stage
+
+
+def test_counter_and_histogram_render_in_prometheus_text_format():
+    reg = Registry()
+    hits = reg.counter("t_hits_total", "Hits.", ["result"])
+    plain = reg.counter("t_plain_total", "No labels.")
+    lat = reg.histogram("t_seconds", "Latency.", ["route"], buckets=(0.1, 1.0))
+    hits.inc(result="hit")
+    hits.inc(2, result='mi"ss')
+    lat.observe(0.05, route="/a")
+    lat.observe(0.5, route="/a")
+    lat.observe(7, route="/a")
+    assert reg.counter("t_hits_total", "again", ["result"]) is hits  # re-registering returns the original
+    assert hits.value(result="hit") == 1 and lat.count(route="/a") == 3
+    assert plain.value() == 0
+    assert reg.render().splitlines() == [
+        "# HELP t_hits_total Hits.",
+        "# TYPE t_hits_total counter",
+        't_hits_total{result="hit"} 1',
+        't_hits_total{result="mi\\"ss"} 2',
+        "# HELP t_plain_total No labels.",
+        "# TYPE t_plain_total counter",
+        "t_plain_total 0",
+        "# HELP t_seconds Latency.",
+        "# TYPE t_seconds histogram",
+        't_seconds_bucket{route="/a",le="0.1"} 1',
+        't_seconds_bucket{route="/a",le="1"} 2',
+        't_seconds_bucket{route="/a",le="+Inf"} 3',
+        't_seconds_sum{route="/a"} 7.550000',
+        't_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_stage_records_the_block_even_when_it_raises():
+    before = STAGE_LATENCY.count(stage="test.boom")
+    try:
+        with stage("test.boom"):
+            raise ValueError
+    except ValueError:
+        pass
+    assert STAGE_LATENCY.count(stage="test.boom") == before + 1
+
+
+def _count(text, route, status):
+    m = re.search(r'^smartpto_http_request_duration_seconds_count\{method="GET",route="%s",status="%s"\} (\d+)$'
+                  % (re.escape(route), status), text, flags=re.M)
+    return int(m.group(1)) if m else 0
+
+
+def test_metrics_endpoint_labels_requests_by_route_template():
+    from fastapi.testclient import TestClient
+
+    import backend.app as app_module
+
+    client = TestClient(app_module.app)
+    before = client.get("/metrics").text
+    client.get("/scan-jobs-do-not-exist/abc")
+    client.get("/gmail/scan/no-such-job")
+    client.get("/gmail/scan/another-missing-job")
+    resp = client.get("/metrics")
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+    assert _count(text, "/gmail/scan/{job_id}", 404) == _count(before, "/gmail/scan/{job_id}", 404) + 2
+    assert _count(text, "unmatched", 404) == _count(before, "unmatched", 404) + 1
+    assert "/gmail/scan/no-such-job" not in text  # raw paths never become labels
+    assert _count(text, "/metrics", 200) >= 1
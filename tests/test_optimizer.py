@@ -0,0 +1,108 @@
+# tests/test_optimizer.py
+from datetime import date, timedelta
+
+import numpy as np
+
+from backend.models import Employee, ScheduleDemand
+from backend.optimizer import coverage_limit, optimize_schedule
+
+TODAY = date(2026, 3, 2)
+
+
+def _team(n, accrual=20.0):
+    return [Employee(id=f"e{i}", name=f"E{i}", accrual_days=accrual, team="t") for i in range(n)]
+
+
+def _run(employees, demands, ratio=0.3, horizon=60, occ=None, approved=()):
+    occ = np.zeros(horizon, dtype=np.int32) if occ is None else occ
+    return optimize_schedule(TODAY, horizon, ratio, employees, demands, lambda team: occ, {"t": len(employees)},
+                             approved=approved)
+
+
+def _out_per_day(result, horizon=60):
+    out = np.zeros(horizon, dtype=np.int32)
+    for a in result.assignments:
+        out[(a.window_start - TODAY).days:(a.window_end - TODAY).days + 1] += 1
+    return out
+
+
+def test_coverage_limit_lets_small_teams_take_leave():
+    assert coverage_limit(3, 0.3) == 1
+    assert coverage_limit(10, 0.3) == 3
+    assert coverage_limit(3, 0.0) == 0
+    assert coverage_limit(0, 0.5) == 0
+
+
+def test_three_person_team_is_scheduled_one_at_a_time():
+    emps = _team(3)
+    result = _run(emps, [ScheduleDemand(employee_id=e.id, desired_len_days=5) for e in emps])
+    assert result.unassigned == []
+    assert len(result.assignments) == 3
+    assert _out_per_day(result).max() == 1
+
+
+def test_a_zero_ratio_freezes_leave():
+    emps = _team(3)
+    result = _run(emps, [ScheduleDemand(employee_id="e0", desired_len_days=2)], ratio=0.0)
+    assert result.assignments == [] and result.unassigned == ["e0"]
+
+
+def test_unknown_employees_and_overdrawn_balances_are_reported():
+    emps = _team(3, accrual=4)
+    demands = [
+        ScheduleDemand(employee_id="ghost", desired_len_days=2),
+        ScheduleDemand(employee_id="e0", desired_len_days=7),  # at least 5 working days
+        ScheduleDemand(employee_id="e1", desired_len_days=3),
+        ScheduleDemand(employee_id="e1", desired_len_days=3),  # 6 calendar days, but a weekend makes it fit
+    ]
+    result = _run(emps, demands)
+    assert sorted(result.unassigned) == ["e0", "ghost"]
+    assert [a.employee_id for a in result.assignments] == ["e1", "e1"]
+    assert sum(a.pto_days for a in result.assignments) <= 4
+
+
+def test_preferred_starts_are_kept_when_free():
+    emps = _team(3)
+    pref = TODAY + timedelta(days=20)
+    result = _run(emps, [ScheduleDemand(employee_id="e1", desired_len_days=3, preferred_start=pref)])
+    assert result.assignments[0].window_start == pref
+    assert result.assignments[0].reason == "preferred start kept"
+
+
+def test_new_windows_avoid_the_employees_own_leave():
+    emps = _team(10)
+    pref = TODAY + timedelta(days=10)
+    own = [("e0", "t", pref.toordinal() + 1, pref.toordinal() + 2), ("e1", "t", 0, TODAY.toordinal() + 3)]
+    occ = np.zeros(60, dtype=np.int32)
+    occ[11:13] = 1
+    demands = [ScheduleDemand(employee_id="e0", desired_len_days=3, preferred_start=pref),
+               ScheduleDemand(employee_id="e0", desired_len_days=3, preferred_start=pref),
+               ScheduleDemand(employee_id="e1", desired_len_days=3)]
+    result = _run(emps, demands, occ=occ, approved=own)
+    windows = {}
+    for a in result.assignments:
+        windows.setdefault(a.employee_id, []).append((a.window_start, a.window_end))
+    first, second = sorted(windows["e0"])
+    assert first[1] < pref + timedelta(days=1) or first[0] > pref + timedelta(days=2)
+    assert second[1] < pref + timedelta(days=1) or second[0] > pref + timedelta(days=2)
+    assert first[1] < second[0]  # the employee's own windows do not overlap either
+    assert windows["e1"][0][0] > TODAY + timedelta(days=3)
+
+
+def test_app_schedules_every_pending_request_and_reports_unknown_demands():
+    from fastapi.testclient import TestClient
+
+    import backend.app as app_module
+
+    client = TestClient(app_module.app)
+    today = date.today()
+    starts = [today + timedelta(days=100), today + timedelta(days=120)]
+    for s in starts:
+        client.post("/pto", json={"employee_id": "u2", "start_date": s.isoformat(),
+                                  "end_date": (s + timedelta(days=1)).isoformat(), "status": "pending"})
+    body = client.post("/schedule/optimize", json={
+        "team": "alpha", "horizon_days": 180, "demands": [{"employee_id": "ghost", "desired_len_days": 2}],
+    }).json()
+    assert "ghost" in body["unassigned"]
+    got = sorted(a["window_start"] for a in body["assignments"] if a["employee_id"] == "u2")
+    assert got == [s.isoformat() for s in starts]
@@ -0,0 +1,26 @@
+# tests/test_providers.py
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# a fresh interpreter: this process may already have loaded the clients
+LOADED = (
+    "import json, sys\n"
+    "import backend.app\n"
+    "from backend import gmail_reader\n"
+    "from backend.fakes import FakeGmailService, demo_messages\n"
+    "gmail_reader.scan_and_suggest(10, service=FakeGmailService(demo_messages()))\n"
+    "print(json.dumps(sorted(m for m in sys.modules\n"
+    "                        if m.split('.')[0] in ('googleapiclient', 'google_auth_oauthlib', 'google_auth_httplib2')\n"
+    "                        or m.startswith(('google.generativeai', 'google.oauth2', 'google.auth')))))\n"
+)
+
+
+def test_importing_the_app_loads_no_google_client():
+    env = dict(os.environ)
+    env.pop("GEMINI_API_KEY", None)
+    out = subprocess.check_output([sys.executable, "-W", "ignore", "-c", LOADED], text=True, cwd=ROOT, env=env)
+    assert json.loads(out.strip().splitlines()[-1]) == []
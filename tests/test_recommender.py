@@ -0,0 +1,103 @@
+# tests/test_recommender.py
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from backend.models import PTORequest
+from backend.recommender import best_windows, occupancy, suggest_windows
+from backend.workdays import get_calendar
+
+TODAY = date(2026, 3, 2)  # a Monday
+CAL = get_calendar("US", 2026)
+
+
+def test_a_full_day_rules_out_the_window_even_when_the_average_is_low():
+    occ = np.zeros(30, dtype=np.int32)
+    occ[10] = 4  # the whole team of 4 is out
+    got = best_windows(TODAY, occ, 5, 4, 0.25, top_k=30, calendar=CAL)
+    assert got
+    for start, end, cov, _ in got:
+        assert not start <= TODAY + timedelta(days=10) <= end
+        assert cov == 0
+
+
+def test_windows_are_ranked_by_coverage_then_cost_then_date():
+    occ = np.zeros(21, dtype=np.int32)
+    occ[1:5] = 1  # one of 10 out Tuesday to Friday
+    occ[7:] = 1  # and every day from the next Monday
+    got = best_windows(TODAY, occ, 2, 10, 0.3, top_k=4, calendar=CAL)
+    # weekend windows cost nothing; the first free weekend is Mar 7-8
+    assert got[0] == (date(2026, 3, 7), date(2026, 3, 8), 0.0, 0)
+    assert [w[2] for w in got] == sorted(w[2] for w in got)
+    assert [w[0] for w in got[1:3]] == [date(2026, 3, 6), date(2026, 3, 8)]  # 0.05 and one PTO day each
+    assert all(w[0] > TODAY for w in got)  # min_lead_days
+
+
+def test_small_teams_and_freezes_follow_the_optimizer_cap():
+    occ = np.zeros(14, dtype=np.int32)
+    assert best_windows(TODAY, occ, 3, 3, 0.3, calendar=CAL)  # 3 people at 0.3: one may be out
+    occ[:] = 1
+    assert best_windows(TODAY, occ, 3, 3, 0.3, calendar=CAL) == []
+    assert best_windows(TODAY, np.zeros(14, dtype=np.int32), 3, 3, 0.0, calendar=CAL) == []
+    assert best_windows(TODAY, occ, 20, 3, 1.0, calendar=CAL) == []  # longer than the horizon
+
+
+def test_suggest_windows_counts_out_dates_inside_the_horizon():
+    out = ["2026-03-03", date(2026, 3, 3), date(2026, 2, 1), date(2027, 1, 1)]
+    assert occupancy(TODAY, 5, out).tolist() == [0, 2, 0, 0, 0]
+    got = suggest_windows(TODAY, 10, 2, 2, out, 0.5, top_k=10)
+    assert got and all(s > date(2026, 3, 3) for s, _, _, _ in got)
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    import backend.app as app_module
+
+    app_module.STORE.load_employees([{"id": f"r{i}", "name": f"R{i}", "team": "rec", "accrual_days": 10}
+                                     for i in range(4)])
+    return TestClient(app_module.app), app_module
+
+
+def test_recommend_endpoint_skips_days_the_team_is_full(client):
+    client, app_module = client
+    busy = date.today() + timedelta(days=5)
+    for i in range(1, 4):
+        app_module.STORE.upsert_request(PTORequest(employee_id=f"r{i}", start_date=busy, end_date=busy,
+                                                   status="approved"))
+    store = app_module.STORE
+    app_module.SNAPSHOTS.refresh(store.store_id(), store.revision, store.requests_between)  # reads may lag writes
+    got = client.get("/recommend", params={"employee_id": "r0", "desired_len_days": 3, "horizon_days": 30,
+                                           "max_coverage_ratio": 0.5, "top_k": 20}).json()
+    assert len(got) == 20
+    for w in got:
+        assert not date.fromisoformat(w["window_start"]) <= busy <= date.fromisoformat(w["window_end"])
+        assert w["employee_id"] == "r0" and w["coverage_ratio"] <= 0.5
+    assert client.get("/recommend", params={"employee_id": "nobody"}).json()["error"] == "employee not found"
+
+
+def test_batch_applies_each_members_balance(client):
+    client, app_module = client
+    app_module.STORE.load_employees([{"id": "b0", "name": "B0", "team": "batch", "accrual_days": 10},
+                                     {"id": "b1", "name": "B1", "team": "batch", "accrual_days": 0}])
+    got = client.post("/recommend/batch", json={"team": "batch", "employee_ids": ["r0"], "desired_len_days": 3,
+                                                "horizon_days": 60, "top_k": 5}).json()
+    by_emp = {}
+    for w in got:
+        by_emp.setdefault(w["employee_id"], []).append(w)
+    assert sorted(by_emp) == ["b0", "r0"] or sorted(by_emp) == ["b0", "b1", "r0"]
+    assert len(by_emp["b0"]) == len(by_emp["r0"]) == 5
+    assert len(by_emp.get("b1", [])) < 5  # only long weekends cost nothing
+    assert all(w["pto_days"] == 0 for w in by_emp.get("b1", []))
+
+
+def test_batch_rejects_unknown_or_empty_selections(client):
+    client, _ = client
+    resp = client.post("/recommend/batch", json={"employee_ids": ["r0", "ghost"]})
+    assert resp.status_code == 404 and resp.json()["employee_ids"] == ["ghost"]
+    resp = client.post("/recommend/batch", json={"team": "no-such-team"})
+    assert resp.status_code == 404 and resp.json()["team"] == "no-such-team"
+    assert client.post("/recommend/batch", json={}).status_code == 422
+    assert client.post("/recommend/batch", json={"team": "rec", "top_k": 0}).status_code == 422
@@ -0,0 +1,104 @@
+# tests/test_snapshot.py
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from backend import snapshot
+from backend.absence import AbsenceIndex
+from backend.models import PTORequest
+from backend.snapshot import SnapshotReader
+from backend.store import Store
+
+TODAY = date.today()
+
+
+def _store(path, starts):
+    s = Store(str(path))
+    s.load_employees([{"id": "u1", "name": "U1", "team": "alpha", "accrual_days": 20},
+                      {"id": "u2", "name": "U2", "team": "beta", "accrual_days": 20}])
+    s.load_requests([PTORequest(employee_id="u1", start_date=d, end_date=d + timedelta(days=2), status="approved")
+                     for d in starts])
+    return s
+
+
+def _refresh(reader, store):
+    return reader.refresh(store.store_id(), store.revision, store.requests_between)
+
+
+@pytest.fixture
+def reader(tmp_path):
+    return SnapshotReader(str(tmp_path / "occ"))
+
+
+def test_occupancy_matches_the_absence_index(tmp_path, reader):
+    store = _store(tmp_path / "a.db", [TODAY + timedelta(days=d) for d in (-400, -3, 10, 11, 700)])
+    snap = _refresh(reader, store)
+    idx = AbsenceIndex.from_rows(store.requests_between(TODAY - timedelta(days=366), TODAY + timedelta(days=800)))
+    for team in ("alpha", "beta", "nobody"):
+        for first, days in ((TODAY - timedelta(days=380), 60), (TODAY, 30), (TODAY + timedelta(days=690), 90)):
+            assert np.array_equal(snap.occupancy(team, first, days), idx.occupancy(team, first, days))
+            last = first + timedelta(days=days - 1)
+            assert snap.out_days(team, first, last) == idx.out_days(team, first, last)
+    assert _refresh(reader, store) is snap  # same store, same revision: nothing to rebuild
+
+
+def test_another_database_at_the_same_revision_is_rebuilt(tmp_path, reader):
+    a = _store(tmp_path / "a.db", [TODAY + timedelta(days=5)])
+    b = _store(tmp_path / "b.db", [TODAY + timedelta(days=20)])
+    assert a.revision() == b.revision() and a.store_id() != b.store_id()
+    assert _refresh(reader, a).out_days("alpha", TODAY, TODAY + timedelta(days=30)) == 3
+    snap = _refresh(reader, b)
+    assert snap.store_id == b.store_id()
+    assert snap.occupancy("alpha", TODAY + timedelta(days=5), 1).tolist() == [0]
+    assert snap.occupancy("alpha", TODAY + timedelta(days=20), 1).tolist() == [1]
+    assert Store(str(tmp_path / "b.db")).store_id() == b.store_id()  # fixed for the life of the file
+
+
+def test_a_snapshot_from_an_earlier_day_is_rebuilt(tmp_path, reader, monkeypatch):
+    store = _store(tmp_path / "a.db", [TODAY + timedelta(days=5)])
+    old = _refresh(reader, store)
+    tomorrow = TODAY + timedelta(days=1)
+    monkeypatch.setattr(snapshot, "_window_start", lambda: tomorrow - timedelta(days=366))
+    assert not reader.up_to_date(old, store.store_id(), store.revision())
+    snap = _refresh(reader, store)
+    assert snap.base == old.base + 1
+    assert snap.out_days("alpha", TODAY, TODAY + timedelta(days=30)) == 3
+
+
+def test_files_from_the_previous_layout_are_not_mapped(reader):
+    with open(reader.path, "wb") as f:
+        f.write(snapshot.MAGIC + (1).to_bytes(4, "little") + bytes(120))
+    assert reader.current() is None
+
+
+def test_app_answers_from_the_last_snapshot_while_rebuilding(tmp_path, monkeypatch):
+    import backend.app as app_module
+
+    reader = SnapshotReader(str(tmp_path / "occ"))
+    monkeypatch.setattr(app_module, "SNAPSHOTS", reader)
+    store = app_module.STORE
+    first = app_module._absence_index()  # nothing to serve yet: built on the spot
+    assert reader.up_to_date(first, store.store_id(), store.revision())
+
+    day = TODAY + timedelta(days=300)
+    resp = app_module.submit_pto(PTORequest(employee_id="u3", start_date=day, end_date=day + timedelta(days=1),
+                                            status="approved"))
+    assert resp["team_out_days"] == 2  # counted from the store, not the stale snapshot
+
+    gate = threading.Event()
+    rows = store.requests_between
+
+    def slow_rows(start, end, status="approved"):
+        gate.wait(5)
+        return rows(start, end, status)
+
+    monkeypatch.setattr(store, "requests_between", slow_rows)
+    assert app_module._absence_index() is first  # served at once, rebuilt in the background
+    assert not reader.refresh_in_background(store.store_id(), store.revision, slow_rows)  # one builder at a time
+    gate.set()
+    reader.wait(5)
+    snap = app_module._absence_index()
+    assert reader.up_to_date(snap, store.store_id(), store.revision())
+    assert snap.out_days("beta", day, day + timedelta(days=1)) == 2
@@ -0,0 +1,35 @@
+# tests/test_store.py
+from datetime import date
+
+import pytest
+
+from backend.models import PTORequest
+from backend.store import _ALL_RANGE, Store
+
+DAY = date(2026, 3, 2)
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = Store(str(tmp_path / "store.db"))
+    s.load_employees([{"id": "u1", "name": "U1", "team": "alpha", "accrual_days": 10}])
+    s.load_requests([PTORequest(employee_id="u1", start_date=DAY, end_date=DAY, status="approved")])
+    return s
+
+
+def test_range_reads_use_an_index(store):
+    with store._conn() as con:
+        plan = " ".join(row[-1] for row in con.execute("EXPLAIN QUERY PLAN " + _ALL_RANGE, (1, 2, "approved")))
+    assert "SCAN pto_requests" not in plan and "ix_pto_status_end" in plan
+    assert store.requests_between(DAY, DAY) == [("u1", "alpha", DAY.toordinal(), DAY.toordinal())]
+    assert store.requests_between(date(2026, 3, 3), date(2026, 4, 1)) == []
+
+
+def test_employee_changes_bump_the_revision_and_move_their_requests(store):
+    rev = store.revision()
+    store.load_employees([{"id": "u1", "name": "U1", "team": "beta", "accrual_days": 4}])
+    assert store.revision() == rev + 1
+    assert store.get_employee("u1").accrual_days == 4
+    assert store.requests_between(DAY, DAY) == [("u1", "beta", DAY.toordinal(), DAY.toordinal())]
+    assert [r.start_date for r in store.team_requests("beta", DAY, DAY)] == [DAY]
+    assert store.team_requests("alpha", DAY, DAY) == []
@@ -0,0 +1,55 @@
+# tests/test_workdays.py
+from datetime import date, timedelta
+
+import numpy as np
+
+from backend.workdays import BusinessCalendar, get_calendar, holidays
+
+
+def test_us_holidays_move_off_weekends():
+    got = holidays("US", 2026)
+    assert date(2026, 7, 3) in got  # Jul 4 is a Saturday
+    assert date(2026, 11, 26) in got  # fourth Thursday of November
+    assert date(2026, 5, 25) in got  # last Monday of May
+    assert date(2027, 12, 24) in holidays("US", 2027)  # Christmas on a Saturday
+    assert holidays("NONE", 2026) == []
+
+
+def test_uk_easter_and_substitute_days():
+    got = holidays("UK", 2027)
+    assert date(2027, 3, 26) in got and date(2027, 3, 29) in got  # Good Friday, Easter Monday
+    assert [d for d in got if d.month == 12] == [date(2027, 12, 27), date(2027, 12, 28)]  # Sat + Sun move to Mon + Tue
+    assert [d for d in holidays("UK", 2022) if d.month == 12] == [date(2022, 12, 26), date(2022, 12, 27)]
+    assert holidays("UK", 2022)[0] == date(2022, 1, 3)
+    assert get_calendar("UK", 2027).pto_cost(date(2027, 12, 20), date(2027, 12, 31)) == 8
+    assert [d for d in holidays("US", 2027) if d.month == 12] == [date(2027, 12, 24)]  # US keeps the Friday
+
+
+def test_pto_cost_skips_weekends_and_holidays():
+    cal = get_calendar("US", 2026)
+    assert cal.pto_cost(date(2026, 3, 2), date(2026, 3, 8)) == 5
+    assert cal.pto_cost(date(2026, 12, 24), date(2026, 12, 28)) == 2  # Thu, Christmas Fri, weekend, Mon
+    assert cal.pto_cost(date(2026, 3, 8), date(2026, 3, 2)) == 0
+    assert cal.pto_cost(date(2030, 6, 3), date(2030, 6, 9)) == 5  # outside the calendar: Mon-Fri
+
+
+def test_window_costs_and_flags_match_day_by_day_counts():
+    cal = BusinessCalendar("US", date(2026, 1, 1), 120)
+    first = date(2026, 3, 20)
+    for length in (1, 4, 9):
+        costs = cal.window_costs(first, 60, length)  # runs past the calendar's end
+        expected = [cal.pto_cost(first + timedelta(days=i), first + timedelta(days=i + length - 1)) for i in range(60)]
+        assert costs.tolist() == expected
+    flags = cal.work_flags(date(2025, 12, 29), 10)
+    assert flags.tolist() == [1, 1, 1, 0, 1, 0, 0, 1, 1, 1]  # New Year's Day, then a weekend
+    assert np.array_equal(cal.work_flags(date(2026, 1, 5), 5), np.ones(5))
+    for first, n in ((date(2025, 12, 1), 60), (date(2026, 4, 20), 30), (date(2026, 9, 1), 14)):
+        last = first + timedelta(days=n - 1)
+        assert cal.pto_cost(first, last) == int(cal.work_flags(first, n).sum())  # same rule across the edges
+
+
+def test_bridges_rank_days_off_per_pto_day():
+    cal = get_calendar("US", 2026)
+    best = cal.bridges(date(2026, 11, 1), 60, max_pto_days=1, top_k=3)
+    assert best[0] == (date(2026, 11, 26), date(2026, 11, 29), 4, 1)  # Thanksgiving + Friday
+    assert all(off / pto >= 3 for _, _, off, pto in best)